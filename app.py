@@ -3,10 +3,9 @@ from app import create_app, db
 # 애플리케이션 생성
 app = create_app()
 
-# 데이터베이스 생성 및 초기화
-with app.app_context():
-    db.create_all()
-
 # 서버 실행
 if __name__ == "__main__":
+    # 개발 서버로 직접 실행할 때만 테이블 생성 (import 시에는 DB 에 접근하지 않음, 운영은 flask db upgrade)
+    with app.app_context():
+        db.create_all()
     app.run(debug=True)
@@ -6,7 +6,6 @@ from dotenv import load_dotenv
 from logging.handlers import RotatingFileHandler
 from flask_bcrypt import Bcrypt
 from flask_migrate import Migrate
-from ultralytics import YOLO
 
 # .env 파일 로드
 load_dotenv()
@@ -20,21 +19,147 @@ bcrypt = Bcrypt()
 # Migrate 객체 생성
 migrate = Migrate()
 
-def create_app():
+def create_app(role=None):
+    """role 에 따라 필요한 구성요소만 초기화합니다.
+
+    all: 한 프로세스에서 전부 / web: 페이지와 API (캡쳐·추론은 다른 프로세스) /
+    capture: 카메라 캡쳐, 연속 탐지, 로그 기록 / inference: 탐지 모델만 (python -m app.roles 로 실행)
+    """
+    from .startup import StartupTimer, startup_report_command
+    from .roles import ROLES
+    timer = StartupTimer()
     app = Flask(__name__)
-    
-    # yolo모델
-    app.yolo_model = YOLO('yolov8n.pt') 
-    
+
+    # 프로세스 역할 및 역할 간 로컬 큐 서버 설정
+    role = (role or os.getenv('APP_ROLE', 'all')).lower()
+    if role not in ROLES:
+        raise RuntimeError(f"APP_ROLE must be one of {', '.join(ROLES)}. Check your .env file.")
+    app.config['APP_ROLE'] = role
+
     # 설정 로드
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY')
     app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['DEBUG'] = os.getenv('DEBUG', 'False').lower() == 'true'
 
+    # YOLO 추론 엔진 설정
+    app.config['YOLO_MODEL_PATH'] = os.getenv('YOLO_MODEL_PATH', 'yolov8n.pt')
+    app.config['YOLO_IMGSZ'] = int(os.getenv('YOLO_IMGSZ', '640'))
+    app.config['YOLO_CONF'] = float(os.getenv('YOLO_CONF', '0.5'))
+    app.config['YOLO_WARMUP'] = os.getenv('YOLO_WARMUP', 'True').lower() == 'true'
+    # 시작 시 모델을 미리 로드할지 여부 (끄면 첫 추론 시 로드되어 웹/마이그레이션 프로세스가 빠르게 시작)
+    app.config['YOLO_PRELOAD'] = os.getenv('YOLO_PRELOAD', 'False').lower() == 'true'
+    # 탐지기 백엔드: torch / onnx / onnx-int8 / openvino (DETECTOR_THREADS: ONNX Runtime intra-op 스레드 수, 0 이면 자동)
+    app.config['DETECTOR_BACKEND'] = os.getenv('DETECTOR_BACKEND', 'torch').lower()
+    app.config['DETECTOR_THREADS'] = int(os.getenv('DETECTOR_THREADS', '0'))
+    # 추론 워커 프로세스 수 (0 이면 웹 프로세스 안에서 추론), 워커당 스레드 수, 공유 메모리 슬롯 크기(높이x너비)
+    app.config['INFERENCE_WORKERS'] = int(os.getenv('INFERENCE_WORKERS', '0'))
+    app.config['INFERENCE_WORKER_THREADS'] = int(os.getenv('INFERENCE_WORKER_THREADS', '1'))
+    max_height, max_width = (int(v) for v in os.getenv('INFERENCE_MAX_FRAME', '1080x1920').lower().split('x'))
+    app.config['INFERENCE_MAX_FRAME_SHAPE'] = (max_height, max_width, 3)
+
+    # 다중 카메라 배치 추론 설정
+    app.config['BATCH_MAX_SIZE'] = int(os.getenv('BATCH_MAX_SIZE', '16'))
+    app.config['BATCH_MAX_WAIT'] = float(os.getenv('BATCH_MAX_WAIT', '0.05'))
+    app.config['BATCH_MAX_AGE'] = float(os.getenv('BATCH_MAX_AGE', '0.5'))
+
+    # MJPEG 스트리밍 설정
+    app.config['STREAM_MAX_FPS'] = float(os.getenv('STREAM_MAX_FPS', '10'))
+    app.config['STREAM_CLIENT_BUFFER'] = int(os.getenv('STREAM_CLIENT_BUFFER', '2'))
+    app.config['STREAM_JPEG_QUALITY'] = int(os.getenv('STREAM_JPEG_QUALITY', '80'))
+    app.config['STREAM_IDLE_TIMEOUT'] = float(os.getenv('STREAM_IDLE_TIMEOUT', '10'))
+
+    # 카메라 캡쳐 풀 설정
+    app.config['CAPTURE_IDLE_TIMEOUT'] = float(os.getenv('CAPTURE_IDLE_TIMEOUT', '30'))
+    app.config['CAPTURE_BACKOFF_MIN'] = float(os.getenv('CAPTURE_BACKOFF_MIN', '0.5'))
+    app.config['CAPTURE_BACKOFF_MAX'] = float(os.getenv('CAPTURE_BACKOFF_MAX', '10'))
+    # 카메라별 공유 메모리 프레임 링 슬롯 수 (읽는 쪽이 뷰를 보유할 수 있는 프레임 수)
+    app.config['CAPTURE_RING_SLOTS'] = int(os.getenv('CAPTURE_RING_SLOTS', '8'))
+
+    # 스냅샷 비동기 저장 설정 (SNAPSHOT_FORMAT: jpg 또는 webp)
+    app.config['SNAPSHOT_WORKERS'] = int(os.getenv('SNAPSHOT_WORKERS', '2'))
+    app.config['SNAPSHOT_QUEUE_SIZE'] = int(os.getenv('SNAPSHOT_QUEUE_SIZE', '32'))
+    app.config['SNAPSHOT_FORMAT'] = os.getenv('SNAPSHOT_FORMAT', 'jpg').lower()
+    app.config['SNAPSHOT_JPEG_QUALITY'] = int(os.getenv('SNAPSHOT_JPEG_QUALITY', '90'))
+    app.config['SNAPSHOT_WEBP_QUALITY'] = int(os.getenv('SNAPSHOT_WEBP_QUALITY', '80'))
+
+    # 연속 탐지 파이프라인 설정 (PIPELINE_HEARTBEAT: 수준 변화가 없어도 기록하는 주기, 초)
+    app.config['PIPELINE_ENABLED'] = os.getenv('PIPELINE_ENABLED', 'False').lower() == 'true'
+    app.config['PIPELINE_SAMPLE_FPS'] = float(os.getenv('PIPELINE_SAMPLE_FPS', '1'))
+    app.config['PIPELINE_HEARTBEAT'] = float(os.getenv('PIPELINE_HEARTBEAT', '60'))
+    app.config['PIPELINE_REFRESH'] = float(os.getenv('PIPELINE_REFRESH', '30'))
+
+    # 사람 추적 설정 (TRACK_KEYFRAME_INTERVAL 프레임마다 한 번 탐지, 사이 프레임은 트랙 외삽)
+    app.config['TRACK_KEYFRAME_INTERVAL'] = int(os.getenv('TRACK_KEYFRAME_INTERVAL', '1'))
+    app.config['TRACK_MAX_AGE'] = float(os.getenv('TRACK_MAX_AGE', '1'))
+    # 추적기 2단계 매칭에 쓰는 낮은 신뢰도 하한. 탐지기는 이 값까지 내보내고, 이보다 높은 YOLO_CONF 미만의 박스는
+    # 기존 트랙을 이어 붙이는 데만 쓰임 (새 트랙·추적 없는 집계는 YOLO_CONF 기준)
+    app.config['TRACK_LOW_CONF'] = float(os.getenv('TRACK_LOW_CONF', '0.1'))
+
+    # 움직임 기반 탐지 생략 설정 (MOTION_GATE_CCTVS: 적용할 CCTV ID 목록, '*' 이면 전체)
+    from .motion import parse_overrides
+    app.config['MOTION_GATE_CCTVS'] = [c.strip() for c in os.getenv('MOTION_GATE_CCTVS', '').split(',') if c.strip()]
+    app.config['MOTION_THRESHOLD'] = float(os.getenv('MOTION_THRESHOLD', '0.01'))
+    app.config['MOTION_MAX_INTERVAL'] = float(os.getenv('MOTION_MAX_INTERVAL', '5'))
+    app.config['MOTION_GATE_OVERRIDES'] = parse_overrides(os.getenv('MOTION_GATE_OVERRIDES'))
+
+    # 쓰러짐 감지 설정 (FALL_WINDOW/FALL_MIN_DOWN: 초). 포즈 모델은 탐지 모델과 같은 추론 경로에서 실행되며,
+    # 판단은 탐지 샘플(PIPELINE_SAMPLE_FPS)마다 이뤄집니다. 누운 것으로 보인 사람만 다음 샘플 전까지
+    # FALL_CONFIRM_FPS 로 포즈를 다시 확인해 FALL_MIN_DOWN 유지 여부를 샘플 간격보다 촘촘히 판단 (0 이면 끔)
+    app.config['FALL_ENABLED'] = os.getenv('FALL_ENABLED', 'True').lower() == 'true'
+    app.config['FALL_POSE_MODEL_PATH'] = os.getenv('FALL_POSE_MODEL_PATH', 'yolov8n-pose.pt')
+    app.config['FALL_POSE_IMGSZ'] = int(os.getenv('FALL_POSE_IMGSZ', '256'))
+    app.config['FALL_MAX_PEOPLE'] = int(os.getenv('FALL_MAX_PEOPLE', '16'))
+    app.config['FALL_WINDOW'] = float(os.getenv('FALL_WINDOW', '3'))
+    app.config['FALL_MIN_DOWN'] = float(os.getenv('FALL_MIN_DOWN', '1'))
+    app.config['FALL_CONFIRM_FPS'] = float(os.getenv('FALL_CONFIRM_FPS', '5'))
+
+    # 탐지/이상행동 로그 일괄 기록 설정
+    app.config['LOG_SINK_BATCH_SIZE'] = int(os.getenv('LOG_SINK_BATCH_SIZE', '200'))
+    app.config['LOG_SINK_FLUSH_INTERVAL'] = float(os.getenv('LOG_SINK_FLUSH_INTERVAL', '1'))
+    app.config['LOG_SINK_MAX_QUEUE'] = int(os.getenv('LOG_SINK_MAX_QUEUE', '10000'))
+    app.config['LOG_SINK_MAX_RETRIES'] = int(os.getenv('LOG_SINK_MAX_RETRIES', '3'))
+
+    # 구역 밀도 구간 (명/m², 보정 정보가 있는 CCTV 에 적용. 밀집 정도 보통/높음/매우 높음, 과밀 수준 주의/경고/위험 경계)
+    from .density import parse_thresholds, DEFAULT_DENSITY_THRESHOLDS, DEFAULT_OVERCROWDING_THRESHOLDS
+    app.config['DENSITY_THRESHOLDS'] = parse_thresholds(os.getenv('DENSITY_THRESHOLDS'), DEFAULT_DENSITY_THRESHOLDS)
+    app.config['OVERCROWDING_THRESHOLDS'] = parse_thresholds(os.getenv('OVERCROWDING_THRESHOLDS'), DEFAULT_OVERCROWDING_THRESHOLDS)
+
+    # 밀집도 집계 설정 (이 간격(초)보다 긴 로그 사이 구간은 체류 시간에 포함하지 않음)
+    app.config['ROLLUP_MAX_GAP'] = float(os.getenv('ROLLUP_MAX_GAP', '300'))
+
+    # 실시간 알림(SSE) 설정
+    app.config['EVENTS_HISTORY'] = int(os.getenv('EVENTS_HISTORY', '500'))
+    app.config['EVENTS_CLIENT_QUEUE'] = int(os.getenv('EVENTS_CLIENT_QUEUE', '100'))
+    app.config['EVENTS_KEEPALIVE'] = float(os.getenv('EVENTS_KEEPALIVE', '15'))
+
+    # CCTV 목록 캐시 (CCTV_CACHE_TTL: 초, CCTV_CACHE_STAMP: 여러 웹 워커가 무효화를 공유할 파일 경로, 비우면 프로세스 안에서만)
+    app.config['CCTV_CACHE_TTL'] = float(os.getenv('CCTV_CACHE_TTL', '30'))
+    app.config['CCTV_CACHE_STAMP'] = os.getenv('CCTV_CACHE_STAMP', '')
+    # CCTV 최근 접근 시간을 모아 기록하는 주기 (초)
+    app.config['LAST_ACCESS_FLUSH_INTERVAL'] = float(os.getenv('LAST_ACCESS_FLUSH_INTERVAL', '5'))
+
+    app.config['ROLE_BROKER_ADDRESS'] = os.getenv('ROLE_BROKER_ADDRESS', '127.0.0.1:50055')
+    app.config['ROLE_BROKER_AUTHKEY'] = os.getenv('ROLE_BROKER_AUTHKEY') or app.config['SECRET_KEY'] or ''
+    # 원격 추론 요청에 쓰는 공유 메모리 프레임 링 슬롯 수 (동시에 대기할 수 있는 요청 수)
+    app.config['ROLE_RING_SLOTS'] = int(os.getenv('ROLE_RING_SLOTS', '16'))
+
+    # 단계별 지표 (/metrics). capture / inference 역할은 METRICS_PORT 가 있으면 별도 포트로 노출
+    app.config['METRICS_ENABLED'] = os.getenv('METRICS_ENABLED', 'True').lower() == 'true'
+    app.config['METRICS_PORT'] = int(os.getenv('METRICS_PORT', '0'))
+    # METRICS_HOST: 별도 지표 서버의 바인드 주소 (기본은 로컬만). /metrics 는 로그인 없이 METRICS_ALLOW 주소나
+    # "Authorization: Bearer <METRICS_TOKEN>" 요청에만 응답 (리버스 프록시 뒤라면 프록시 주소가 허용되지 않도록 토큰 사용)
+    app.config['METRICS_HOST'] = os.getenv('METRICS_HOST', '127.0.0.1')
+    app.config['METRICS_TOKEN'] = os.getenv('METRICS_TOKEN', '')
+    app.config['METRICS_ALLOW'] = tuple(a.strip() for a in os.getenv('METRICS_ALLOW', '127.0.0.1,::1').split(',') if a.strip())
+
     # SQLALCHEMY_DATABASE_URI 확인
     if not app.config['SQLALCHEMY_DATABASE_URI']:
         raise RuntimeError("SQLALCHEMY_DATABASE_URI is not set. Check your .env file.")
+    # 역할을 나눠 실행하면 큐 서버 인증 키 필요
+    if role != 'all':
+        from .roles import require_authkey
+        require_authkey(app.config['ROLE_BROKER_AUTHKEY'])
 
     # 데이터베이스 초기화
     db.init_app(app)
@@ -43,11 +168,86 @@ def create_app():
     migrate.init_app(app, db)
     # 로그 설정
     setup_logging(app)
+    app.cli.add_command(startup_report_command)
+    from .metrics import init_metrics
+    init_metrics(app)
+    timer.mark("config")
+
+    # yolo모델 (프로세스 전역 엔진 구성, 모델은 첫 추론 시 또는 YOLO_PRELOAD 일 때 로드)
+    # web / capture 역할에서는 inference 역할에 추론을 요청하는 원격 엔진
+    from .inference import init_engine
+    app.inference_engine = init_engine(app)
+    timer.mark("inference")
+    if role == 'inference':
+        return _finish_startup(app, timer)
+
+    # 카메라 프레임을 모아 한 번에 추론하는 배치 스케줄러
+    from .scheduler import init_scheduler
+    app.batch_scheduler = init_scheduler(app)
+    timer.mark("scheduler")
+
+    # 장치를 열어두고 재사용하는 캡쳐 풀 (web 역할은 capture 역할의 프레임 링을 읽음)
+    from .capture import init_capture_pool
+    from .roles import get_broker, RingPublisher
+    app.capture_pool = init_capture_pool(app, on_ring=RingPublisher(get_broker(app)).start() if role == 'capture' else None)
+    timer.mark("capture")
+
+    # 캡쳐/탐지 스냅샷 비동기 저장
+    from .snapshot import init_snapshot_writer
+    app.snapshot_writer = init_snapshot_writer(app)
+    timer.mark("snapshot")
+
+    # 탐지/이상행동 로그 일괄 기록
+    from .log_sink import init_log_sink
+    app.log_sink = init_log_sink(app)
+    timer.mark("log_sink")
+
+    # DetectionLog 기록 시 분/시간/일 집계 증분 갱신
+    from .rollup import init_rollups
+    app.rollup_updater = init_rollups(app, app.log_sink)
+
+    # 기록된 로그를 대시보드로 push 하는 이벤트 버스
+    from .events import init_events
+    app.event_bus = init_events(app, app.log_sink)
+    # 역할이 나뉘어 있으면 capture 역할의 이벤트를 큐 서버를 거쳐 web 역할의 SSE 로 전달
+    from .roles import forward_events, relay_events
+    if role == 'capture':
+        forward_events(app.event_bus, get_broker(app))
+    elif role == 'web':
+        relay_events(app.event_bus, get_broker(app))
+    timer.mark("rollups_events")
+
+    if role in ('all', 'web'):
+        # 카메라별 공유 MJPEG 스트림
+        from .streaming import init_stream_hub
+        app.stream_hub = init_stream_hub(app)
+        timer.mark("streaming")
+
+        # 페이지 요청마다 DB 를 조회하지 않도록 CCTV 목록과 그린 조각을 캐시
+        from .registry import init_registry
+        app.cctv_registry = init_registry(app)
+        # 최근 접근 시간은 요청마다 커밋하지 않고 모아서 기록 (종료 시 남은 값 기록)
+        from .last_access import init_last_access_buffer
+        app.last_access_buffer = init_last_access_buffer(app)
+
+        # 블루프린트 등록
+        from .routes import main as main_blueprint
+        app.register_blueprint(main_blueprint)
+        timer.mark("routes")
+
+    # 등록된 CCTV별 연속 탐지 및 DetectionLog 자동 기록 (capture 역할은 항상)
+    if role == 'capture' or (role == 'all' and app.config['PIPELINE_ENABLED']):
+        from .pipeline import init_pipeline
+        app.detection_pipeline = init_pipeline(app)
+        timer.mark("pipeline")
+
+    return _finish_startup(app, timer)
 
-    # 블루프린트 등록
-    from .routes import main as main_blueprint
-    app.register_blueprint(main_blueprint)
 
+def _finish_startup(app, timer):
+    # 단계별 시작 시간 (flask startup-report 로 모듈별 import 시간도 확인 가능)
+    app.startup_times = timer.report()
+    app.logger.info(f"앱 시작 완료 [{app.config['APP_ROLE']}] ({app.startup_times['total_ms']}ms): {app.startup_times['stages']}")
     return app
 
 
@@ -0,0 +1,273 @@
+import argparse
+import glob
+import json
+import os
+import time
+
+import numpy as np
+
+from .detection import iou_matrix
+
+# 지원하는 탐지기 백엔드 (DETECTOR_BACKEND)
+BACKENDS = ("torch", "onnx", "onnx-int8", "openvino")
+
+# COCO 키포인트 수
+NUM_KEYPOINTS = 17
+
+
+class TorchBackend:
+    """ultralytics PyTorch 모델을 그대로 사용하는 기본 백엔드."""
+
+    name = "torch"
+
+    def __init__(self, model_path="yolov8n.pt", imgsz=640, conf=0.5):
+        from ultralytics import YOLO
+        self.imgsz = imgsz
+        self.conf = conf
+        self.model = YOLO(model_path)
+
+    def predict_batch(self, frames, imgsz=None):
+        # imgsz 를 지정하면 이번 호출만 해당 입력 크기로 추론 (카메라별 inference_size)
+        results = self.model.predict(source=list(frames), imgsz=imgsz or self.imgsz, conf=self.conf, save=False, verbose=False)
+        return [result.boxes.data.cpu().numpy() for result in results]
+
+    def predict(self, frame, imgsz=None):
+        return self.predict_batch([frame], imgsz=imgsz)[0]
+
+
+class PoseBackend:
+    """ultralytics YOLOv8 pose 모델로 사람 박스 영역별 키포인트를 추정합니다 (쓰러짐 감지)."""
+
+    name = "pose"
+
+    def __init__(self, model_path="yolov8n-pose.pt", imgsz=256, conf=0.25):
+        from ultralytics import YOLO
+        self.imgsz = imgsz
+        self.conf = conf
+        self.model = YOLO(model_path)
+
+    def predict_pose(self, frame, boxes, imgsz=None):
+        """정수 박스 (M, 4) 영역을 잘라 추정하고 (M, 17, 3) [x, y, conf] 키포인트를 전체 프레임 좌표로 반환합니다."""
+        boxes = np.asarray(boxes, dtype=np.int32).reshape(-1, 4)
+        keypoints = np.full((len(boxes), NUM_KEYPOINTS, 3), np.nan, dtype=np.float32)
+        if len(boxes) == 0:
+            return keypoints
+        crops = [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in boxes.tolist()]
+        results = self.model.predict(source=crops, imgsz=imgsz or self.imgsz, conf=self.conf, save=False, verbose=False)
+        for i, result in enumerate(results):
+            if result.keypoints is None or len(result.boxes) == 0:
+                continue
+            # 잘라낸 영역 안에서 가장 확실한 사람 한 명의 키포인트 사용
+            best = int(result.boxes.conf.argmax())
+            points = result.keypoints.data[best].cpu().numpy()
+            points[:, :2] += boxes[i, :2]
+            keypoints[i] = points
+        return keypoints
+
+
+def letterbox(frame, imgsz):
+    """비율을 유지해 imgsz 정사각형에 맞추고 (입력 텐서, 배율, (pad_x, pad_y)) 를 반환합니다."""
+    import cv2
+    height, width = frame.shape[:2]
+    ratio = min(imgsz / height, imgsz / width)
+    new_w, new_h = round(width * ratio), round(height * ratio)
+    pad_x, pad_y = (imgsz - new_w) // 2, (imgsz - new_h) // 2
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    canvas[pad_y:pad_y + new_h, pad_x:pad_x + new_w] = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    tensor = canvas[:, :, ::-1].transpose(2, 0, 1).astype(np.float32) / 255.0
+    return tensor, ratio, (pad_x, pad_y)
+
+
+def nms(boxes, scores, iou_threshold):
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size:
+        best = order[0]
+        keep.append(best)
+        ious = iou_matrix(boxes[best:best + 1], boxes[order[1:]])[0]
+        order = order[1:][ious <= iou_threshold]
+    return np.array(keep, dtype=np.int64)
+
+
+class OnnxBackend:
+    """ONNX Runtime 으로 내보낸 YOLOv8 모델을 실행합니다. 출력은 TorchBackend 와 같은 (N, 6) 형식입니다."""
+
+    name = "onnx"
+
+    def __init__(self, onnx_path, imgsz=640, conf=0.5, iou=0.7, intra_op_threads=0, providers=None):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        self.imgsz = imgsz
+        self.conf = conf
+        self.iou = iou
+        self.model = ort.InferenceSession(onnx_path, sess_options=options, providers=providers or ["CPUExecutionProvider"])
+        self._input = self.model.get_inputs()[0]
+        # 배치 차원이 고정(1)이면 프레임별로 나눠 실행
+        self._dynamic_batch = not isinstance(self._input.shape[0], int)
+        # 입력 크기가 고정된 모델은 요청한 imgsz 를 무시하고 내보낼 때의 크기로 실행
+        self._dynamic_size = not isinstance(self._input.shape[2], int)
+
+    def _postprocess(self, output, ratio, pad, shape):
+        # (4 + 클래스 수, 후보 수) → (후보 수, 4 + 클래스 수)
+        output = output.T
+        class_scores = output[:, 4:]
+        classes = class_scores.argmax(axis=1)
+        scores = class_scores[np.arange(len(classes)), classes]
+        mask = scores >= self.conf
+        xywh, scores, classes = output[mask, :4], scores[mask], classes[mask]
+        if not len(scores):
+            return np.zeros((0, 6), dtype=np.float32)
+
+        boxes = np.concatenate([xywh[:, :2] - xywh[:, 2:] / 2, xywh[:, :2] + xywh[:, 2:] / 2], axis=1)
+        # 클래스별 NMS 는 클래스마다 좌표를 멀리 떨어뜨려 한 번에 처리
+        keep = nms(boxes + classes[:, None] * 7680.0, scores, self.iou)
+        boxes, scores, classes = boxes[keep], scores[keep], classes[keep]
+
+        boxes -= [pad[0], pad[1], pad[0], pad[1]]
+        boxes /= ratio
+        height, width = shape[:2]
+        boxes = np.clip(boxes, 0, [width, height, width, height])
+        return np.concatenate([boxes, scores[:, None], classes[:, None]], axis=1).astype(np.float32)
+
+    def predict_batch(self, frames, imgsz=None):
+        size = imgsz if imgsz and self._dynamic_size else self.imgsz
+        prepared = [letterbox(frame, size) for frame in frames]
+        if self._dynamic_batch:
+            outputs = self.model.run(None, {self._input.name: np.stack([p[0] for p in prepared])})[0]
+        else:
+            outputs = [self.model.run(None, {self._input.name: p[0][None]})[0][0] for p in prepared]
+        return [
+            self._postprocess(output, ratio, pad, frame.shape)
+            for output, (_, ratio, pad), frame in zip(outputs, prepared, frames)
+        ]
+
+    def predict(self, frame, imgsz=None):
+        return self.predict_batch([frame], imgsz=imgsz)[0]
+
+
+def export_onnx(model_path="yolov8n.pt", imgsz=640, int8=False):
+    """모델을 ONNX 로 한 번만 내보내고 (선택적으로 INT8 동적 양자화) 경로를 반환합니다.
+
+    이미 내보낸 파일이 원본보다 새로우면 다시 내보내지 않습니다.
+    """
+    base = os.path.splitext(model_path)[0]
+    onnx_path = f"{base}.onnx"
+    if not os.path.exists(onnx_path) or (os.path.exists(model_path) and os.path.getmtime(onnx_path) < os.path.getmtime(model_path)):
+        from ultralytics import YOLO
+        onnx_path = YOLO(model_path).export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+    if not int8:
+        return onnx_path
+
+    int8_path = f"{base}-int8.onnx"
+    if not os.path.exists(int8_path) or os.path.getmtime(int8_path) < os.path.getmtime(onnx_path):
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        quantize_dynamic(onnx_path, int8_path, weight_type=QuantType.QUInt8)
+    return int8_path
+
+
+def create_backend(name, model_path="yolov8n.pt", imgsz=640, conf=0.5, threads=0):
+    if name == "torch":
+        return TorchBackend(model_path, imgsz=imgsz, conf=conf)
+    if name in ("onnx", "onnx-int8", "openvino"):
+        # .onnx 경로를 직접 지정하면 내보내기를 건너뜀
+        if model_path.endswith(".onnx"):
+            onnx_path = model_path
+        else:
+            onnx_path = export_onnx(model_path, imgsz=imgsz, int8=name == "onnx-int8")
+        providers = ["OpenVINOExecutionProvider", "CPUExecutionProvider"] if name == "openvino" else None
+        backend = OnnxBackend(onnx_path, imgsz=imgsz, conf=conf, intra_op_threads=threads, providers=providers)
+        backend.name = name
+        return backend
+    raise ValueError(f"지원하지 않는 탐지기 백엔드: {name} (가능한 값: {', '.join(BACKENDS)})")
+
+
+def _match(reference, candidate, iou_threshold=0.5):
+    # 같은 클래스끼리 IoU 가 가장 큰 박스를 짝지어 일치 수와 평균 IoU 계산
+    if not len(reference) or not len(candidate):
+        return 0, []
+    ious = iou_matrix(reference[:, :4], candidate[:, :4])
+    ious[reference[:, 5][:, None] != candidate[:, 5][None, :]] = 0
+    matched, matched_ious, used = 0, [], set()
+    for row in range(len(reference)):
+        col = int(ious[row].argmax())
+        if ious[row, col] >= iou_threshold and col not in used:
+            used.add(col)
+            matched += 1
+            matched_ious.append(float(ious[row, col]))
+    return matched, matched_ious
+
+
+def compare_backends(frames, backends, runs=3):
+    """첫 번째 백엔드(보통 torch)를 기준으로 지연시간과 탐지 일치도(precision/recall/평균 IoU)를 비교합니다."""
+    reference = None
+    report = []
+    for backend in backends:
+        backend.predict(frames[0])  # 워밍업
+        latencies, outputs = [], []
+        for _ in range(runs):
+            for frame in frames:
+                start = time.perf_counter()
+                outputs.append(backend.predict(frame))
+                latencies.append(time.perf_counter() - start)
+        outputs = outputs[:len(frames)]
+        if reference is None:
+            reference = outputs
+
+        matched, ious, ref_total, cand_total = 0, [], 0, 0
+        for ref, cand in zip(reference, outputs):
+            m, i = _match(ref, cand)
+            matched += m
+            ious += i
+            ref_total += len(ref)
+            cand_total += len(cand)
+        latencies.sort()
+        report.append({
+            "backend": backend.name,
+            "latency_ms_p50": round(latencies[len(latencies) // 2] * 1000, 2),
+            "latency_ms_mean": round(sum(latencies) / len(latencies) * 1000, 2),
+            "precision": round(matched / cand_total, 4) if cand_total else None,
+            "recall": round(matched / ref_total, 4) if ref_total else None,
+            "mean_iou": round(sum(ious) / len(ious), 4) if ious else None,
+        })
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="YOLO 탐지기 백엔드 내보내기 및 비교")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser("export", help="ONNX (및 INT8) 모델 내보내기")
+    export.add_argument("--model", default=os.getenv('YOLO_MODEL_PATH', 'yolov8n.pt'))
+    export.add_argument("--imgsz", type=int, default=int(os.getenv('YOLO_IMGSZ', '640')))
+    export.add_argument("--int8", action="store_true")
+
+    compare = sub.add_parser("compare", help="PyTorch 대비 지연시간/정확도 비교")
+    compare.add_argument("images", help="비교에 사용할 이미지 glob (예: 'samples/*.jpg')")
+    compare.add_argument("--model", default=os.getenv('YOLO_MODEL_PATH', 'yolov8n.pt'))
+    compare.add_argument("--imgsz", type=int, default=int(os.getenv('YOLO_IMGSZ', '640')))
+    compare.add_argument("--backends", default="torch,onnx,onnx-int8")
+    compare.add_argument("--threads", type=int, default=0)
+    compare.add_argument("--runs", type=int, default=3)
+
+    args = parser.parse_args(argv)
+    if args.command == "export":
+        print(export_onnx(args.model, imgsz=args.imgsz, int8=args.int8))
+        return
+
+    import cv2
+    frames = [cv2.imread(path) for path in sorted(glob.glob(args.images))]
+    frames = [frame for frame in frames if frame is not None]
+    if not frames:
+        parser.error(f"이미지를 찾을 수 없습니다: {args.images}")
+    backends = [
+        create_backend(name.strip(), args.model, imgsz=args.imgsz, threads=args.threads)
+        for name in args.backends.split(",")
+    ]
+    print(json.dumps(compare_backends(frames, backends, runs=args.runs), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+STAGES = ("capture", "inference", "postprocess", "encode", "logging")
+
+
+def rss_mb():
+    # 현재 RSS (리눅스는 /proc, 그 외 유닉스는 최대 RSS 로 대체, 측정 불가면 None)
+    try:
+        with open("/proc/self/statm") as f:
+            return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20, 1)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (2 ** 20 if sys.platform == "darwin" else 2 ** 10), 1)
+
+
+class StageRecorder:
+    """카메라 스레드별 단계 지연시간과 스레드 CPU 시간을 모읍니다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.latencies = {stage: [] for stage in STAGES}
+            self.cpu = {stage: 0.0 for stage in STAGES}
+
+    def record(self, stage, wall, cpu):
+        with self._lock:
+            self.latencies[stage].append(wall)
+            self.cpu[stage] += cpu
+
+    def summary(self, duration):
+        report = {}
+        for stage in STAGES:
+            values = np.array(self.latencies[stage]) * 1000
+            report[stage] = {
+                "count": int(values.size),
+                "p50_ms": round(float(np.percentile(values, 50)), 2) if values.size else None,
+                "p99_ms": round(float(np.percentile(values, 99)), 2) if values.size else None,
+                "cpu_seconds": round(self.cpu[stage], 3),
+                "cpu_percent": round(self.cpu[stage] / duration * 100, 1),
+            }
+        return report
+
+
+class _Timed:
+    def __init__(self, recorder, stage):
+        self.recorder = recorder
+        self.stage = stage
+
+    def __enter__(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.thread_time()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.wall
+        self.recorder.record(self.stage, self.elapsed, time.thread_time() - self.cpu)
+
+
+def _camera_loop(index, capture, scheduler, sink, cctv_pk, recorder, frames, torn_frames, stop, jpeg_quality, tracker):
+    import cv2
+    from app.detection import summarize_detections, detection_log_fields, draw_detections
+    from app.models import DetectionLog
+
+    cctv_id = capture.cctv_id
+    seq = 0
+    while not stop.is_set():
+        with _Timed(recorder, "capture"):
+            seq, frame = capture.read(after_seq=seq, copy=False)
+        if frame is None:
+            continue
+
+        detect_time = [0.0]
+
+        def detect(f):
+            with _Timed(recorder, "inference") as timed:
+                detections = scheduler.infer(cctv_id, f, timeout=30)
+            detect_time[0] += timed.elapsed
+            return detections
+
+        started, cpu = time.perf_counter(), time.thread_time()
+        summary, _ = tracker.step(frame, detect, summarize_detections)
+        fields = detection_log_fields(summary, count=tracker.tracker.active_count)
+        annotated = draw_detections(frame.copy(), summary)
+        torn = not capture.valid(seq)
+        # 추론 시간(다른 단계로 기록됨)을 뺀 추적·요약·박싱 시간
+        recorder.record("postprocess", time.perf_counter() - started - detect_time[0], time.thread_time() - cpu)
+
+        if torn:
+            # 처리하는 사이 슬롯이 덮어써진 프레임은 운영 스트림처럼 버리고 처리량에서 뺌
+            torn_frames[index] += 1
+            continue
+
+        with _Timed(recorder, "encode"):
+            cv2.imencode(".jpg", annotated, [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality])
+        # 벤치마크는 매 프레임 기록해 DB 경로의 최대 부하를 측정
+        with _Timed(recorder, "logging"):
+            sink.add(DetectionLog, cctv_id=cctv_pk, image_url="benchmark", **fields)
+        frames[index] += 1
+
+
+def run_benchmark(sources, cameras=4, duration=30.0, warmup=5.0, backend="torch", model_path="yolov8n.pt",
+                  imgsz=640, conf=0.5, track_conf=0.1, threads=0, batch_size=16, batch_wait=0.05, jpeg_quality=80,
+                  database_url=None):
+    """sources 를 돌려가며 cameras 대의 가상 카메라를 만들어 캡쳐→추론→후처리→인코딩→기록 경로를 측정합니다."""
+    from flask import Flask
+    from app import db
+    from app.capture import CameraCapture
+    from app.inference import InferenceEngine
+    from app.log_sink import LogSink
+    from app.models import CCTV
+    from app.scheduler import BatchScheduler
+    from app.tracking import KeyframeTracker, PersonTracker
+
+    rss = {"start": rss_mb()}
+
+    # 운영 DB 대신 임시 SQLite 에 기록
+    tmpdir = tempfile.TemporaryDirectory()
+    app = Flask("benchmark")
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url or f"sqlite:///{os.path.join(tmpdir.name, 'benchmark.db')}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        cctvs = [CCTV(cctv_id=f"BENCH{i + 1}", location=f"benchmark {i + 1}") for i in range(cameras)]
+        db.session.add_all(cctvs)
+        db.session.commit()
+        cctv_pks = [cctv.id for cctv in cctvs]
+
+    engine = InferenceEngine(model_path=model_path, imgsz=imgsz, conf=conf, backend=backend, threads=threads,
+                             track_conf=track_conf)
+    load_started = time.perf_counter()
+    engine.load()
+    engine.warmup()
+    load_ms = round((time.perf_counter() - load_started) * 1000, 1)
+    rss["inference"] = rss_mb()
+
+    scheduler = BatchScheduler(engine, max_batch_size=batch_size, max_wait=batch_wait)
+    sink = LogSink(app)
+    captures = [CameraCapture(f"BENCH{i + 1}", sources[i % len(sources)], idle_timeout=duration + warmup + 60)
+                for i in range(cameras)]
+    for capture in captures:
+        capture.start()
+    rss["capture"] = rss_mb()
+
+    recorder = StageRecorder()
+    frames = [0] * cameras
+    torn_frames = [0] * cameras
+    stop = threading.Event()
+    workers = [
+        threading.Thread(target=_camera_loop, args=(i, captures[i], scheduler, sink, cctv_pks[i], recorder, frames, torn_frames, stop, jpeg_quality,
+                                                    KeyframeTracker(PersonTracker(high_conf=conf, low_conf=track_conf))),
+                         name=f"bench-{i + 1}", daemon=True)
+        for i in range(cameras)
+    ]
+    for worker in workers:
+        worker.start()
+
+    # 워밍업 구간의 측정값은 버리고 다시 측정
+    time.sleep(warmup)
+    recorder.reset()
+    frames[:] = [0] * cameras
+    torn_frames[:] = [0] * cameras
+    started_cpu = time.process_time()
+    started = time.perf_counter()
+    peak_rss = rss_mb()
+    while time.perf_counter() - started < duration:
+        time.sleep(0.5)
+        current = rss_mb()
+        peak_rss = max(peak_rss, current) if current is not None else peak_rss
+    elapsed = time.perf_counter() - started
+    cpu_seconds = time.process_time() - started_cpu
+    counted = list(frames)
+
+    stop.set()
+    for worker in workers:
+        worker.join(timeout=10)
+    scheduler.stop()
+    sink.close()
+    for capture in captures:
+        capture.close()
+    tmpdir.cleanup()
+
+    rss["peak"] = peak_rss
+    return {
+        "config": {
+            "cameras": cameras, "sources": sources, "duration": duration, "backend": backend, "model": model_path,
+            "imgsz": imgsz, "conf": conf, "track_conf": track_conf, "threads": threads, "batch_size": batch_size, "batch_wait": batch_wait,
+        },
+        "environment": {"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count()},
+        "model_load_ms": load_ms,
+        "fps": {
+            "total": round(sum(counted) / elapsed, 2),
+            "per_camera": [round(count / elapsed, 2) for count in counted],
+        },
+        # 처리하는 사이 링 슬롯이 덮어써져 버린 프레임 수
+        "torn_frames": sum(torn_frames),
+        "stages": recorder.summary(elapsed),
+        "process": {"cpu_percent": round(cpu_seconds / elapsed * 100, 1), "rss_mb": rss},
+        "batch_scheduler": scheduler.stats(),
+        "log_sink": sink.stats(),
+    }
+
+
+def compare(result, baseline, tolerance=0.1):
+    """이전 결과 대비 처리량 감소와 p99 증가가 tolerance 를 넘는 항목을 반환합니다."""
+    regressions = []
+    old_fps, new_fps = baseline["fps"]["total"], result["fps"]["total"]
+    if old_fps and new_fps < old_fps * (1 - tolerance):
+        regressions.append(f"fps {old_fps} -> {new_fps}")
+    for stage in STAGES:
+        old = baseline["stages"].get(stage, {}).get("p99_ms")
+        new = result["stages"][stage]["p99_ms"]
+        if old and new and new > old * (1 + tolerance):
+            regressions.append(f"{stage} p99 {old}ms -> {new}ms")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="가상 카메라로 탐지 경로 처리량/지연시간 측정")
+    parser.add_argument("sources", nargs="*", default=["synthetic:1280x720@15"],
+                        help="동영상 파일, 이미지 폴더 또는 synthetic:WxH@fps (카메라에 돌려가며 할당)")
+    parser.add_argument("--cameras", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--warmup", type=float, default=5.0)
+    parser.add_argument("--backend", default=os.getenv('DETECTOR_BACKEND', 'torch'))
+    parser.add_argument("--model", default=os.getenv('YOLO_MODEL_PATH', 'yolov8n.pt'))
+    parser.add_argument("--imgsz", type=int, default=int(os.getenv('YOLO_IMGSZ', '640')))
+    parser.add_argument("--conf", type=float, default=float(os.getenv('YOLO_CONF', '0.5')))
+    parser.add_argument("--track-conf", type=float, default=float(os.getenv('TRACK_LOW_CONF', '0.1')))
+    parser.add_argument("--threads", type=int, default=int(os.getenv('DETECTOR_THREADS', '0')))
+    parser.add_argument("--batch-size", type=int, default=int(os.getenv('BATCH_MAX_SIZE', '16')))
+    parser.add_argument("--output", help="결과 JSON 저장 경로 (기본: 표준 출력)")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON. 회귀가 있으면 종료 코드 1")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    result = run_benchmark(
+        args.sources, cameras=args.cameras, duration=args.duration, warmup=args.warmup, backend=args.backend,
+        model_path=args.model, imgsz=args.imgsz, conf=args.conf, track_conf=args.track_conf, threads=args.threads,
+        batch_size=args.batch_size,
+    )
+    if args.baseline:
+        with open(args.baseline) as f:
+            result["regressions"] = compare(result, json.load(f), args.tolerance)
+
+    output = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+    return 1 if result.get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,269 @@
+import atexit
+import threading
+import time
+
+from .frame_ring import FrameRing
+from .metrics import observe_stage
+from .sources import open_source
+
+
+class CameraCapture:
+    """장치를 열어둔 채 백그라운드 스레드로 계속 읽어 공유 메모리 프레임 링(FrameRing)에 보관합니다.
+
+    장치는 링 슬롯에 직접 디코딩하므로 프레임마다 새 배열을 할당하지 않습니다.
+    """
+
+    def __init__(self, cctv_id, source, idle_timeout=30.0, backoff_min=0.5, backoff_max=10.0, ring_slots=8, on_ring=None):
+        self.cctv_id = cctv_id
+        self.source = source
+        self.idle_timeout = idle_timeout
+        self.backoff_min = backoff_min
+        self.backoff_max = backoff_max
+        self.ring_slots = ring_slots
+        # 링을 새로 만들 때 on_ring(cctv_id, ring_name) 으로 알림 (다른 역할 프로세스에 공개, 닫으면 ring_name=None)
+        self.on_ring = on_ring
+        self.reconnects = 0
+        self.connected = False
+        # 첫 프레임 해상도에 맞춰 만드는 프레임 링
+        self.ring = None
+        # 해상도가 바뀌어 교체된 링. 읽는 중인 스레드가 없을 때 닫음
+        self._retired = []
+        self._readers = 0
+        self._shape = None
+        self._available = False
+        self._seq = 0
+        self._timestamp = None
+        self._last_used = time.monotonic()
+        self._cond = threading.Condition()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        with self._cond:
+            if self.running:
+                return
+            self._stopped.clear()
+            self._last_used = time.monotonic()
+            self._thread = threading.Thread(target=self._run, name=f"capture-{self.cctv_id}", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+
+    def close(self):
+        self.stop()
+        with self._cond:
+            rings, self._retired = self._retired, []
+            published = self.ring is not None
+            if published:
+                rings.append(self.ring)
+                self.ring = None
+        if published and self.on_ring is not None:
+            self.on_ring(self.cctv_id, None)
+        for ring in rings:
+            ring.close()
+
+    def _close_retired(self):
+        # _cond 를 잡은 상태에서 호출. 링에서 읽는 중인 스레드가 있으면 다음 프레임으로 미룸
+        if self._retired and not self._readers:
+            rings, self._retired = self._retired, []
+            for ring in rings:
+                ring.close()
+
+    def _open(self):
+        # 웹캠 인덱스 외에 동영상 파일 / 이미지 폴더 / synthetic 소스도 같은 인터페이스로 열림
+        cap = open_source(self.source)
+        if not cap.isOpened():
+            cap.release()
+            return None
+        return cap
+
+    def _run(self):
+        cap = None
+        backoff = self.backoff_min
+        try:
+            while not self._stopped.is_set():
+                # 일정 시간 아무도 프레임을 요청하지 않으면 장치를 닫음
+                if time.monotonic() - self._last_used > self.idle_timeout:
+                    break
+
+                if cap is None:
+                    cap = self._open()
+                    if cap is None:
+                        # 재연결은 지수 백오프로 시도
+                        self._stopped.wait(backoff)
+                        backoff = min(backoff * 2, self.backoff_max)
+                        self.reconnects += 1
+                        continue
+                    self.connected = True
+                    backoff = self.backoff_min
+
+                # 링의 다음 슬롯에 바로 읽어 들임 (해상도가 다르면 OpenCV 가 새 배열을 만들고 write 가 한 번 복사)
+                target = self.ring.reserve(self._shape) if self.ring is not None else None
+                started = time.perf_counter()
+                ret, frame = cap.read(target) if target is not None else cap.read()
+                observe_stage("capture_read", self.cctv_id, time.perf_counter() - started)
+                if not ret:
+                    cap.release()
+                    cap = None
+                    self.connected = False
+                    continue
+
+                if self.ring is None or frame.nbytes > self.ring.slot_size:
+                    ring = FrameRing(self.ring_slots, frame.shape, start_seq=self._seq)
+                    with self._cond:
+                        # 이전 링은 바로 닫지 않고 읽는 쪽이 빠져나간 뒤 닫음
+                        if self.ring is not None:
+                            self._retired.append(self.ring)
+                        self.ring = ring
+                    if self.on_ring is not None:
+                        self.on_ring(self.cctv_id, self.ring.name)
+                self._shape = frame.shape
+                with self._cond:
+                    self._seq = self.ring.write(frame)
+                    self._available = True
+                    self._timestamp = time.time()
+                    self._close_retired()
+                    self._cond.notify_all()
+        finally:
+            if cap is not None:
+                cap.release()
+            self.connected = False
+            with self._cond:
+                self._available = False
+                self._cond.notify_all()
+
+    def read(self, after_seq=0, timeout=2.0, copy=True):
+        """after_seq 보다 새로운 프레임을 (seq, frame) 으로 반환합니다. 시간 초과 시 (seq, None).
+
+        copy=False 면 링 슬롯 위의 읽기 전용 뷰를 돌려주며, 작성자가 링을 한 바퀴 돌기 전까지만 유효합니다.
+        """
+        self.start()
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._cond:
+                self._last_used = time.monotonic()
+                while self._seq <= after_seq or not self._available:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or self._stopped.is_set():
+                        return self._seq, None
+                    self._cond.wait(remaining)
+                ring = self.ring
+                # 읽는 동안 이 링이 교체되어도 닫히지 않도록 표시
+                self._readers += 1
+            try:
+                # 조건 변수는 기다림에만 쓰고 프레임은 잠금 없이 링에서 읽음
+                seq, frame = ring.latest(after_seq)
+                if frame is not None and copy:
+                    # 호출자가 그림을 그리거나 보관하는 경우 슬롯이 재사용되어도 안전한 복사본
+                    frame = frame.copy()
+            finally:
+                with self._cond:
+                    self._readers -= 1
+            if frame is None and ring is not self.ring and time.monotonic() < deadline:
+                # 읽는 사이 해상도 변경으로 링이 교체됨: 새 링에서 다시 읽음
+                continue
+            if frame is None:
+                return seq, None
+            if not copy:
+                frame.flags.writeable = False
+            return seq, frame
+
+    def valid(self, seq):
+        """copy=False 로 받은 seq 프레임이 아직 덮어써지지 않았는지 확인합니다 (긴 처리 뒤 찢어진 프레임 버리기용)."""
+        ring = self.ring
+        return ring is not None and ring.valid(seq)
+
+    def stats(self):
+        return {
+            "cctv_id": self.cctv_id,
+            "source": str(self.source),
+            "running": self.running,
+            "connected": self.connected,
+            "frames": self._seq,
+            "ring": self.ring.name if self.ring is not None else None,
+            "reconnects": self.reconnects,
+            "last_frame_at": self._timestamp,
+        }
+
+
+class CapturePool:
+    """CCTV.cctv_id 를 키로 열린 장치를 재사용하는 캡쳐 풀."""
+
+    def __init__(self, **options):
+        self.options = options
+        self._captures = {}
+        self._lock = threading.Lock()
+
+    def get(self, cctv_id, source):
+        with self._lock:
+            capture = self._captures.get(cctv_id)
+            if capture is None or capture.source != source:
+                if capture is not None:
+                    capture.close()
+                capture = CameraCapture(cctv_id, source, **self.options)
+                self._captures[cctv_id] = capture
+        capture.start()
+        return capture
+
+    def read(self, cctv_id, source, after_seq=0, timeout=2.0, copy=True):
+        return self.get(cctv_id, source).read(after_seq=after_seq, timeout=timeout, copy=copy)
+
+    def release(self, cctv_id):
+        with self._lock:
+            capture = self._captures.pop(cctv_id, None)
+        if capture is not None:
+            capture.close()
+
+    def close_all(self):
+        with self._lock:
+            captures = list(self._captures.values())
+            self._captures.clear()
+        for capture in captures:
+            capture.close()
+
+    def stats(self):
+        with self._lock:
+            captures = list(self._captures.values())
+        return [capture.stats() for capture in captures]
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_capture_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = CapturePool()
+                atexit.register(_pool.close_all)
+    return _pool
+
+
+def init_capture_pool(app, on_ring=None):
+    """capture / all 역할은 장치를 직접 여는 풀을, web 역할은 캡쳐 역할의 프레임 링을 읽는 풀을 구성합니다."""
+    global _pool
+    with _pool_lock:
+        if _pool is None and app.config['APP_ROLE'] == 'web':
+            from .roles import RemoteCapturePool, get_broker
+            _pool = RemoteCapturePool(get_broker(app))
+        elif _pool is None:
+            _pool = CapturePool(
+                idle_timeout=app.config['CAPTURE_IDLE_TIMEOUT'],
+                backoff_min=app.config['CAPTURE_BACKOFF_MIN'],
+                backoff_max=app.config['CAPTURE_BACKOFF_MAX'],
+                ring_slots=app.config['CAPTURE_RING_SLOTS'],
+                on_ring=on_ring,
+            )
+            atexit.register(_pool.close_all)
+    return _pool
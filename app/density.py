@@ -0,0 +1,196 @@
+import json
+from typing import NamedTuple
+
+import numpy as np
+
+from .detection import DENSITY_LEVELS, OVERCROWDING_LEVELS, _level_for
+
+# 구역 밀도(명/m²) 구간 기본값. 이름은 인원 수 기준 구간(DENSITY_LEVELS / OVERCROWDING_LEVELS)과 같게 맞춰
+# 보정한 카메라와 보정하지 않은 카메라의 로그를 같은 기준으로 조회할 수 있게 합니다.
+DEFAULT_DENSITY_THRESHOLDS = (0.5, 1.5, 3.0)
+DEFAULT_OVERCROWDING_THRESHOLDS = (2.0, 4.0, 5.0)
+
+# 구역 마스크 해상도 (너비, 픽셀). 발 위치 조회용이라 원본 해상도까지 필요 없음
+MASK_WIDTH = 320
+
+FULL_FRAME = ((0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0))
+
+
+def parse_thresholds(value, default):
+    """"0.5,1.5,3" 처럼 오름차순 구간 경계(명/m²) 3개를 튜플로 변환합니다."""
+    if not value:
+        return default
+    thresholds = tuple(float(v) for v in value.split(","))
+    if len(thresholds) != len(default) or list(thresholds) != sorted(thresholds) or thresholds[0] <= 0:
+        raise ValueError(f"밀도 구간은 0 보다 큰 오름차순 값 {len(default)}개여야 합니다: {value}")
+    return thresholds
+
+
+def density_levels(thresholds, levels):
+    # ((0, 이름), (경계1, 이름), ...) 형태로 변환 (detection._level_for 와 같은 형식)
+    names = [name for _, name in levels]
+    return tuple(zip((0.0,) + tuple(thresholds), names))
+
+
+def project(homography, points):
+    """정규화 이미지 좌표 (N, 2) 를 지면 좌표(m) 로 변환합니다. 지평선 위의 점은 ValueError."""
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    mapped = np.hstack([points, np.ones((len(points), 1))]) @ homography.T
+    if np.any(mapped[:, 2] <= 1e-9):
+        raise ValueError("구역이 지면 평면 밖(지평선 위)에 있습니다.")
+    return mapped[:, :2] / mapped[:, 2:3]
+
+
+def polygon_area(points):
+    # 신발끈 공식
+    x, y = points[:, 0], points[:, 1]
+    return abs(float(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))) / 2
+
+
+def homography_from_points(image_points, ground_points):
+    """이미지 좌표(0~1 비율) 4개 이상과 대응하는 지면 좌표(m)로 호모그래피를 계산합니다."""
+    import cv2
+    image_points = np.asarray(image_points, dtype=np.float64).reshape(-1, 2)
+    ground_points = np.asarray(ground_points, dtype=np.float64).reshape(-1, 2)
+    if len(image_points) < 4 or len(image_points) != len(ground_points):
+        raise ValueError("image_points 와 ground_points 는 같은 개수(4개 이상)여야 합니다.")
+    homography, _ = cv2.findHomography(image_points, ground_points, 0)
+    if homography is None:
+        raise ValueError("대응점으로 호모그래피를 계산할 수 없습니다.")
+    return homography
+
+
+class DensityZone(NamedTuple):
+    name: str
+    polygon: np.ndarray   # (K, 2) 정규화 이미지 좌표
+    area_m2: float
+
+
+class DensityEstimate(NamedTuple):
+    """한 프레임의 구역별 인원과 밀도."""
+    zones: tuple              # 구역 이름
+    counts: np.ndarray        # (Z,) 구역별 인원
+    densities: np.ndarray     # (Z,) 구역별 밀도 (명/m²)
+    density_level: str
+    overcrowding_level: str
+
+    @property
+    def peak(self):
+        return float(self.densities.max()) if len(self.densities) else 0.0
+
+    def to_dict(self):
+        return {
+            name: {"count": int(count), "density": round(float(density), 3)}
+            for name, count, density in zip(self.zones, self.counts, self.densities)
+        }
+
+
+def parse_calibration(value):
+    """CCTV.calibration JSON 을 검증해 dict 로 반환합니다. 비어 있으면 None.
+
+    {"homography": 3x3} 또는 {"image_points": [[x, y], ...], "ground_points": [[X, Y], ...]} 로 지면 평면을 지정하고,
+    "zones": [{"name": ..., "polygon": [[x, y], ...]}] 로 구역을 지정합니다 (이미지 좌표는 0~1 비율, 지면 좌표는 m).
+    호모그래피 대신 구역마다 "area_m2" 를 직접 줄 수도 있습니다. 구역이 없으면 화면 전체를 한 구역으로 봅니다.
+    """
+    if not value or not value.strip():
+        return None
+    try:
+        calibration = json.loads(value)
+    except ValueError as e:
+        raise ValueError(f"보정 정보가 올바른 JSON 이 아닙니다: {e}")
+    if not isinstance(calibration, dict):
+        raise ValueError("보정 정보는 JSON 객체여야 합니다.")
+    # 구역 면적까지 계산해 보며 검증
+    DensityEngine(calibration)
+    return calibration
+
+
+class DensityEngine:
+    """카메라 하나의 탐지 결과를 구역별 밀도(명/m²)와 밀집/과밀 수준으로 변환합니다.
+
+    구역 면적은 생성 시 지면 호모그래피로 한 번 계산하고, 구역 마스크는 프레임 크기별로 한 번만 그려 둡니다.
+    평가는 사람 박스의 발 위치(아래 변 중앙)로 마스크를 조회하는 배열 연산 한 번입니다.
+    """
+
+    def __init__(self, calibration, density_thresholds=DEFAULT_DENSITY_THRESHOLDS,
+                 overcrowding_thresholds=DEFAULT_OVERCROWDING_THRESHOLDS, mask_width=MASK_WIDTH):
+        self.density_levels = density_levels(density_thresholds, DENSITY_LEVELS)
+        self.overcrowding_levels = density_levels(overcrowding_thresholds, OVERCROWDING_LEVELS)
+        self.mask_width = mask_width
+
+        if "homography" in calibration:
+            self.homography = np.asarray(calibration["homography"], dtype=np.float64).reshape(3, 3)
+        elif "image_points" in calibration:
+            self.homography = homography_from_points(calibration["image_points"], calibration.get("ground_points", []))
+        else:
+            self.homography = None
+
+        zones = calibration.get("zones") or [{"name": "전체", "polygon": FULL_FRAME}]
+        self.zones = [self._zone(index, zone) for index, zone in enumerate(zones)]
+        self._areas = np.array([zone.area_m2 for zone in self.zones], dtype=np.float32)
+        self._masks = None
+        self._mask_key = None
+
+    def _zone(self, index, zone):
+        name = str(zone.get("name") or f"구역{index + 1}")
+        polygon = np.asarray(zone.get("polygon", FULL_FRAME), dtype=np.float64).reshape(-1, 2)
+        if len(polygon) < 3 or polygon.min() < 0 or polygon.max() > 1:
+            raise ValueError(f"구역 '{name}' 의 polygon 은 0~1 비율 좌표 3개 이상이어야 합니다.")
+        if zone.get("area_m2") is not None:
+            area = float(zone["area_m2"])
+        elif self.homography is not None:
+            area = polygon_area(project(self.homography, polygon))
+        else:
+            raise ValueError(f"구역 '{name}' 의 면적을 알 수 없습니다 (homography 또는 area_m2 필요).")
+        if area <= 0:
+            raise ValueError(f"구역 '{name}' 의 면적이 0 입니다.")
+        return DensityZone(name, polygon, area)
+
+    def _zone_masks(self, frame_shape):
+        # 프레임 크기가 같으면 이전에 그린 마스크를 재사용
+        key = tuple(frame_shape[:2])
+        if self._mask_key != key:
+            import cv2
+            height, width = key
+            mask_w = min(self.mask_width, width)
+            mask_h = max(1, round(height * mask_w / width))
+            masks = np.zeros((len(self.zones), mask_h, mask_w), dtype=np.uint8)
+            for mask, zone in zip(masks, self.zones):
+                cv2.fillPoly(mask, [np.round(zone.polygon * [mask_w - 1, mask_h - 1]).astype(np.int32)], 1)
+            self._masks = masks.astype(bool)
+            self._mask_key = key
+        return self._masks
+
+    def evaluate(self, summary, frame_shape):
+        """DetectionSummary 로부터 구역별 인원/밀도와 가장 붐비는 구역 기준의 수준을 계산합니다."""
+        masks = self._zone_masks(frame_shape)
+        height, width = frame_shape[:2]
+        _, mask_h, mask_w = masks.shape
+        # 지면에 닿는 발 위치로 구역 판정
+        cols = np.clip((summary.centroids[:, 0] * mask_w / width).astype(np.int64), 0, mask_w - 1)
+        rows = np.clip((summary.boxes[:, 3] * mask_h / height).astype(np.int64), 0, mask_h - 1)
+        counts = masks[:, rows, cols].sum(axis=1)
+        densities = counts / self._areas
+        peak = float(densities.max()) if len(densities) else 0.0
+        return DensityEstimate(
+            tuple(zone.name for zone in self.zones), counts, densities,
+            _level_for(peak, self.density_levels), _level_for(peak, self.overcrowding_levels),
+        )
+
+    def stats(self):
+        return {
+            "zones": [{"name": zone.name, "area_m2": round(zone.area_m2, 2)} for zone in self.zones],
+            "homography": self.homography is not None,
+        }
+
+
+def create_density_engine(app, calibration):
+    """CCTV.calibration 문자열로 카메라 밀도 엔진을 만듭니다. 보정 정보가 없으면 None (인원 수 기준 수준 사용)."""
+    calibration = parse_calibration(calibration)
+    if calibration is None:
+        return None
+    return DensityEngine(
+        calibration,
+        density_thresholds=app.config['DENSITY_THRESHOLDS'],
+        overcrowding_thresholds=app.config['OVERCROWDING_THRESHOLDS'],
+    )
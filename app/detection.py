@@ -0,0 +1,107 @@
+from typing import NamedTuple
+
+import numpy as np
+
+# 사람 클래스 ID (COCO)
+PERSON_CLASS = 0
+
+# 밀집 정도 / 과밀 수준 구간 (감지된 사람 수 기준, 이상)
+DENSITY_LEVELS = ((0, "낮음"), (5, "보통"), (15, "높음"), (30, "매우 높음"))
+OVERCROWDING_LEVELS = ((0, "정상"), (10, "주의"), (20, "경고"), (40, "위험"))
+
+# AbnormalBehaviorLog.fall_status 값
+FALL_STATUSES = ["정상", "쓰러짐"]
+
+
+class DetectionSummary(NamedTuple):
+    """한 프레임의 사람 탐지 결과를 배열 형태로 요약한 구조체."""
+    boxes: np.ndarray         # (M, 4) float32 [x1, y1, x2, y2]
+    scores: np.ndarray        # (M,) float32
+    areas: np.ndarray         # (M,) float32, 픽셀 면적
+    centroids: np.ndarray     # (M, 2) float32 [cx, cy]
+    zone_counts: np.ndarray   # (rows, cols) int, 구역별 사람 수
+    coverage: float           # 프레임 대비 박스 면적 비율
+    track_ids: np.ndarray = None  # (M,) 추적 ID (추적기를 쓰는 경우)
+
+    @property
+    def count(self):
+        return len(self.scores)
+
+
+def summarize_detections(detections, frame_shape, conf_threshold=0.5, grid=(2, 2)):
+    """(N, 6) 탐지 배열에서 사람만 걸러 면적, 중심점, 구역별 인원을 한 번에 계산합니다."""
+    height, width = frame_shape[:2]
+    rows, cols = grid
+    detections = np.asarray(detections, dtype=np.float32).reshape(-1, 6)
+
+    mask = (detections[:, 5].astype(np.int32) == PERSON_CLASS) & (detections[:, 4] >= conf_threshold)
+    people = detections[mask]
+    boxes = people[:, :4]
+    scores = people[:, 4]
+
+    wh = np.clip(boxes[:, 2:4] - boxes[:, 0:2], 0, None)
+    areas = wh[:, 0] * wh[:, 1]
+    centroids = (boxes[:, 0:2] + boxes[:, 2:4]) * 0.5
+
+    # 중심점이 속한 격자 구역별로 인원 집계
+    col_idx = np.clip((centroids[:, 0] * cols // max(width, 1)).astype(np.int64), 0, cols - 1)
+    row_idx = np.clip((centroids[:, 1] * rows // max(height, 1)).astype(np.int64), 0, rows - 1)
+    zone_counts = np.bincount(row_idx * cols + col_idx, minlength=rows * cols).reshape(rows, cols)
+
+    coverage = float(areas.sum()) / float(max(width * height, 1))
+    return DetectionSummary(boxes, scores, areas, centroids, zone_counts, coverage)
+
+
+def iou_matrix(a, b):
+    """(N, 4), (M, 4) 박스 배열 사이의 IoU 를 (N, M) 배열로 계산합니다."""
+    a = np.asarray(a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float32).reshape(-1, 4)
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    wh = np.clip(bottom_right - top_left, 0, None)
+    intersection = wh[..., 0] * wh[..., 1]
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return np.where(union > 0, intersection / np.maximum(union, 1e-9), 0.0)
+
+
+def _level_for(count, levels):
+    thresholds = np.array([threshold for threshold, _ in levels])
+    return levels[int(np.searchsorted(thresholds, count, side="right")) - 1][1]
+
+
+def classify_count(count):
+    # 사람 수로부터 (density_level, overcrowding_level) 계산
+    return _level_for(count, DENSITY_LEVELS), _level_for(count, OVERCROWDING_LEVELS)
+
+
+def classify_density(summary):
+    """요약 결과로부터 (density_level, overcrowding_level) 을 계산합니다."""
+    return classify_count(summary.count)
+
+
+def detection_log_fields(summary, count=None, density=None):
+    # DetectionLog 컬럼에 바로 넣을 수 있는 값 (count 를 주면 추적기 기준 인원 수 사용)
+    # density (DensityEstimate) 를 주면 수준은 인원 수 대신 구역 밀도(명/m²) 기준
+    count = summary.count if count is None else count
+    if density is not None:
+        density_level, overcrowding_level = density.density_level, density.overcrowding_level
+    else:
+        density_level, overcrowding_level = classify_count(count)
+    return {
+        "object_count": count,
+        "density_level": density_level,
+        "overcrowding_level": overcrowding_level,
+    }
+
+
+def draw_detections(frame, summary, color=(255, 0, 0)):
+    import cv2
+    # 걸러진 배열만 사용해 박싱 (좌표 변환은 한 번에 처리)
+    track_ids = summary.track_ids.tolist() if summary.track_ids is not None else [None] * summary.count
+    for (x1, y1, x2, y2), conf, track_id in zip(summary.boxes.astype(np.int32).tolist(), summary.scores.tolist(), track_ids):
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+        label = f"Person #{track_id}: {conf:.2f}" if track_id is not None else f"Person: {conf:.2f}"
+        cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+    return frame
@@ -0,0 +1,156 @@
+import itertools
+import json
+import threading
+from collections import deque
+
+from app import db
+from app.models import CCTV, DetectionLog, AbnormalBehaviorLog
+
+# 경고로 표시할 수준
+ALERT_OVERCROWDING_LEVELS = {"경고", "위험"}
+ALERT_FALL_STATUS = "쓰러짐"
+
+
+class Subscription:
+    """클라이언트 하나의 이벤트 대기열. 가득 차면 가장 오래된 이벤트를 버립니다."""
+
+    def __init__(self, bus, queue_size):
+        self.bus = bus
+        self.events = deque(maxlen=queue_size)
+        self.dropped = 0
+        self._cond = threading.Condition()
+
+    def push(self, event):
+        with self._cond:
+            if len(self.events) == self.events.maxlen:
+                self.dropped += 1
+            self.events.append(event)
+            self._cond.notify()
+
+    def get(self, timeout):
+        with self._cond:
+            if not self.events:
+                self._cond.wait(timeout)
+            return self.events.popleft() if self.events else None
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+class EventBus:
+    """프로세스 내 pub/sub. 최근 이벤트를 보관해 Last-Event-ID 로 이어받을 수 있게 합니다."""
+
+    def __init__(self, history=500, client_queue=100):
+        self.client_queue = client_queue
+        self.published = 0
+        self._history = deque(maxlen=history)
+        self._ids = itertools.count(1)
+        self._subscribers = set()
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, callback):
+        """발행되는 모든 이벤트를 callback(event_type, data) 로도 전달합니다 (다른 프로세스로 중계 등)."""
+        self._listeners.append(callback)
+
+    def publish(self, event_type, data):
+        with self._lock:
+            event = (next(self._ids), event_type, data)
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+            self.published += 1
+        for subscription in subscribers:
+            subscription.push(event)
+        for callback in self._listeners:
+            callback(event_type, data)
+        return event[0]
+
+    def subscribe(self, last_event_id=None):
+        subscription = Subscription(self, self.client_queue)
+        with self._lock:
+            # 연결이 끊긴 동안 놓친 이벤트부터 다시 전달
+            if last_event_id is not None:
+                for event in self._history:
+                    if event[0] > last_event_id:
+                        subscription.push(event)
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def stats(self):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        return {
+            "published": self.published,
+            "subscribers": len(subscribers),
+            "dropped": sum(subscription.dropped for subscription in subscribers),
+        }
+
+
+def format_sse(event):
+    event_id, event_type, data = event
+    payload = json.dumps(data, ensure_ascii=False)
+    return f"id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n"
+
+
+def sse_stream(subscription, keepalive=15.0):
+    """text/event-stream 응답 본문. 이벤트가 없으면 keepalive 주석을 보내 연결을 유지합니다."""
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            event = subscription.get(timeout=keepalive)
+            yield format_sse(event) if event else ": keepalive\n\n"
+    finally:
+        subscription.close()
+
+
+def _locations(cctv_ids):
+    return dict(db.session.query(CCTV.id, CCTV.location).filter(CCTV.id.in_(set(cctv_ids))).all())
+
+
+def _publish_detections(bus, rows):
+    locations = _locations(row["cctv_id"] for row in rows)
+    for row in rows:
+        bus.publish("detection", {
+            "cctv_id": row["cctv_id"],
+            "location": locations.get(row["cctv_id"]),
+            "detection_time": row["detection_time"].isoformat(),
+            "density_level": row["density_level"],
+            "overcrowding_level": row["overcrowding_level"],
+            "object_count": row["object_count"],
+            "image_url": row["image_url"],
+            "alert": row["overcrowding_level"] in ALERT_OVERCROWDING_LEVELS,
+        })
+
+
+def _publish_abnormal(bus, rows):
+    locations = _locations(row["cctv_id"] for row in rows)
+    for row in rows:
+        fall_status = row.get("fall_status", "정상")
+        bus.publish("abnormal", {
+            "cctv_id": row["cctv_id"],
+            "location": locations.get(row["cctv_id"]),
+            "detection_time": row["detection_time"].isoformat(),
+            "fall_status": fall_status,
+            "image_url": row["image_url"],
+            "alert": fall_status == ALERT_FALL_STATUS,
+        })
+
+
+_bus = EventBus()
+
+
+def get_event_bus():
+    return _bus
+
+
+def init_events(app, sink):
+    """설정을 적용하고, LogSink 가 커밋한 로그를 이벤트로 발행하도록 연결합니다."""
+    global _bus
+    _bus = EventBus(history=app.config['EVENTS_HISTORY'], client_queue=app.config['EVENTS_CLIENT_QUEUE'])
+    sink.add_hook(DetectionLog, after_commit=lambda rows: _publish_detections(_bus, rows))
+    sink.add_hook(AbnormalBehaviorLog, after_commit=lambda rows: _publish_abnormal(_bus, rows))
+    return _bus
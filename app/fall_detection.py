@@ -0,0 +1,193 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from .backends import NUM_KEYPOINTS
+from .detection import iou_matrix
+
+# COCO 키포인트 인덱스
+KP_LEFT_SHOULDER, KP_RIGHT_SHOULDER = 5, 6
+KP_LEFT_HIP, KP_RIGHT_HIP = 11, 12
+
+
+class PoseEstimator:
+    """탐지기가 찾은 사람 박스 영역의 키포인트를 추정합니다.
+
+    YOLOv8 pose 모델은 이 프로세스가 아니라 추론 엔진(로컬 백엔드 / 워커 풀 / inference 역할)에서 실행되며,
+    여기서는 박스를 넓히고 처리할 사람을 고르는 일만 합니다. engine 을 주지 않으면 전역 엔진을 사용합니다.
+    """
+
+    def __init__(self, engine=None, padding=0.1, max_people=16):
+        self._engine = engine
+        self.padding = padding
+        self.max_people = max_people
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            from .inference import get_engine
+            return get_engine()
+        return self._engine
+
+    def estimate(self, frame, boxes):
+        """boxes (M, 4) 에 대한 (M, 17, 3) 키포인트 [x, y, conf] 를 전체 프레임 좌표로 반환합니다."""
+        keypoints = np.full((len(boxes), NUM_KEYPOINTS, 3), np.nan, dtype=np.float32)
+        if len(boxes) == 0:
+            return keypoints
+
+        # 박스를 약간 넓혀 자르고, 사람이 많으면 큰 박스부터 max_people 명만 처리
+        height, width = frame.shape[:2]
+        wh = boxes[:, 2:4] - boxes[:, 0:2]
+        padded = np.concatenate([boxes[:, 0:2] - wh * self.padding, boxes[:, 2:4] + wh * self.padding], axis=1)
+        padded = np.clip(padded, 0, [width, height, width, height]).astype(np.int32)
+        order = np.argsort(-(wh[:, 0] * wh[:, 1]))[:self.max_people]
+
+        indices = [i for i in order.tolist() if padded[i, 2] - padded[i, 0] > 1 and padded[i, 3] - padded[i, 1] > 1]
+        if not indices:
+            return keypoints
+        keypoints[indices] = self.engine.predict_pose(frame, padded[indices])
+        return keypoints
+
+
+def posture_features(keypoints, boxes, kp_conf=0.3, angle_threshold=60.0, aspect_threshold=1.0):
+    """몸통 기울기(도, 0=직립), 박스 가로/세로 비, 누움 여부를 사람별 배열로 계산합니다."""
+    shoulders = keypoints[:, [KP_LEFT_SHOULDER, KP_RIGHT_SHOULDER]]
+    hips = keypoints[:, [KP_LEFT_HIP, KP_RIGHT_HIP]]
+    valid = (np.nan_to_num(shoulders[..., 2]).min(axis=1) >= kp_conf) & (np.nan_to_num(hips[..., 2]).min(axis=1) >= kp_conf)
+
+    torso = hips[..., :2].mean(axis=1) - shoulders[..., :2].mean(axis=1)
+    angle = np.degrees(np.arctan2(np.abs(torso[:, 0]), np.abs(torso[:, 1])))
+    wh = boxes[:, 2:4] - boxes[:, 0:2]
+    aspect = wh[:, 0] / np.maximum(wh[:, 1], 1e-6)
+
+    # 키포인트가 불확실하면 박스 비율로 판단
+    lying = np.where(valid, np.nan_to_num(angle) >= angle_threshold, aspect >= aspect_threshold)
+    return angle, aspect, lying
+
+
+class _Track:
+    def __init__(self, track_id, box, window):
+        self.track_id = track_id
+        self.box = box
+        self.last_seen = None
+        self.down_since = None
+        self.alerted = False
+        # (시각, 누움 여부)
+        self.history = deque(maxlen=window)
+
+
+class FallDetector:
+    """사람별로 짧은 구간의 자세 변화를 추적해 직립 → 누움 전이가 유지되면 쓰러짐으로 판단합니다.
+
+    update() 는 탐지한 프레임 또는 추적기가 외삽한 박스로 호출하며, 판단 해상도는 호출 간격에 묶입니다.
+    누운 상태를 min_down 동안 두 번 이상 봐야 하므로 파이프라인은 flagged() 트랙만 샘플 사이에 다시 확인합니다.
+    직립 → 누움 전이 자체는 샘플에서만 보므로 window 안에 직립 샘플이 없으면 놓칩니다.
+    """
+
+    def __init__(self, pose_estimator, window=3.0, min_down=1.0, max_age=2.0, iou_threshold=0.3, history=32):
+        self.pose = pose_estimator
+        self.window = window
+        self.min_down = min_down
+        self.max_age = max_age
+        self.iou_threshold = iou_threshold
+        self.history = history
+        self.falls = 0
+        self._tracks = []
+        self._next_id = 1
+
+    def _associate(self, boxes, now):
+        # 추적기가 없을 때 쓰는 단순 IoU 그리디 매칭
+        tracks = [None] * len(boxes)
+        if self._tracks and len(boxes):
+            ious = iou_matrix(np.array([track.box for track in self._tracks]), boxes)
+            for t, b in zip(*np.unravel_index(np.argsort(-ious, axis=None), ious.shape)):
+                if ious[t, b] < self.iou_threshold:
+                    break
+                if tracks[b] is None and self._tracks[t] not in tracks:
+                    tracks[b] = self._tracks[t]
+        for b, track in enumerate(tracks):
+            if track is None:
+                tracks[b] = _Track(self._next_id, boxes[b], self.history)
+                self._next_id += 1
+        return tracks
+
+    def flagged(self):
+        """누운 것으로 보였지만 아직 쓰러짐으로 확정되지 않은 트랙 ID 집합."""
+        return {track.track_id for track in self._tracks if track.down_since is not None and not track.alerted}
+
+    def update(self, frame, boxes, now=None, track_ids=None):
+        """이번 프레임에서 새로 쓰러진 것으로 판단된 사람의 박스 인덱스 리스트를 반환합니다."""
+        now = time.monotonic() if now is None else now
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        if track_ids is None:
+            tracks = self._associate(boxes, now)
+        else:
+            known = {track.track_id: track for track in self._tracks}
+            tracks = [known.get(track_id) or _Track(track_id, box, self.history) for track_id, box in zip(track_ids, boxes)]
+
+        fallen = []
+        if len(boxes):
+            keypoints = self.pose.estimate(frame, boxes)
+            _, _, lying = posture_features(keypoints, boxes)
+            for index, (track, is_lying) in enumerate(zip(tracks, lying.tolist())):
+                track.box = boxes[index]
+                track.last_seen = now
+                track.history.append((now, is_lying))
+                if not is_lying:
+                    track.down_since = None
+                    track.alerted = False
+                    continue
+                track.down_since = track.down_since or now
+                # 구간 안에 직립 상태가 있었고 누운 상태가 min_down 이상 유지되면 쓰러짐
+                was_upright = any(not down for t, down in track.history if now - t <= self.window + self.min_down)
+                if not track.alerted and was_upright and now - track.down_since >= self.min_down:
+                    track.alerted = True
+                    self.falls += 1
+                    fallen.append(index)
+
+        # 이번 프레임의 트랙과 최근에 본 트랙만 유지
+        current = {id(track) for track in tracks}
+        self._tracks = tracks + [
+            track for track in self._tracks
+            if id(track) not in current and now - track.last_seen <= self.max_age
+        ]
+        return fallen
+
+
+_pose = None
+_pose_lock = threading.Lock()
+
+
+def get_pose_estimator():
+    global _pose
+    if _pose is None:
+        with _pose_lock:
+            if _pose is None:
+                _pose = PoseEstimator()
+    return _pose
+
+
+def init_pose_estimator(app):
+    global _pose
+    with _pose_lock:
+        if _pose is None:
+            # 포즈 모델 경로/입력 크기(FALL_POSE_*)는 init_engine 이 추론 엔진에 전달
+            _pose = PoseEstimator(max_people=app.config['FALL_MAX_PEOPLE'])
+    return _pose
+
+
+def create_fall_detector(app):
+    # 포즈 모델은 추론 엔진이 공유하고, 추적 상태는 카메라마다 따로 유지
+    interval = 1.0 / app.config['PIPELINE_SAMPLE_FPS']
+    if interval > app.config['FALL_MIN_DOWN'] and app.config['FALL_CONFIRM_FPS'] <= 0:
+        app.logger.warning(
+            f"탐지 샘플 간격({interval:.1f}초)이 FALL_MIN_DOWN({app.config['FALL_MIN_DOWN']}초)보다 깁니다. "
+            f"쓰러짐은 샘플 간격 단위로만 판단됩니다 (PIPELINE_SAMPLE_FPS 또는 FALL_CONFIRM_FPS 를 높이세요)."
+        )
+    return FallDetector(
+        init_pose_estimator(app),
+        window=app.config['FALL_WINDOW'],
+        min_down=app.config['FALL_MIN_DOWN'],
+    )
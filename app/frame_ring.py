@@ -0,0 +1,150 @@
+import ctypes
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .workers import attach_shared_memory
+
+# 헤더 레이아웃 (int64): [최신 seq, 슬롯 수, 최대 높이, 최대 너비, 채널] + 슬롯별 [seq, 높이, 너비]
+_HEADER_FIELDS = 5
+_SLOT_FIELDS = 3
+
+# 닫았지만 읽는 쪽 뷰가 남아 매핑을 아직 해제하지 못한 공유 메모리
+_retained = []
+_retained_lock = threading.Lock()
+
+
+class FrameRing:
+    """공유 메모리에 미리 할당한 프레임 슬롯을 돌려 쓰는 단일 작성자 링 버퍼.
+
+    작성자는 다음 슬롯에 직접 쓰고 seq 를 공개하며, 읽는 쪽은 복사 없이 슬롯 위의 배열 뷰를 받습니다.
+    서로 잠금을 잡지 않으므로 작성자와 읽는 쪽은 어느 쪽도 상대를 기다리지 않습니다.
+    슬롯별 seq 는 seqlock 처럼 쓰는 동안 음수로 표시되며, 뷰는 작성자가 링을 한 바퀴 돌기 전까지 유효합니다
+    (valid(seq) 로 덮어써졌는지 확인). 다른 프로세스에서는 FrameRing.attach(name) 으로 같은 링을 읽습니다.
+    """
+
+    def __init__(self, slots=8, max_shape=(1080, 1920, 3), name=None, start_seq=0):
+        if name is None:
+            self.slots = slots
+            self.max_shape = tuple(max_shape)
+            self.slot_size = int(np.prod(self.max_shape))
+            header_size = (_HEADER_FIELDS + _SLOT_FIELDS * slots) * 8
+            self._shm = shared_memory.SharedMemory(create=True, size=header_size + self.slot_size * slots)
+            self._owner = True
+            self._buf = _pin(self._shm)
+            self._header = np.ndarray((_HEADER_FIELDS + _SLOT_FIELDS * slots,), dtype=np.int64, buffer=self._buf)
+            self._header[:] = 0
+            self._header[1:5] = (slots, *self.max_shape)
+            # 교체용 링은 이전 링의 seq 를 이어받아 읽는 쪽의 after_seq 가 그대로 유효
+            self._header[0] = start_seq
+        else:
+            self._shm = attach_shared_memory(name)
+            self._owner = False
+            self._buf = _pin(self._shm)
+            self.slots, *max_shape = np.ndarray((4,), dtype=np.int64, buffer=self._buf, offset=8).tolist()
+            self.max_shape = tuple(max_shape)
+            self.slot_size = int(np.prod(self.max_shape))
+            self._header = np.ndarray((_HEADER_FIELDS + _SLOT_FIELDS * self.slots,), dtype=np.int64, buffer=self._buf)
+        offset = self._header.nbytes
+        self._data = np.ndarray((self.slots, self.slot_size), dtype=np.uint8, buffer=self._buf, offset=offset)
+        self._slot_meta = self._header[_HEADER_FIELDS:].reshape(self.slots, _SLOT_FIELDS)
+
+    @classmethod
+    def attach(cls, name):
+        return cls(name=name)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    @property
+    def seq(self):
+        return int(self._header[0])
+
+    @property
+    def closed(self):
+        return self._header is None
+
+    def _view(self, slot, shape):
+        return self._data[slot, :int(np.prod(shape))].reshape(shape)
+
+    def reserve(self, shape=None):
+        """다음에 쓸 슬롯의 배열 뷰를 반환합니다. cap.read(view) 처럼 장치가 직접 채우게 할 때 사용합니다."""
+        shape = tuple(shape or self.max_shape)
+        if int(np.prod(shape)) > self.slot_size:
+            raise ValueError(f"프레임이 링 슬롯보다 큽니다: {shape}")
+        slot = (self.seq + 1) % self.slots
+        # 쓰는 중 표시: 읽는 쪽은 이 슬롯을 건너뜀
+        self._slot_meta[slot, 0] = -1
+        return self._view(slot, shape)
+
+    def write(self, frame):
+        """프레임을 다음 슬롯에 공개하고 새 seq 를 반환합니다. reserve 한 뷰에 이미 채워졌다면 복사하지 않습니다."""
+        seq = self.seq + 1
+        slot = seq % self.slots
+        view = self._view(slot, frame.shape)
+        if frame.ctypes.data != view.ctypes.data:
+            # 장치가 슬롯에 직접 쓰지 못한 경우에만 한 번 복사
+            self._slot_meta[slot, 0] = -1
+            view[...] = frame
+        self._slot_meta[slot, 1:] = frame.shape[:2]
+        self._slot_meta[slot, 0] = seq
+        self._header[0] = seq
+        return seq
+
+    def latest(self, after_seq=0):
+        """after_seq 보다 새로운 최신 프레임을 (seq, 뷰) 로 반환합니다. 없으면 (seq, None)."""
+        if self.closed:
+            return after_seq, None
+        seq = self.seq
+        if seq <= after_seq or seq == 0:
+            return seq, None
+        slot = seq % self.slots
+        slot_seq, height, width = self._slot_meta[slot].tolist()
+        if slot_seq != seq:
+            # 그 사이 작성자가 한 바퀴 돌았음
+            return seq, None
+        return seq, self._view(slot, (height, width, self.max_shape[2]))
+
+    def read(self, seq):
+        """특정 seq 프레임의 뷰를 반환합니다. 이미 덮어써졌으면 None."""
+        if self.closed:
+            return None
+        slot = seq % self.slots
+        slot_seq, height, width = self._slot_meta[slot].tolist()
+        if slot_seq != seq:
+            return None
+        return self._view(slot, (height, width, self.max_shape[2]))
+
+    def valid(self, seq):
+        """seq 프레임의 슬롯이 아직 덮어써지지 않았는지 확인합니다."""
+        if self.closed:
+            return False
+        return int(self._slot_meta[seq % self.slots, 0]) == seq
+
+    def close(self):
+        if self.closed:
+            return
+        if self._owner:
+            self._shm.unlink()
+        self._data = self._header = self._slot_meta = self._buf = None
+        with _retained_lock:
+            _retained.append(self._shm)
+            _release_retained()
+
+
+def _pin(shm):
+    # numpy 는 shm.buf 로 만든 배열의 base 를 mmap 으로 바꾸고 버퍼를 잠그지 않아, 읽는 쪽 뷰가 남아 있어도
+    # shm.close() 가 매핑을 해제함 (이후 뷰 접근 시 segfault). ctypes 배열을 거치면 뷰가 살아 있는 동안 버퍼가 잠김
+    return (ctypes.c_ubyte * shm.size).from_buffer(shm.buf)
+
+
+def _release_retained():
+    # _retained_lock 을 잡은 상태에서 호출. 뷰가 남은 링은 close 가 BufferError 로 실패하므로 다음 close 때 다시 시도
+    for shm in list(_retained):
+        try:
+            shm.close()
+        except BufferError:
+            continue
+        _retained.remove(shm)
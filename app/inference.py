@@ -0,0 +1,237 @@
+import atexit
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+import numpy as np
+
+from .backends import create_backend
+from .metrics import INFERENCE_SECONDS
+
+
+class InferenceEngine:
+    """프로세스 전체에서 하나만 로드해 공유하는 YOLO 추론 엔진.
+
+    실제 추론은 backend (torch / onnx / onnx-int8 / openvino) 가 수행하며 모두 같은 (N, 6) 배열을 반환합니다.
+    workers 가 1 이상이면 백엔드를 워커 프로세스 풀(app.workers)에서 실행해 Flask 스레드와 GIL 을 공유하지 않습니다.
+    쓰러짐 감지의 포즈 추정(predict_pose)도 같은 경로로 실행되며, 포즈 모델은 처음 요청될 때 로드합니다.
+    track_conf 를 주면 추적기의 낮은 신뢰도 매칭용으로 백엔드는 min(conf, track_conf) 까지 탐지를 내보내고,
+    conf 는 추적 없이 집계할 때의 기준으로 남습니다 (analyze_frame).
+    """
+
+    def __init__(self, model_path="yolov8n.pt", imgsz=640, conf=0.5, backend="torch", threads=0, latency_window=1000,
+                 workers=0, worker_threads=1, max_frame_shape=(1080, 1920, 3), pose_model_path="yolov8n-pose.pt",
+                 pose_imgsz=256, pose_conf=0.25, track_conf=None):
+        self.model_path = model_path
+        self.imgsz = imgsz
+        self.conf = conf
+        self.track_conf = track_conf
+        # 백엔드가 탐지를 걸러내는 신뢰도
+        self.detect_conf = min(conf, track_conf) if track_conf is not None else conf
+        self.backend_name = backend
+        self.threads = threads
+        self.workers = workers
+        self.worker_threads = worker_threads
+        self.max_frame_shape = max_frame_shape
+        self.pose_model_path = pose_model_path
+        self.pose_imgsz = pose_imgsz
+        self.pose_conf = pose_conf
+        self.load_time = None
+        self.call_count = 0
+        self.pose_calls = 0
+        self._backend = None
+        self._pose = None
+        # ultralytics predictor는 스레드 안전하지 않으므로 호출을 직렬화
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=latency_window)
+
+    @property
+    def model(self):
+        return self.load().model
+
+    def load(self):
+        # 최초 1회만 백엔드 생성 (ONNX 백엔드는 필요 시 내보내기까지 수행)
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    start = time.perf_counter()
+                    if self.workers > 0:
+                        from .workers import InferenceWorkerPool
+                        self._backend = InferenceWorkerPool(
+                            workers=self.workers, threads_per_worker=self.worker_threads,
+                            max_frame_shape=self.max_frame_shape, backend=self.backend_name,
+                            model_path=self.model_path, imgsz=self.imgsz, conf=self.detect_conf,
+                            pose_model_path=self.pose_model_path, pose_imgsz=self.pose_imgsz, pose_conf=self.pose_conf,
+                        )
+                        atexit.register(self._backend.close)
+                    else:
+                        self._backend = create_backend(
+                            self.backend_name, self.model_path, imgsz=self.imgsz, conf=self.detect_conf, threads=self.threads
+                        )
+                    self.load_time = time.perf_counter() - start
+        return self._backend
+
+    def _guard(self, backend):
+        # 워커 풀은 동시 호출을 받아 여러 프로세스로 분산하므로 직렬화하지 않음
+        return nullcontext() if getattr(backend, "thread_safe", False) else self._lock
+
+    def warmup(self, runs=1):
+        # 첫 추론 시 발생하는 초기화 비용을 시작 시점에 미리 지불
+        dummy = np.zeros((self.imgsz, self.imgsz, 3), dtype=np.uint8)
+        for _ in range(runs):
+            self.predict(dummy, record=False)
+
+    def predict(self, frame, record=True, imgsz=None):
+        """프레임 한 장을 추론하고 (N, 6) [x1, y1, x2, y2, conf, cls] 배열을 반환합니다.
+
+        imgsz 를 주면 기본 YOLO_IMGSZ 대신 그 입력 크기로 추론합니다.
+        """
+        backend = self.load()
+        with self._guard(backend):
+            start = time.perf_counter()
+            detections = backend.predict(frame, imgsz=imgsz)
+            elapsed = time.perf_counter() - start
+            if record:
+                self.call_count += 1
+                self._latencies.append(elapsed)
+                INFERENCE_SECONDS.observe(elapsed, self.backend_name)
+        return detections
+
+    def predict_batch(self, frames, imgsz=None):
+        """여러 프레임을 한 번의 predict 호출로 추론하고 프레임별 (N, 6) 배열 리스트를 반환합니다."""
+        if not frames:
+            return []
+        backend = self.load()
+        with self._guard(backend):
+            start = time.perf_counter()
+            batch = backend.predict_batch(frames, imgsz=imgsz)
+            elapsed = time.perf_counter() - start
+            self.call_count += 1
+            self._latencies.append(elapsed)
+            INFERENCE_SECONDS.observe(elapsed, self.backend_name)
+        return batch
+
+    def _load_pose(self):
+        # 워커 풀은 워커마다 포즈 모델을 로드하므로 이 프로세스에서는 로컬 백엔드일 때만 로드
+        backend = self.load()
+        if hasattr(backend, "predict_pose"):
+            return backend
+        if self._pose is None:
+            with self._lock:
+                if self._pose is None:
+                    from .backends import PoseBackend
+                    self._pose = PoseBackend(self.pose_model_path, imgsz=self.pose_imgsz, conf=self.pose_conf)
+        return self._pose
+
+    def predict_pose(self, frame, boxes, imgsz=None):
+        """frame 의 정수 박스 (M, 4) 영역별 (M, 17, 3) [x, y, conf] 키포인트를 추정합니다."""
+        pose = self._load_pose()
+        with self._guard(pose):
+            start = time.perf_counter()
+            keypoints = pose.predict_pose(frame, boxes, imgsz=imgsz)
+            self.pose_calls += 1
+            INFERENCE_SECONDS.observe(time.perf_counter() - start, "pose")
+        return keypoints
+
+    def stats(self):
+        latencies = sorted(self._latencies)
+        stats = {
+            "backend": self.backend_name,
+            "model_path": self.model_path,
+            "imgsz": self.imgsz,
+            "conf": self.conf,
+            "detect_conf": self.detect_conf,
+            "load_time_ms": round(self.load_time * 1000, 2) if self.load_time is not None else None,
+            "calls": self.call_count,
+            "pose_calls": self.pose_calls,
+        }
+        if self.workers > 0 and self._backend is not None:
+            stats["workers"] = self._backend.stats()
+        if latencies:
+            stats["latency_ms"] = {
+                "avg": round(sum(latencies) / len(latencies) * 1000, 2),
+                "p50": round(latencies[len(latencies) // 2] * 1000, 2),
+                "p99": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 2),
+                "max": round(latencies[-1] * 1000, 2),
+            }
+        return stats
+
+
+_engine = None
+_engine_options = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    # 설정 전에 호출되면 기본값으로 엔진 생성
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = InferenceEngine()
+    return _engine
+
+
+def _options(app):
+    # 앱 설정으로 만들 엔진 종류와 생성 인자 (이미 있는 엔진과 설정이 같은지 비교할 때도 사용)
+    if app.config['APP_ROLE'] in ('web', 'capture'):
+        return "remote", dict(
+            broker=app.config['ROLE_BROKER_ADDRESS'],
+            imgsz=app.config['YOLO_IMGSZ'],
+            conf=app.config['YOLO_CONF'],
+            max_frame_shape=app.config['INFERENCE_MAX_FRAME_SHAPE'],
+            ring_slots=app.config['ROLE_RING_SLOTS'],
+        )
+    return "local", dict(
+        model_path=app.config['YOLO_MODEL_PATH'],
+        imgsz=app.config['YOLO_IMGSZ'],
+        conf=app.config['YOLO_CONF'],
+        backend=app.config['DETECTOR_BACKEND'],
+        threads=app.config['DETECTOR_THREADS'],
+        workers=app.config['INFERENCE_WORKERS'],
+        worker_threads=app.config['INFERENCE_WORKER_THREADS'],
+        max_frame_shape=app.config['INFERENCE_MAX_FRAME_SHAPE'],
+        pose_model_path=app.config['FALL_POSE_MODEL_PATH'],
+        pose_imgsz=app.config['FALL_POSE_IMGSZ'],
+        track_conf=app.config['TRACK_LOW_CONF'],
+    )
+
+
+def init_engine(app):
+    """앱 설정으로 전역 엔진을 구성합니다.
+
+    모델은 첫 추론 시 로드되며, YOLO_PRELOAD 가 켜져 있을 때만 여기서 로드 및 워밍업까지 수행합니다.
+    엔진은 프로세스에 하나이므로 이미 다른 설정으로 만들어져 있으면 경고하고 기존 엔진을 그대로 사용합니다.
+    """
+    global _engine, _engine_options
+    kind, options = _options(app)
+    with _engine_lock:
+        if _engine is None:
+            if kind == "remote":
+                # 추론은 inference 역할 프로세스가 담당
+                from .roles import RemoteEngine, get_broker
+                _engine = RemoteEngine(get_broker(app), **{k: v for k, v in options.items() if k != "broker"})
+            else:
+                _engine = InferenceEngine(**options)
+            _engine_options = (kind, options)
+        elif _engine_options != (kind, options):
+            if _engine_options is None:
+                changed = "기본값으로 생성됨 (get_engine)"
+            elif _engine_options[0] != kind:
+                changed = f"{_engine_options[0]} -> {kind}"
+            else:
+                changed = ", ".join(
+                    f"{key}: {_engine_options[1][key]!r} -> {value!r}"
+                    for key, value in options.items() if _engine_options[1][key] != value
+                )
+            app.logger.warning(f"추론 엔진이 이미 다른 설정으로 만들어져 있어 새 설정을 적용하지 않습니다 ({changed})")
+    if kind == "remote" or not isinstance(_engine, InferenceEngine):
+        return _engine
+    if not app.config['YOLO_PRELOAD'] and app.config['APP_ROLE'] != 'inference':
+        return _engine
+    _engine.load()
+    if app.config['YOLO_WARMUP']:
+        _engine.warmup()
+    app.logger.info(f"YOLO 모델 로드 완료: {_engine.model_path} [{_engine.backend_name}] ({_engine.stats()['load_time_ms']}ms)")
+    return _engine
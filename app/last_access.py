@@ -0,0 +1,132 @@
+import atexit
+import threading
+import time
+
+from app import db
+
+
+class LastAccessBuffer:
+    """CCTV.last_access 갱신을 메모리에 모았다가 flush_interval 마다 UPDATE 한 번으로 기록합니다.
+
+    같은 CCTV 를 여러 번 보면 가장 최근 시각 하나만 남고, 기록이 끝나기 전까지는 merge() 로
+    DB 값 대신 대기 중인 시각을 읽을 수 있습니다.
+    """
+
+    def __init__(self, app, flush_interval=5.0):
+        self.app = app
+        self.flush_interval = flush_interval
+        # 카운터
+        self.recorded = 0
+        self.flushed = 0
+        self.flushes = 0
+        self.failed = 0
+        self.last_flush_ms = None
+        # CCTV.id -> 가장 최근 접근 시각
+        self._pending = {}
+        # 기록 중인 값 (커밋 전까지 읽기에 반영)
+        self._flushing = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="last-access", daemon=True)
+        self._thread.start()
+
+    def record(self, cctv_pk, when):
+        with self._lock:
+            previous = self._pending.get(cctv_pk)
+            if previous is None or when > previous:
+                self._pending[cctv_pk] = when
+            self.recorded += 1
+
+    def merge(self, cctv_pk, last_access):
+        # DB 에서 읽은 값과 아직 기록되지 않은 값 중 최근 것
+        pending = self._pending.get(cctv_pk) or self._flushing.get(cctv_pk)
+        if pending is None or (last_access is not None and last_access >= pending):
+            return last_access
+        return pending
+
+    def _update(self, pending):
+        from sqlalchemy import case, or_
+        from .models import CCTV
+        table = CCTV.__table__
+        # CCTV 별 시각을 CASE 로 묶어 UPDATE 문 하나로 기록
+        # 다른 워커 프로세스가 먼저 기록한 더 최근 시각은 덮어쓰지 않음
+        last_access = case(pending, value=table.c.id)
+        statement = (
+            table.update()
+            .where(table.c.id.in_(list(pending)))
+            .where(or_(table.c.last_access.is_(None), table.c.last_access < last_access))
+            .values(last_access=last_access)
+        )
+        with self.app.app_context():
+            try:
+                db.session.execute(statement)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+
+    def flush(self):
+        """대기 중인 시각을 기록하고 기록한 CCTV 수를 반환합니다. 실패하면 다음 주기에 다시 시도합니다."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._flushing = pending
+            if not pending:
+                return 0
+            started = time.perf_counter()
+            try:
+                self._update(pending)
+            except Exception as e:
+                # 그 사이 들어온 더 최근 값은 유지하고 나머지를 되돌려 놓음
+                with self._lock:
+                    for cctv_pk, when in pending.items():
+                        if cctv_pk not in self._pending or self._pending[cctv_pk] < when:
+                            self._pending[cctv_pk] = when
+                    self._flushing = {}
+                self.failed += 1
+                self.app.logger.error(f"CCTV 최근 접근 시간 기록 실패 ({len(pending)}건, 다음 주기에 재시도): {e}")
+                return 0
+            with self._lock:
+                self._flushing = {}
+            self.flushes += 1
+            self.flushed += len(pending)
+            self.last_flush_ms = round((time.perf_counter() - started) * 1000, 2)
+            return len(pending)
+
+    def _run(self):
+        while not self._stopped.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        # 종료 시 남은 값을 모두 기록
+        self._stopped.set()
+        self._thread.join(timeout=10)
+        self.flush()
+
+    def stats(self):
+        return {
+            "pending": len(self._pending),
+            "recorded": self.recorded,
+            "flushed": self.flushed,
+            "flushes": self.flushes,
+            "failed": self.failed,
+            "last_flush_ms": self.last_flush_ms,
+        }
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_last_access_buffer():
+    return _buffer
+
+
+def init_last_access_buffer(app):
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = LastAccessBuffer(app, flush_interval=app.config['LAST_ACCESS_FLUSH_INTERVAL'])
+            atexit.register(_buffer.close)
+    return _buffer
@@ -0,0 +1,201 @@
+import atexit
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from sqlalchemy.exc import DataError, IntegrityError
+
+from app import db
+from .metrics import DB_FLUSH_SECONDS
+
+
+class LogSink:
+    """DetectionLog / AbnormalBehaviorLog 레코드를 모았다가 크기 또는 시간 기준으로 일괄 INSERT 합니다."""
+
+    def __init__(self, app, max_batch=200, flush_interval=1.0, max_queue=10000, max_retries=3, retry_backoff=0.5):
+        self.app = app
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        # 카운터
+        self.enqueued = 0
+        self.flushed = 0
+        self.flushes = 0
+        self.failed = 0
+        self.dropped = 0
+        self.retries = 0
+        self.last_flush_ms = None
+        self._flush_total = 0.0
+        # 모델별 훅: before_commit 은 같은 트랜잭션 안에서, after_commit 은 커밋 이후 호출
+        self._before_commit = {}
+        self._after_commit = {}
+        # (모델 클래스, 컬럼 dict)
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="log-sink", daemon=True)
+        self._thread.start()
+
+    @property
+    def depth(self):
+        return len(self._queue)
+
+    def add(self, model, **fields):
+        """레코드를 버퍼에 넣습니다. 대기열이 가득 차면 False 를 반환하고 버립니다."""
+        # 탐지 시각은 flush 시점이 아니라 이벤트 발생 시점으로 기록
+        fields.setdefault("detection_time", datetime.utcnow())
+        with self._cond:
+            if len(self._queue) >= self.max_queue:
+                self.dropped += 1
+                return False
+            self._queue.append((model, fields))
+            self.enqueued += 1
+            if len(self._queue) >= self.max_batch:
+                self._cond.notify()
+        return True
+
+    def _take(self):
+        with self._cond:
+            count = min(len(self._queue), self.max_batch)
+            return [self._queue.popleft() for _ in range(count)]
+
+    def add_hook(self, model, before_commit=None, after_commit=None):
+        """model 레코드가 기록될 때 rows(list of dict) 를 받아 호출될 함수를 등록합니다."""
+        if before_commit:
+            self._before_commit.setdefault(model, []).append(before_commit)
+        if after_commit:
+            self._after_commit.setdefault(model, []).append(after_commit)
+
+    def _insert(self, batch):
+        # 모델별로 묶어 한 트랜잭션에서 bulk insert
+        grouped = {}
+        for model, fields in batch:
+            grouped.setdefault(model, []).append(fields)
+        with self.app.app_context():
+            try:
+                for model, rows in grouped.items():
+                    db.session.bulk_insert_mappings(model, rows)
+                    for hook in self._before_commit.get(model, ()):
+                        hook(rows)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            for model, rows in grouped.items():
+                for hook in self._after_commit.get(model, ()):
+                    try:
+                        hook(rows)
+                    except Exception as e:
+                        self.app.logger.error(f"로그 기록 후처리 오류: {e}")
+        return grouped
+
+    def _insert_split(self, batch):
+        # 데이터 오류가 난 배치를 반씩 나눠 기록해 문제 레코드만 버림. 기록한 레코드 수를 반환
+        try:
+            self._insert(batch)
+            return len(batch)
+        except Exception as e:
+            if len(batch) == 1:
+                self.failed += 1
+                self.app.logger.error(f"로그 기록 실패 (1건 폐기): {e}")
+                return 0
+        middle = len(batch) // 2
+        return self._insert_split(batch[:middle]) + self._insert_split(batch[middle:])
+
+    def flush(self):
+        """버퍼가 빌 때까지 일괄 기록합니다. 기록한 레코드 수를 반환합니다."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = self._take()
+                if not batch:
+                    return written
+                started = time.perf_counter()
+                inserted = 0
+                for attempt in range(self.max_retries + 1):
+                    try:
+                        self._insert(batch)
+                        inserted = len(batch)
+                        break
+                    except (IntegrityError, DataError) as e:
+                        # 다시 시도해도 같은 레코드에서 실패하므로 재시도 대신 나눠 기록
+                        self.app.logger.warning(f"로그 일괄 기록 데이터 오류, 나눠서 다시 기록합니다 ({len(batch)}건): {e}")
+                        inserted = self._insert_split(batch)
+                        break
+                    except Exception as e:
+                        if attempt == self.max_retries:
+                            self.failed += len(batch)
+                            self.app.logger.error(f"로그 일괄 기록 실패 ({len(batch)}건 폐기): {e}")
+                            break
+                        self.retries += 1
+                        time.sleep(self.retry_backoff * (2 ** attempt))
+                if not inserted:
+                    # 실패한 배치는 flush 횟수/시간에 넣지 않음
+                    continue
+                elapsed = time.perf_counter() - started
+                DB_FLUSH_SECONDS.observe(elapsed)
+                self.flushes += 1
+                self.flushed += inserted
+                self.last_flush_ms = round(elapsed * 1000, 2)
+                self._flush_total += elapsed
+                written += inserted
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._stopped and len(self._queue) < self.max_batch:
+                    self._cond.wait(self.flush_interval)
+                stopped = self._stopped
+            self.flush()
+            if stopped:
+                return
+
+    def close(self):
+        # 종료 시 남은 레코드를 모두 기록
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        self._thread.join(timeout=30)
+        self.flush()
+
+    def stats(self):
+        return {
+            "queue_depth": self.depth,
+            "enqueued": self.enqueued,
+            "flushed": self.flushed,
+            "flushes": self.flushes,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "retries": self.retries,
+            "last_flush_ms": self.last_flush_ms,
+            "avg_flush_ms": round(self._flush_total / self.flushes * 1000, 2) if self.flushes else None,
+        }
+
+
+_sink = None
+_sink_lock = threading.Lock()
+
+
+def get_log_sink():
+    if _sink is None:
+        raise RuntimeError("LogSink가 초기화되지 않았습니다. create_app()을 먼저 호출하세요.")
+    return _sink
+
+
+def init_log_sink(app):
+    global _sink
+    with _sink_lock:
+        if _sink is None:
+            _sink = LogSink(
+                app,
+                max_batch=app.config['LOG_SINK_BATCH_SIZE'],
+                flush_interval=app.config['LOG_SINK_FLUSH_INTERVAL'],
+                max_queue=app.config['LOG_SINK_MAX_QUEUE'],
+                max_retries=app.config['LOG_SINK_MAX_RETRIES'],
+            )
+            atexit.register(_sink.close)
+    return _sink
@@ -0,0 +1,281 @@
+import bisect
+import hmac
+import threading
+import time
+
+# 단계별 지연시간 구간 (초): 1ms ~ 5s
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """단조 증가 카운터. 라벨 값 튜플별로 누적합니다."""
+
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        if not enabled:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        return [(self.name, labels, value) for labels, value in values]
+
+
+class Histogram:
+    """누적 구간 히스토그램. 관측은 bisect 한 번과 정수 증가뿐이라 수집하지 않을 때 비용이 거의 없습니다."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        if not enabled:
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # [구간별 개수..., +Inf 개수, 합계]
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def samples(self):
+        with self._lock:
+            series = [(labels, list(values)) for labels, values in self._series.items()]
+        samples = []
+        for labels, values in series:
+            # 노출 형식은 누적 개수
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                samples.append((f"{self.name}_bucket", labels, cumulative, ("le", le)))
+            samples.append((f"{self.name}_count", labels, cumulative))
+            samples.append((f"{self.name}_sum", labels, values[-1]))
+        return samples
+
+
+class Registry:
+    """지표와 수집 함수(collector) 목록. 수집 함수는 /metrics 를 요청할 때만 호출됩니다."""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        """collector() -> [(name, kind, help, labelnames, [(labels, value), ...]), ...]"""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = list(self._collectors)
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for sample in metric.samples():
+                name, labels, value = sample[:3]
+                extra = sample[3] if len(sample) > 3 else None
+                lines.append(f"{name}{_format_labels(metric.labelnames, labels, extra)} {_format_value(value)}")
+        for collector in collectors:
+            try:
+                families = collector()
+            except Exception:
+                # 구성요소 하나의 stats 실패로 전체 응답이 깨지지 않도록 건너뜀
+                continue
+            for name, kind, help, labelnames, values in families:
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in values:
+                    if value is not None:
+                        lines.append(f"{name}{_format_labels(labelnames, labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# 프레임 처리 단계별 지연시간 (stage: capture_read / inference / postprocess / jpeg_encode)
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "cctv_stage_seconds", "Per-camera frame processing time by stage.", ("stage", "cctv_id")))
+# 배치 추론 호출 지연시간 (여러 카메라의 프레임을 한 번에 처리하므로 카메라 라벨 없음)
+INFERENCE_SECONDS = REGISTRY.register(Histogram(
+    "inference_batch_seconds", "Detector call latency.", ("backend",)))
+DB_FLUSH_SECONDS = REGISTRY.register(Histogram(
+    "db_flush_seconds", "Log sink bulk insert latency.", ()))
+SNAPSHOT_SECONDS = REGISTRY.register(Histogram(
+    "snapshot_write_seconds", "Snapshot encode and write latency.", ("format",)))
+FRAMES_DROPPED = REGISTRY.register(Counter(
+    "cctv_frames_dropped_total", "Frames dropped before processing.", ("stage", "cctv_id")))
+
+# False 면 관측을 모두 건너뜀 (METRICS_ENABLED)
+enabled = True
+
+
+def observe_stage(stage, cctv_id, seconds):
+    STAGE_SECONDS.observe(seconds, stage, cctv_id)
+
+
+class DetectTimer:
+    """탐지 함수를 감싸 inference 단계 시간을 기록합니다. elapsed 로 나머지(postprocess) 시간을 계산할 수 있습니다."""
+
+    def __init__(self, detect, cctv_id):
+        self.detect = detect
+        self.cctv_id = cctv_id
+        self.elapsed = 0.0
+
+    def __call__(self, frame):
+        start = time.perf_counter()
+        try:
+            return self.detect(frame)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.elapsed += elapsed
+            observe_stage("inference", self.cctv_id, elapsed)
+
+
+def register_stats_collector(app):
+    """구성요소의 stats() 에 이미 있는 카운터/대기열 깊이를 /metrics 요청 시점에만 읽어 노출합니다."""
+
+    def collect():
+        families = []
+        scheduler = getattr(app, "batch_scheduler", None)
+        if scheduler is not None:
+            stats = scheduler.stats()
+            families.append(("batch_scheduler_pending", "gauge", "Frames waiting for batch inference.", (), [((), stats["pending"])]))
+            families.append(("batch_scheduler_frames_total", "counter", "Frames inferred by the batch scheduler.", (), [((), stats["frames"])]))
+
+        sink = getattr(app, "log_sink", None)
+        if sink is not None:
+            stats = sink.stats()
+            families.append(("log_sink_queue_depth", "gauge", "Log records waiting to be written.", (), [((), stats["queue_depth"])]))
+            for key in ("flushed", "failed", "dropped", "retries"):
+                families.append((f"log_sink_{key}_total", "counter", f"Log sink {key} records.", (), [((), stats[key])]))
+
+        writer = getattr(app, "snapshot_writer", None)
+        if writer is not None:
+            stats = writer.stats()
+            families.append(("snapshot_queue_depth", "gauge", "Snapshots waiting to be written.", (), [((), stats["queued"])]))
+            families.append(("snapshot_rejected_total", "counter", "Snapshots rejected because the queue was full.", (), [((), stats["rejected"])]))
+
+        pool = getattr(app, "capture_pool", None)
+        if pool is not None:
+            captures = pool.stats()
+            families.append(("capture_frames_total", "counter", "Frames read from each camera.", ("cctv_id",),
+                             [((c["cctv_id"],), c["frames"]) for c in captures]))
+            families.append(("capture_connected", "gauge", "Whether the camera device is open.", ("cctv_id",),
+                             [((c["cctv_id"],), int(c["connected"])) for c in captures]))
+
+        hub = getattr(app, "stream_hub", None)
+        if hub is not None:
+            streams = hub.stats()
+            families.append(("stream_viewers", "gauge", "MJPEG viewers per camera.", ("cctv_id",),
+                             [((s["cctv_id"],), s["viewers"]) for s in streams]))
+            families.append(("stream_client_dropped_total", "counter", "Frames dropped for slow MJPEG viewers.", ("cctv_id",),
+                             [((s["cctv_id"],), s["dropped"]) for s in streams]))
+
+        registry = getattr(app, "cctv_registry", None)
+        if registry is not None:
+            stats = registry.stats()
+            families.append(("cctv_registry_hits_total", "counter", "CCTV lookups served from the cache.", (), [((), stats["hits"])]))
+            families.append(("cctv_registry_reloads_total", "counter", "CCTV list reloads from the database.", (), [((), stats["reloads"])]))
+
+        buffer = getattr(app, "last_access_buffer", None)
+        if buffer is not None:
+            stats = buffer.stats()
+            families.append(("last_access_pending", "gauge", "CCTV last-access updates waiting to be written.", (), [((), stats["pending"])]))
+            families.append(("last_access_flushes_total", "counter", "Batched CCTV last-access UPDATE statements.", (), [((), stats["flushes"])]))
+
+        bus = getattr(app, "event_bus", None)
+        if bus is not None:
+            stats = bus.stats()
+            families.append(("events_subscribers", "gauge", "Connected SSE clients.", (), [((), stats["subscribers"])]))
+            families.append(("events_dropped_total", "counter", "Events dropped for slow SSE clients.", (), [((), stats["dropped"])]))
+        return families
+
+    REGISTRY.add_collector(collect)
+
+
+def authorized(remote_addr, authorization, token=None, allow=()):
+    """허용 주소 목록(allow)에서 온 요청이거나 METRICS_TOKEN 과 같은 Bearer 토큰이면 /metrics 를 허용합니다."""
+    if remote_addr in allow:
+        return True
+    return bool(token) and hmac.compare_digest((authorization or "").encode(), f"Bearer {token}".encode())
+
+
+def serve_metrics(port, host="127.0.0.1", token=None, allow=("127.0.0.1", "::1")):
+    """웹 역할이 아닌 프로세스(capture / inference)용 /metrics 전용 HTTP 서버를 백그라운드로 실행합니다.
+
+    기본은 로컬에서만 접속할 수 있으며, 다른 호스트에서 수집하려면 host 와 함께 token 또는 allow 를 지정합니다.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if not authorized(self.client_address[0], self.headers.get("Authorization"), token, allow):
+                self.send_error(403)
+                return
+            body = REGISTRY.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
+
+
+def init_metrics(app):
+    global enabled
+    enabled = app.config['METRICS_ENABLED']
+    register_stats_collector(app)
+    if app.config['METRICS_PORT'] and app.config['APP_ROLE'] in ('capture', 'inference'):
+        serve_metrics(
+            app.config['METRICS_PORT'], host=app.config['METRICS_HOST'],
+            token=app.config['METRICS_TOKEN'], allow=app.config['METRICS_ALLOW'],
+        )
+    return REGISTRY
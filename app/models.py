@@ -21,14 +21,29 @@ class CCTV(db.Model):
     location = db.Column(db.String(100), nullable=False)
     registration_date = db.Column(db.DateTime, default=datetime.utcnow)
     last_access = db.Column(db.DateTime, nullable=True)
+    source = db.Column(db.String(255), nullable=True)  # 동영상 파일/이미지 폴더 경로 (없으면 CCTV ID 의 웹캠 인덱스)
+    roi = db.Column(db.String(64), nullable=True)  # 추론 영역 "x1,y1,x2,y2" (프레임 대비 0~1 비율, 없으면 전체)
+    inference_size = db.Column(db.Integer, nullable=True)  # 추론 입력 크기 (없으면 YOLO_IMGSZ)
+    calibration = db.Column(db.Text, nullable=True)  # 밀도 보정 JSON (지면 호모그래피와 구역, app.density 참고)
+
+    def current_last_access(self):
+        # 아직 DB 에 기록되지 않은 최근 접근 시간(LastAccessBuffer)까지 반영
+        from .last_access import get_last_access_buffer
+        buffer = get_last_access_buffer()
+        return buffer.merge(self.id, self.last_access) if buffer else self.last_access
 
     def to_dict(self):
+        last_access = self.current_last_access()
         return {
             "id": self.id,
             "cctv_id": self.cctv_id,
             "location": self.location,
+            "source": self.source,
+            "roi": self.roi,
+            "inference_size": self.inference_size,
+            "calibration": self.calibration,
             "registration_date": self.registration_date.isoformat() if self.registration_date else None,
-            "last_access": self.last_access.isoformat() if self.last_access else None,
+            "last_access": last_access.isoformat() if last_access else None,
         }
 
 class DetectionLog(db.Model):
@@ -44,6 +59,12 @@ class DetectionLog(db.Model):
     # 관계 설정
     cctv = db.relationship('CCTV', backref=db.backref('detection_logs', lazy=True))
 
+    # 목록 페이지 keyset 페이지네이션용 인덱스
+    __table_args__ = (
+        db.Index('ix_detection_logs_cctv_id_detection_time', 'cctv_id', 'detection_time', 'id'),
+        db.Index('ix_detection_logs_detection_time', 'detection_time', 'id'),
+    )
+
 class AbnormalBehaviorLog(db.Model):
     __tablename__ = 'abnormal_behavior_logs'
     id = db.Column(db.Integer, primary_key=True)
@@ -55,3 +76,46 @@ class AbnormalBehaviorLog(db.Model):
     # 관계 설정
     cctv = db.relationship('CCTV', backref=db.backref('abnormal_behavior_logs', lazy=True))
 
+    # 목록 페이지 keyset 페이지네이션용 인덱스
+    __table_args__ = (
+        db.Index('ix_abnormal_behavior_logs_cctv_id_detection_time', 'cctv_id', 'detection_time', 'id'),
+        db.Index('ix_abnormal_behavior_logs_detection_time', 'detection_time', 'id'),
+    )
+
+class DensityRollup(db.Model):
+    __tablename__ = 'density_rollups'
+    id = db.Column(db.Integer, primary_key=True)
+    cctv_id = db.Column(db.Integer, db.ForeignKey('cctvs.id'), nullable=False)  # CCTV 참조
+    granularity = db.Column(db.String(10), nullable=False)  # 집계 단위 ("minute", "hour", "day")
+    bucket_start = db.Column(db.DateTime, nullable=False)  # 집계 구간 시작 시각
+    sample_count = db.Column(db.Integer, nullable=False, default=0)  # 구간 내 로그 수
+    object_count_sum = db.Column(db.Integer, nullable=False, default=0)  # 객체 수 합계 (평균 계산용)
+    object_count_max = db.Column(db.Integer, nullable=False, default=0)  # 최대 객체 수
+    normal_seconds = db.Column(db.Float, nullable=False, default=0)  # 과밀 수준별 체류 시간 (초)
+    caution_seconds = db.Column(db.Float, nullable=False, default=0)
+    warning_seconds = db.Column(db.Float, nullable=False, default=0)
+    danger_seconds = db.Column(db.Float, nullable=False, default=0)
+
+    # 관계 설정
+    cctv = db.relationship('CCTV', backref=db.backref('density_rollups', lazy=True))
+
+    __table_args__ = (
+        db.UniqueConstraint('cctv_id', 'granularity', 'bucket_start', name='uq_density_rollups_bucket'),
+        db.Index('ix_density_rollups_granularity_bucket_start', 'granularity', 'bucket_start'),
+    )
+
+    def to_dict(self):
+        return {
+            "cctv_id": self.cctv_id,
+            "granularity": self.granularity,
+            "bucket_start": self.bucket_start.isoformat(),
+            "samples": self.sample_count,
+            "object_count_avg": round(self.object_count_sum / self.sample_count, 2) if self.sample_count else 0,
+            "object_count_max": self.object_count_max,
+            "level_seconds": {
+                "정상": self.normal_seconds,
+                "주의": self.caution_seconds,
+                "경고": self.warning_seconds,
+                "위험": self.danger_seconds,
+            },
+        }
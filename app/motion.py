@@ -0,0 +1,90 @@
+import json
+import time
+
+import numpy as np
+
+
+class MotionGate:
+    """축소한 흑백 프레임 차이로 움직임을 판단해, 움직임이 있거나 max_interval 이 지났을 때만 탐지를 허용합니다.
+
+    탐지를 건너뛴 프레임에서는 마지막 탐지 결과(last_summary)를 재사용합니다.
+    """
+
+    def __init__(self, threshold=0.01, max_interval=5.0, pixel_delta=25, width=64):
+        self.threshold = threshold
+        self.max_interval = max_interval
+        self.pixel_delta = pixel_delta
+        self.width = width
+        self.frames = 0
+        self.skipped = 0
+        self.last_motion = 0.0
+        self.last_summary = None
+        self._previous = None
+        self._last_detect = None
+
+    def _thumbnail(self, frame):
+        import cv2
+        height, width = frame.shape[:2]
+        size = (self.width, max(1, round(height * self.width / width)))
+        small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+
+    def should_detect(self, frame, now=None):
+        now = time.monotonic() if now is None else now
+        self.frames += 1
+        thumbnail = self._thumbnail(frame)
+        previous, self._previous = self._previous, thumbnail
+
+        if previous is None or previous.shape != thumbnail.shape:
+            self.last_motion = 1.0
+        else:
+            # 밝기 변화가 pixel_delta 를 넘는 픽셀 비율
+            import cv2
+            diff = cv2.absdiff(thumbnail, previous)
+            self.last_motion = float(np.count_nonzero(diff > self.pixel_delta)) / diff.size
+
+        due = self._last_detect is None or now - self._last_detect >= self.max_interval
+        if self.last_summary is None or due or self.last_motion >= self.threshold:
+            self._last_detect = now
+            return True
+        self.skipped += 1
+        return False
+
+    def remember(self, summary):
+        self.last_summary = summary
+
+    @property
+    def skip_ratio(self):
+        return self.skipped / self.frames if self.frames else 0.0
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "skipped": self.skipped,
+            "skip_ratio": round(self.skip_ratio, 3),
+            "last_motion": round(self.last_motion, 4),
+        }
+
+
+def motion_gate_for(app, cctv_id):
+    """MOTION_GATE_CCTVS 에 포함된 CCTV 라면 MotionGate 를 만들어 반환합니다 (아니면 None).
+
+    MOTION_GATE_OVERRIDES 로 CCTV별 threshold / max_interval 등을 덮어쓸 수 있습니다.
+    """
+    enabled = app.config['MOTION_GATE_CCTVS']
+    if '*' not in enabled and cctv_id not in enabled:
+        return None
+    options = {
+        "threshold": app.config['MOTION_THRESHOLD'],
+        "max_interval": app.config['MOTION_MAX_INTERVAL'],
+    }
+    options.update(app.config['MOTION_GATE_OVERRIDES'].get(cctv_id, {}))
+    return MotionGate(**options)
+
+
+def parse_overrides(value):
+    # 예: {"CCTV1": {"threshold": 0.005, "max_interval": 10}}
+    try:
+        return json.loads(value) if value else {}
+    except ValueError:
+        raise RuntimeError("MOTION_GATE_OVERRIDES is not valid JSON. Check your .env file.")
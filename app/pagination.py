@@ -0,0 +1,72 @@
+import base64
+from datetime import datetime
+from typing import NamedTuple
+
+from sqlalchemy import and_, or_
+
+
+class Page(NamedTuple):
+    items: list
+    next_cursor: str
+    prev_cursor: str
+    limit: int
+
+
+def encode_cursor(time, row_id):
+    raw = f"{time.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        time, row_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        return datetime.fromisoformat(time), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError(f"유효하지 않은 페이지 커서: {cursor}")
+
+
+def _seek(time_column, id_column, cursor, older):
+    # (time, id) 튜플 비교를 인덱스를 탈 수 있는 OR/AND 형태로 전개
+    time, row_id = decode_cursor(cursor)
+    if older:
+        return or_(time_column < time, and_(time_column == time, id_column < row_id))
+    return or_(time_column > time, and_(time_column == time, id_column > row_id))
+
+
+def keyset_paginate(query, time_column, id_column, after=None, before=None, limit=50, descending=True):
+    """(time, id) 기준 keyset 페이지네이션. OFFSET 을 쓰지 않아 테이블 크기와 무관하게 일정한 비용입니다.
+
+    after 는 현재 정렬 방향으로 다음 페이지, before 는 이전 페이지의 커서입니다.
+    """
+    backwards = before is not None
+    if after is not None:
+        query = query.filter(_seek(time_column, id_column, after, older=descending))
+    elif backwards:
+        query = query.filter(_seek(time_column, id_column, before, older=not descending))
+
+    # 이전 페이지는 반대 방향으로 읽은 뒤 뒤집음
+    scan_descending = descending != backwards
+    if scan_descending:
+        query = query.order_by(time_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(time_column.asc(), id_column.asc())
+
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if backwards:
+        rows.reverse()
+
+    def cursor_of(row):
+        return encode_cursor(row.detection_time, row.id)
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if backwards:
+            next_cursor = cursor_of(rows[-1])
+            prev_cursor = cursor_of(rows[0]) if has_more else None
+        else:
+            next_cursor = cursor_of(rows[-1]) if has_more else None
+            prev_cursor = cursor_of(rows[0]) if after is not None else None
+    return Page(rows, next_cursor, prev_cursor, limit)
@@ -0,0 +1,325 @@
+import threading
+import time
+
+import numpy as np
+
+from app import detection_logger
+from app.models import CCTV, DetectionLog, AbnormalBehaviorLog
+from .capture import get_capture_pool
+from .detection import summarize_detections, detection_log_fields, draw_detections
+from .motion import motion_gate_for
+from .tracking import KeyframeTracker, PersonTracker
+from .fall_detection import create_fall_detector
+from .log_sink import get_log_sink
+from .metrics import DetectTimer, observe_stage
+from .scheduler import get_scheduler
+from .snapshot import get_snapshot_writer, snapshot_name, SnapshotQueueFull
+from .utils import get_capture_source
+from .roi import InferenceRegion, format_roi
+from .density import create_density_engine
+
+
+class CameraPipeline:
+    """CCTV 하나에 대해 캡쳐 → YOLO → 집계 → 밀집도 분류 → 스냅샷 → 로그 기록을 반복합니다.
+
+    로그는 밀집 수준이 바뀌었거나 heartbeat 주기가 지났을 때만 기록합니다.
+    """
+
+    def __init__(self, app, cctv_pk, cctv_id, location, source, sample_fps=1.0, heartbeat=60.0, region=None,
+                 calibration=None):
+        self.app = app
+        self.cctv_pk = cctv_pk
+        self.cctv_id = cctv_id
+        self.location = location
+        self.source = source
+        self.region = region
+        self.calibration = calibration
+        # 보정 정보가 있으면 구역 밀도(명/m²) 기준, 없으면 인원 수 기준으로 수준 판단
+        try:
+            self.density = create_density_engine(app, calibration)
+        except ValueError as e:
+            app.logger.error(f"CCTV {cctv_id} 밀도 보정 정보 오류, 인원 수 기준으로 판단합니다: {e}")
+            self.density = None
+        self.last_density = None
+        self.sample_fps = sample_fps
+        self.heartbeat = heartbeat
+        self.samples = 0
+        self.logs_written = 0
+        self.falls_logged = 0
+        self.fall_confirms = 0
+        self.last_count = 0
+        self.fall_detector = create_fall_detector(app) if app.config['FALL_ENABLED'] else None
+        confirm_fps = app.config['FALL_CONFIRM_FPS']
+        self.fall_confirm_interval = 1.0 / confirm_fps if confirm_fps > 0 else None
+        # 샘플 간격보다 트랙 수명이 짧으면 매 샘플마다 ID 가 바뀌므로 간격에 맞춰 늘림
+        self.tracker = KeyframeTracker(
+            PersonTracker(
+                high_conf=app.config['YOLO_CONF'],
+                low_conf=app.config['TRACK_LOW_CONF'],
+                max_age=max(app.config['TRACK_MAX_AGE'], 2.5 / sample_fps),
+            ),
+            keyframe_interval=app.config['TRACK_KEYFRAME_INTERVAL'],
+        )
+        self.motion_gate = motion_gate_for(app, cctv_id)
+        self.last_levels = None
+        self.last_logged_at = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def settings(self):
+        # 바뀌면 파이프라인을 다시 만들어야 하는 CCTV 설정
+        return self.source, self.region, self.calibration
+
+    def start(self):
+        if self.running:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name=f"pipeline-{self.cctv_id}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _should_log(self, levels, now):
+        if levels != self.last_levels:
+            return True
+        return self.last_logged_at is None or now - self.last_logged_at >= self.heartbeat
+
+    def _run(self):
+        interval = 1.0 / self.sample_fps
+        capture = get_capture_pool().get(self.cctv_id, self.source)
+        scheduler = get_scheduler()
+        seq = 0
+        while not self._stopped.is_set():
+            started = time.monotonic()
+            try:
+                # 샘플링 주기가 길고 추론·쓰러짐 판단·스냅샷까지 프레임을 오래 들고 있으므로
+                # 링 슬롯의 뷰 대신 복사본을 받아 작성자가 슬롯을 덮어써도 찢어지지 않게 함
+                seq, frame = capture.read(after_seq=seq)
+                if frame is not None:
+                    infer = lambda f, imgsz=None: scheduler.infer(self.cctv_id, f, timeout=10, imgsz=imgsz)
+                    # ROI 가 있으면 잘라낸 영역만 축소해 추론하고 박스는 원본 좌표로 복원
+                    detect = DetectTimer(self.region.wrap(infer) if self.region else infer, self.cctv_id)
+                    processing = time.perf_counter()
+                    self.process(frame, detect)
+                    # 탐지(배치 대기 포함)를 뺀 추적·판단·기록 시간
+                    observe_stage("postprocess", self.cctv_id, time.perf_counter() - processing - detect.elapsed)
+            except Exception as e:
+                self.app.logger.error(f"CCTV {self.cctv_id} 탐지 파이프라인 오류: {e}")
+            seq = self._confirm_until(capture, seq, started + interval)
+            self._stopped.wait(max(0.0, interval - (time.monotonic() - started)))
+
+    def _confirm_until(self, capture, seq, deadline):
+        # 누운 것으로 보인 사람이 있으면 다음 샘플까지 그 사람만 FALL_CONFIRM_FPS 로 포즈를 다시 확인
+        # (판단이 샘플 간격에 묶이지 않도록. 탐지기는 돌리지 않고 추적기가 외삽한 박스를 씀)
+        if self.fall_detector is None or self.fall_confirm_interval is None:
+            return seq
+        while time.monotonic() + self.fall_confirm_interval < deadline and self.fall_detector.flagged():
+            if self._stopped.wait(self.fall_confirm_interval):
+                break
+            try:
+                seq, frame = capture.read(after_seq=seq)
+                if frame is not None:
+                    self.confirm_falls(frame)
+            except Exception as e:
+                self.app.logger.error(f"CCTV {self.cctv_id} 쓰러짐 확인 오류: {e}")
+                break
+        return seq
+
+    def confirm_falls(self, frame, now=None):
+        flagged = self.fall_detector.flagged()
+        ids, boxes, _ = self.tracker.tracker.predict(now)
+        keep = np.isin(ids, list(flagged))
+        if not keep.any():
+            return []
+        self.fall_confirms += 1
+        boxes = boxes[keep]
+        fallen = self.fall_detector.update(frame, boxes, now=now, track_ids=ids[keep])
+        for index in fallen:
+            self.log_fall(frame, boxes[index])
+        return fallen
+
+    def process(self, frame, detect):
+        self.samples += 1
+        # 움직임이 없는 샘플은 탐지를 건너뛰고 마지막 결과를 재사용
+        detected = self.motion_gate is None or self.motion_gate.should_detect(frame)
+        if detected:
+            summary, keyframe = self.tracker.step(frame, detect, summarize_detections)
+            # 키프레임 사이는 트랙 외삽 박스이므로 쓰러짐 판단은 실제 탐지한 프레임에서만
+            detected = keyframe
+            self.last_count = self.tracker.tracker.active_count
+            if self.motion_gate is not None:
+                self.motion_gate.remember(summary)
+        else:
+            summary = self.motion_gate.last_summary
+        # 인원 수는 프레임별 탐지 수 대신 추적 중인 사람 수 기준 (깜빡임 방지)
+        if self.density is not None:
+            self.last_density = self.density.evaluate(summary, frame.shape)
+        fields = detection_log_fields(summary, count=self.last_count, density=self.last_density)
+        levels = (fields["density_level"], fields["overcrowding_level"])
+
+        # 탐지기가 찾은 사람 박스를 그대로 재사용해 쓰러짐 판단
+        if self.fall_detector is not None and detected:
+            for index in self.fall_detector.update(frame, summary.boxes, track_ids=summary.track_ids):
+                self.log_fall(frame, summary.boxes[index])
+
+        now = time.monotonic()
+        if not self._should_log(levels, now):
+            return None
+
+        # 추적 단계에서 다시 쓰일 수 있으므로 스냅샷은 복사본에 그려 저장 대기열에 넘김
+        snapshot = draw_detections(frame.copy(), summary)
+        writer = get_snapshot_writer()
+        try:
+            file_name = writer.save(snapshot, snapshot_name(self.location, self.cctv_id))
+        except SnapshotQueueFull as e:
+            # 이번 샘플은 건너뛰고 다음 샘플에서 다시 기록 시도
+            self.app.logger.warning(f"CCTV {self.cctv_id} 스냅샷 저장 지연: {e}")
+            return None
+
+        # DB 기록은 LogSink 가 모아서 일괄 INSERT
+        log = dict(cctv_id=self.cctv_pk, image_url=writer.url_for(file_name), **fields)
+        if not get_log_sink().add(DetectionLog, **log):
+            self.app.logger.warning(f"CCTV {self.cctv_id} 로그 대기열이 가득 차 기록을 건너뜁니다.")
+            return None
+
+        self.last_levels = levels
+        self.last_logged_at = now
+        self.logs_written += 1
+        detection_logger.info(
+            f"{self.cctv_id} ({self.location}) 인원 {fields['object_count']}명, "
+            f"밀집 정도 {fields['density_level']}, 과밀 수준 {fields['overcrowding_level']}"
+        )
+        return log
+
+    def log_fall(self, frame, box):
+        # 쓰러진 사람을 빨간 박스로 표시한 스냅샷 (원본 프레임은 이후 단계에서 계속 사용)
+        import cv2
+        snapshot = frame.copy()
+        x1, y1, x2, y2 = box.astype(int).tolist()
+        cv2.rectangle(snapshot, (x1, y1), (x2, y2), (0, 0, 255), 3)
+        writer = get_snapshot_writer()
+        try:
+            file_name = writer.save(snapshot, snapshot_name(f"{self.location}_fall", self.cctv_id))
+        except SnapshotQueueFull as e:
+            self.app.logger.warning(f"CCTV {self.cctv_id} 쓰러짐 스냅샷 저장 지연: {e}")
+            file_name = None
+
+        get_log_sink().add(
+            AbnormalBehaviorLog,
+            cctv_id=self.cctv_pk,
+            image_url=writer.url_for(file_name) if file_name else "",
+            fall_status="쓰러짐",
+        )
+        self.falls_logged += 1
+        detection_logger.warning(f"{self.cctv_id} ({self.location}) 쓰러짐 감지")
+
+    def stats(self):
+        return {
+            "cctv_id": self.cctv_id,
+            "running": self.running,
+            "samples": self.samples,
+            "logs_written": self.logs_written,
+            "falls_logged": self.falls_logged,
+            "fall_confirms": self.fall_confirms,
+            "tracked_people": self.tracker.tracker.active_count,
+            "motion_gate": self.motion_gate.stats() if self.motion_gate else None,
+            "roi": format_roi(self.region.roi) if self.region else None,
+            "inference_size": self.region.size if self.region else None,
+            "zones": self.last_density.to_dict() if self.last_density else None,
+            "max_dwell_seconds": round(max(self.tracker.tracker.dwell_times().values(), default=0.0), 1),
+            "last_levels": list(self.last_levels) if self.last_levels else None,
+        }
+
+
+class DetectionPipeline:
+    """등록된 CCTV 목록을 주기적으로 확인해 카메라별 CameraPipeline 을 시작/중지합니다."""
+
+    def __init__(self, app, sample_fps=1.0, heartbeat=60.0, refresh_interval=30.0):
+        self.app = app
+        self.sample_fps = sample_fps
+        self.heartbeat = heartbeat
+        self.refresh_interval = refresh_interval
+        self._cameras = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="detection-pipeline", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+        with self._lock:
+            cameras = list(self._cameras.values())
+            self._cameras.clear()
+        for camera in cameras:
+            camera.stop()
+
+    def sync(self):
+        with self.app.app_context():
+            cctvs = {
+                cctv.cctv_id: (cctv.id, cctv.location, get_capture_source(cctv), InferenceRegion.from_cctv(cctv), cctv.calibration)
+                for cctv in CCTV.query.all()
+            }
+        with self._lock:
+            # 삭제되었거나 소스·추론 영역·밀도 보정이 바뀐 카메라는 다시 시작
+            removed = [
+                self._cameras.pop(cctv_id) for cctv_id in list(self._cameras)
+                if cctv_id not in cctvs or self._cameras[cctv_id].settings != cctvs[cctv_id][2:]
+            ]
+            for cctv_id, (pk, location, source, region, calibration) in cctvs.items():
+                if cctv_id not in self._cameras:
+                    self._cameras[cctv_id] = CameraPipeline(
+                        self.app, pk, cctv_id, location, source, sample_fps=self.sample_fps, heartbeat=self.heartbeat,
+                        region=region, calibration=calibration,
+                    )
+                self._cameras[cctv_id].start()
+        for camera in removed:
+            camera.stop()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.sync()
+            except Exception as e:
+                self.app.logger.error(f"탐지 파이프라인 CCTV 목록 갱신 오류: {e}")
+            self._stopped.wait(self.refresh_interval)
+
+    def stats(self):
+        with self._lock:
+            cameras = list(self._cameras.values())
+        return [camera.stats() for camera in cameras]
+
+
+_pipeline = None
+
+
+def get_pipeline():
+    return _pipeline
+
+
+def init_pipeline(app):
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = DetectionPipeline(
+            app,
+            sample_fps=app.config['PIPELINE_SAMPLE_FPS'],
+            heartbeat=app.config['PIPELINE_HEARTBEAT'],
+            refresh_interval=app.config['PIPELINE_REFRESH'],
+        )
+        _pipeline.start()
+    return _pipeline
@@ -0,0 +1,142 @@
+import os
+import threading
+import time
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+
+class CCTVRecord(NamedTuple):
+    """요청 사이에 공유하는 CCTV 행의 읽기 전용 사본 (세션에서 분리되어도 안전)."""
+    id: int
+    cctv_id: str
+    location: str
+    registration_date: Optional[datetime]
+    last_access: Optional[datetime]
+    source: Optional[str]
+    roi: Optional[str]
+    inference_size: Optional[int]
+    calibration: Optional[str]
+
+    @classmethod
+    def from_model(cls, cctv):
+        return cls(cctv.id, cctv.cctv_id, cctv.location, cctv.registration_date, cctv.current_last_access(),
+                   cctv.source, cctv.roi, cctv.inference_size, cctv.calibration)
+
+
+class CCTVRegistry:
+    """CCTV 목록을 메모리에 두고 ttl 동안 DB 조회 없이 제공하는 캐시.
+
+    등록/수정/삭제 시 invalidate() 로 즉시 비우고, stamp_path 를 주면 그 파일을 세대 표시로 써서
+    같은 서버의 다른 워커 프로세스도 다음 요청에서 다시 읽습니다 (요청마다 stat 한 번).
+    목록으로 그린 HTML 조각(fragment)도 같은 세대 동안 재사용합니다. 조각에는 자주 바뀌는 최근 접근 시간을
+    넣지 않으므로 touch() 는 조각을 버리지 않습니다.
+    """
+
+    def __init__(self, app, ttl=30.0, stamp_path=None):
+        self.app = app
+        self.ttl = ttl
+        self.stamp_path = stamp_path
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self._records = ()
+        self._by_id = {}
+        self._fragments = {}
+        self._loaded_at = None
+        self._stamp = None
+        self._lock = threading.Lock()
+
+    def _read_stamp(self):
+        if not self.stamp_path:
+            return None
+        try:
+            stat = os.stat(self.stamp_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _load(self):
+        from .models import CCTV
+        with self.app.app_context():
+            records = tuple(CCTVRecord.from_model(cctv) for cctv in CCTV.query.order_by(CCTV.id).all())
+        self._records = records
+        self._by_id = {record.cctv_id: record for record in records}
+        self._fragments = {}
+        self.reloads += 1
+
+    def _fresh(self):
+        # 만료되었거나 다른 프로세스가 무효화했으면 다시 읽음
+        stamp = self._read_stamp()
+        with self._lock:
+            now = time.monotonic()
+            if self._loaded_at is not None and now - self._loaded_at < self.ttl and stamp == self._stamp:
+                self.hits += 1
+                return self
+            self.misses += 1
+            self._load()
+            self._loaded_at = now
+            self._stamp = stamp
+        return self
+
+    def all(self):
+        return list(self._fresh()._records)
+
+    def get(self, cctv_id):
+        return self._fresh()._by_id.get(cctv_id)
+
+    def fragment(self, key, render):
+        """render() 로 그린 HTML 조각을 CCTV 목록이 바뀌기 전까지 재사용합니다."""
+        self._fresh()
+        html = self._fragments.get(key)
+        if html is None:
+            html = self._fragments[key] = render()
+        return html
+
+    def touch(self, cctv_id, last_access):
+        # 최근 접근 시간만 바뀐 경우 전체를 다시 읽지 않고 해당 행만 갱신 (그린 조각은 그대로 재사용)
+        with self._lock:
+            record = self._by_id.get(cctv_id)
+            if record is None:
+                return
+            record = record._replace(last_access=last_access)
+            self._by_id[cctv_id] = record
+            self._records = tuple(record if r.cctv_id == cctv_id else r for r in self._records)
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+            self._fragments = {}
+        if self.stamp_path:
+            # 새 파일로 교체해 다른 프로세스가 stat 으로 변경을 알아차리게 함
+            tmp_path = f"{self.stamp_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(str(time.time_ns()))
+            os.replace(tmp_path, self.stamp_path)
+
+    def stats(self):
+        return {
+            "cctvs": len(self._records),
+            "ttl": self.ttl,
+            "shared": bool(self.stamp_path),
+            "hits": self.hits,
+            "misses": self.misses,
+            "reloads": self.reloads,
+            "fragments": len(self._fragments),
+        }
+
+
+_registry = None
+
+
+def get_registry():
+    return _registry
+
+
+def init_registry(app):
+    global _registry
+    if _registry is None:
+        stamp_path = app.config['CCTV_CACHE_STAMP']
+        if stamp_path:
+            os.makedirs(os.path.dirname(os.path.abspath(stamp_path)), exist_ok=True)
+        _registry = CCTVRegistry(app, ttl=app.config['CCTV_CACHE_TTL'], stamp_path=stamp_path)
+    return _registry
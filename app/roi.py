@@ -0,0 +1,92 @@
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+# YOLO 입력 크기는 stride(32) 의 배수여야 함
+STRIDE = 32
+MIN_INFERENCE_SIZE = 160
+
+
+def parse_roi(value):
+    """"x1,y1,x2,y2" (프레임 대비 0~1 비율) 문자열을 튜플로 변환합니다. 비어 있으면 None."""
+    if not value or not value.strip():
+        return None
+    try:
+        x1, y1, x2, y2 = (float(v) for v in value.split(","))
+    except ValueError:
+        raise ValueError(f"ROI 형식이 올바르지 않습니다 (x1,y1,x2,y2): {value}")
+    if not (0.0 <= x1 < x2 <= 1.0 and 0.0 <= y1 < y2 <= 1.0):
+        raise ValueError(f"ROI 좌표는 0~1 사이이고 x1 < x2, y1 < y2 여야 합니다: {value}")
+    return x1, y1, x2, y2
+
+
+def format_roi(roi):
+    return ",".join(f"{v:g}" for v in roi) if roi else None
+
+
+def parse_inference_size(value):
+    """추론 입력 크기 문자열을 32 의 배수 정수로 변환합니다. 비어 있으면 None (기본 YOLO_IMGSZ 사용)."""
+    if value is None or str(value).strip() == "":
+        return None
+    size = int(value)
+    if size < MIN_INFERENCE_SIZE:
+        raise ValueError(f"추론 크기는 {MIN_INFERENCE_SIZE} 이상이어야 합니다: {size}")
+    return round(size / STRIDE) * STRIDE
+
+
+class InferenceRegion(NamedTuple):
+    """카메라별 추론 영역(ROI)과 입력 크기.
+
+    탐지 전에 프레임을 ROI 로 자르고 긴 변이 size 가 되도록 줄여 추론한 뒤,
+    박스를 원본 프레임 좌표로 되돌려 오버레이·인원 수 계산은 그대로 동작합니다.
+    """
+
+    roi: Optional[Tuple[float, float, float, float]] = None
+    size: Optional[int] = None
+
+    @classmethod
+    def from_cctv(cctv_cls, cctv):
+        # ROI 도 크기도 없으면 None (전체 프레임을 기본 크기로 추론)
+        region = cctv_cls(parse_roi(cctv.roi), cctv.inference_size or None)
+        return region if region.roi or region.size else None
+
+    def crop_box(self, shape):
+        height, width = shape[:2]
+        if self.roi is None:
+            return 0, 0, width, height
+        x1, y1, x2, y2 = self.roi
+        left, top = int(x1 * width), int(y1 * height)
+        # 아주 작은 ROI 도 최소 1픽셀은 남김
+        return left, top, max(left + 1, round(x2 * width)), max(top + 1, round(y2 * height))
+
+    def prepare(self, frame):
+        """(추론할 이미지, 배율, (x0, y0)) 를 반환합니다. 잘라낸 영역은 원본 프레임의 뷰라 복사하지 않습니다."""
+        x0, y0, x1, y1 = self.crop_box(frame.shape)
+        crop = frame[y0:y1, x0:x1]
+        longest = max(crop.shape[:2])
+        if self.size is None or longest <= self.size:
+            return crop, 1.0, (x0, y0)
+        import cv2
+        ratio = self.size / longest
+        resized = cv2.resize(crop, (max(1, round(crop.shape[1] * ratio)), max(1, round(crop.shape[0] * ratio))),
+                             interpolation=cv2.INTER_AREA)
+        return resized, ratio, (x0, y0)
+
+    def restore(self, detections, ratio, offset):
+        # 축소·자르기 전 원본 프레임 좌표로 변환
+        if not len(detections):
+            return detections
+        detections = np.array(detections, dtype=np.float32)
+        if ratio != 1.0:
+            detections[:, :4] /= ratio
+        detections[:, :4] += [offset[0], offset[1], offset[0], offset[1]]
+        return detections
+
+    def wrap(self, detect):
+        """detect(image, imgsz=...) 를 ROI 자르기·축소와 좌표 복원을 포함하는 detect(frame) 로 감쌉니다."""
+
+        def detect_region(frame):
+            image, ratio, offset = self.prepare(frame)
+            return self.restore(detect(image, imgsz=self.size), ratio, offset)
+
+        return detect_region
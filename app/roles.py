@@ -0,0 +1,639 @@
+import argparse
+import itertools
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future
+from multiprocessing.managers import BaseManager, DictProxy
+
+from .frame_ring import FrameRing
+
+# create_app(role=...) 에서 사용할 수 있는 역할
+# DB 기록은 별도 logger 역할 없이 capture 역할의 LogSink 가 일괄 INSERT 합니다. 탐지 로그를 만드는 곳이 capture
+# 역할뿐이라 큐 서버를 한 번 더 거치면 레코드마다 피클링과 왕복만 늘어납니다 (web 역할의 수동 기록은 자체 LogSink).
+ROLES = ("all", "web", "capture", "inference")
+
+logger = logging.getLogger(__name__)
+
+
+class RoleBroker(BaseManager):
+    """역할 프로세스들이 공유하는 로컬 큐 서버에 대한 클라이언트.
+
+    - inference_requests: (reply_key, request_id, ring_name, seq, imgsz, boxes) 추론 요청
+      (boxes 가 있으면 그 박스 영역의 포즈 추정 요청)
+    - reply_queue(key): 요청한 프로세스별 응답 큐 (request_id, detections 또는 keypoints, error)
+    - rings: cctv_id → 캡쳐 역할이 프레임을 쓰는 FrameRing 이름
+    - events: 캡쳐 역할에서 발행한 이벤트를 웹 역할로 중계
+    프레임 자체는 공유 메모리(FrameRing)에 있고 큐에는 링 이름과 seq 만 오갑니다.
+    """
+
+
+RoleBroker.register("inference_requests")
+RoleBroker.register("reply_queue")
+RoleBroker.register("rings", proxytype=DictProxy)
+RoleBroker.register("events")
+
+
+def parse_address(value):
+    # "host:port" 는 TCP, 그 외는 유닉스 소켓 경로
+    host, sep, port = value.rpartition(":")
+    if sep and port.isdigit():
+        return host or "127.0.0.1", int(port)
+    return value
+
+
+def require_authkey(authkey):
+    # 빈 키로 큐 서버를 열면 접속할 수 있는 누구나 추론 요청과 프레임 링 이름을 주고받을 수 있음
+    if not authkey:
+        raise RuntimeError("ROLE_BROKER_AUTHKEY (or SECRET_KEY) must be set to run separate roles. Check your .env file.")
+    return authkey
+
+
+def serve_broker(address, authkey, event_queue_size=1000):
+    """큐 서버를 실행합니다 (반환하지 않음)."""
+    require_authkey(authkey)
+    requests = queue.Queue()
+    replies = {}
+    replies_lock = threading.Lock()
+    rings = {}
+    events = queue.Queue(maxsize=event_queue_size)
+
+    def reply_queue(key):
+        with replies_lock:
+            return replies.setdefault(key, queue.Queue())
+
+    class _Server(RoleBroker):
+        pass
+
+    _Server.register("inference_requests", callable=lambda: requests)
+    _Server.register("reply_queue", callable=reply_queue)
+    _Server.register("rings", callable=lambda: rings, proxytype=DictProxy)
+    _Server.register("events", callable=lambda: events)
+    _Server(address=parse_address(address), authkey=authkey.encode()).get_server().serve_forever()
+
+
+class BrokerClient:
+    """처음 사용할 때 큐 서버에 연결하고, 서버가 아직 뜨지 않았으면 connect_timeout 동안 재시도합니다."""
+
+    def __init__(self, address, authkey, connect_timeout=30.0):
+        self.address = address
+        self.authkey = require_authkey(authkey)
+        self.connect_timeout = connect_timeout
+        self._manager = None
+        self._lock = threading.Lock()
+
+    def manager(self):
+        if self._manager is None:
+            with self._lock:
+                if self._manager is None:
+                    deadline = time.monotonic() + self.connect_timeout
+                    while True:
+                        manager = RoleBroker(address=parse_address(self.address), authkey=self.authkey.encode())
+                        try:
+                            manager.connect()
+                            break
+                        except (ConnectionError, OSError):
+                            if time.monotonic() > deadline:
+                                raise ConnectionError(f"역할 큐 서버에 연결할 수 없습니다: {self.address}")
+                            time.sleep(0.5)
+                    self._manager = manager
+        return self._manager
+
+    def reset(self):
+        # 큐 서버가 재시작되었을 때 다음 호출에서 새로 연결하도록 버림
+        with self._lock:
+            self._manager = None
+
+    def inference_requests(self):
+        return self.manager().inference_requests()
+
+    def reply_queue(self, key):
+        return self.manager().reply_queue(key)
+
+    def rings(self):
+        return self.manager().rings()
+
+    def events(self):
+        return self.manager().events()
+
+
+class RemoteEngine:
+    """추론 역할 프로세스에 탐지를 맡기는 InferenceEngine 대용 (web / capture 역할).
+
+    프레임은 이 프로세스의 FrameRing 에 한 번 복사되고, 요청에는 링 이름과 seq 만 담깁니다.
+    링 슬롯 수보다 많은 요청이 동시에 밀리면 오래된 프레임이 덮어써져 해당 요청은 오류가 됩니다.
+    """
+
+    backend_name = "remote"
+    model = None
+
+    def __init__(self, broker, imgsz=640, conf=0.5, max_frame_shape=(1080, 1920, 3), ring_slots=16,
+                 timeout=10.0, latency_window=1000):
+        self.broker = broker
+        self.imgsz = imgsz
+        self.conf = conf
+        self.max_frame_shape = max_frame_shape
+        self.ring_slots = ring_slots
+        self.timeout = timeout
+        self.call_count = 0
+        self.reconnects = 0
+        self._reply_key = uuid.uuid4().hex
+        self._ring = None
+        self._requests = None
+        self._pending = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=latency_window)
+
+    def load(self):
+        if self._ring is None:
+            with self._lock:
+                if self._ring is None:
+                    replies = self._connect()
+                    threading.Thread(target=self._collect, args=(replies,), name="remote-inference", daemon=True).start()
+                    self._ring = FrameRing(self.ring_slots, self.max_frame_shape)
+        return self
+
+    def warmup(self, runs=1):
+        pass
+
+    def _connect(self):
+        # 요청 큐와 이 프로세스의 응답 큐 프록시를 만듦 (큐 서버가 재시작되면 다시 호출)
+        self._requests = self.broker.inference_requests()
+        return self.broker.reply_queue(self._reply_key)
+
+    def _reconnect(self):
+        while True:
+            self.broker.reset()
+            try:
+                with self._lock:
+                    return self._connect()
+            except Exception:
+                time.sleep(1.0)
+
+    def _fail_pending(self, reason):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(RuntimeError(f"원격 추론 오류: {reason}"))
+
+    def _collect(self, replies):
+        while True:
+            try:
+                request_id, detections, error = replies.get()
+            except (EOFError, OSError) as e:
+                # 큐 서버가 재시작되면 보낸 요청의 응답은 오지 않으므로 실패시키고 다시 연결
+                self.reconnects += 1
+                self._fail_pending(f"큐 서버 연결이 끊겼습니다 ({e!r})")
+                replies = self._reconnect()
+                continue
+            with self._lock:
+                future = self._pending.pop(request_id, None)
+            if future is None:
+                continue
+            if error:
+                future.set_exception(RuntimeError(f"원격 추론 오류: {error}"))
+            else:
+                future.set_result(detections)
+
+    def submit(self, frame, imgsz=None, boxes=None):
+        self.load()
+        future = Future()
+        with self._lock:
+            # FrameRing 은 작성자가 하나라는 전제이므로 쓰기는 잠금 안에서
+            seq = self._ring.write(frame)
+            request_id = next(self._ids)
+            self._pending[request_id] = future
+            requests = self._requests
+        try:
+            requests.put((self._reply_key, request_id, self._ring.name, seq, imgsz, boxes))
+        except Exception:
+            # 연결이 끊긴 경우 응답이 오지 않으므로 대기 목록에서 빼고 호출자에게 오류 전달
+            with self._lock:
+                self._pending.pop(request_id, None)
+            raise
+        return future
+
+    def predict(self, frame, record=True, imgsz=None):
+        start = time.perf_counter()
+        detections = self.submit(frame, imgsz=imgsz).result(timeout=self.timeout)
+        if record:
+            self.call_count += 1
+            self._latencies.append(time.perf_counter() - start)
+        return detections
+
+    def predict_batch(self, frames, imgsz=None):
+        start = time.perf_counter()
+        futures = [self.submit(frame, imgsz=imgsz) for frame in frames]
+        results = [future.result(timeout=self.timeout) for future in futures]
+        self.call_count += 1
+        self._latencies.append(time.perf_counter() - start)
+        return results
+
+    def predict_pose(self, frame, boxes, imgsz=None):
+        # 포즈 추정도 추론 역할 프로세스에서 실행 (이 프로세스는 포즈 모델을 로드하지 않음)
+        return self.submit(frame, imgsz=imgsz, boxes=boxes).result(timeout=self.timeout)
+
+    def stats(self):
+        latencies = sorted(self._latencies)
+        stats = {
+            "backend": self.backend_name,
+            "broker": self.broker.address,
+            "calls": self.call_count,
+            "pending": len(self._pending),
+            "reconnects": self.reconnects,
+        }
+        if latencies:
+            stats["latency_ms"] = {
+                "avg": round(sum(latencies) / len(latencies) * 1000, 2),
+                "p50": round(latencies[len(latencies) // 2] * 1000, 2),
+                "p99": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 2),
+                "max": round(latencies[-1] * 1000, 2),
+            }
+        return stats
+
+
+class InferenceServer:
+    """추론 역할: 큐에서 요청을 모아 한 번에 추론하고 요청한 프로세스의 응답 큐로 돌려줍니다.
+
+    큐 서버가 재시작되면 backoff 간격을 늘려 가며 다시 연결합니다. 요청한 프로세스가 종료되었거나 카메라가 닫혀
+    cache_ttl 동안 쓰이지 않은 링과 응답 큐 프록시는 놓습니다.
+    """
+
+    def __init__(self, engine, broker, max_batch_size=16, backoff_min=0.5, backoff_max=10.0, cache_ttl=60.0):
+        self.engine = engine
+        self.broker = broker
+        self.max_batch_size = max_batch_size
+        self.backoff_min = backoff_min
+        self.backoff_max = backoff_max
+        self.cache_ttl = cache_ttl
+        self.reconnects = 0
+        # 링 이름 / 응답 키 -> [링 또는 응답 큐 프록시, 마지막 사용 시각]
+        self._rings = {}
+        self._replies = {}
+
+    def _ring(self, name):
+        """요청한 프로세스의 링에 붙습니다. 그 프로세스가 종료되어 링이 지워졌으면 None."""
+        entry = self._rings.get(name)
+        if entry is None:
+            try:
+                entry = self._rings[name] = [FrameRing.attach(name), 0.0]
+            except FileNotFoundError:
+                return None
+        entry[1] = time.monotonic()
+        return entry[0]
+
+    def _read(self, ring_name, seq):
+        ring = self._ring(ring_name)
+        return ring.read(seq) if ring is not None else None
+
+    def _valid(self, ring_name, seq):
+        ring = self._ring(ring_name)
+        return ring is not None and ring.valid(seq)
+
+    def _reply(self, key, message):
+        entry = self._replies.get(key)
+        if entry is None:
+            entry = self._replies[key] = [self.broker.reply_queue(key), 0.0]
+        entry[1] = time.monotonic()
+        entry[0].put(message)
+
+    def _evict(self, now):
+        # 배치 사이에만 호출하므로 놓는 링의 뷰를 들고 있는 곳은 없음 (다시 요청이 오면 새로 붙음)
+        for name, (ring, used) in list(self._rings.items()):
+            if now - used > self.cache_ttl:
+                del self._rings[name]
+                ring.close()
+        for key, (_, used) in list(self._replies.items()):
+            if now - used > self.cache_ttl:
+                del self._replies[key]
+
+    def serve_forever(self):
+        backoff = self.backoff_min
+        while True:
+            try:
+                requests = self.broker.inference_requests()
+                backoff = self.backoff_min
+                self._serve(requests)
+            except (EOFError, OSError) as e:
+                # 큐 서버가 재시작됨: 이전 연결의 프록시는 쓸 수 없으므로 버리고 다시 연결
+                self.reconnects += 1
+                logger.warning(f"역할 큐 서버 연결이 끊겼습니다. {backoff:.1f}초 후 다시 연결합니다: {e!r}")
+                self.broker.reset()
+                self._replies.clear()
+                time.sleep(backoff)
+                backoff = min(backoff * 2, self.backoff_max)
+
+    def _take(self, requests):
+        # 대기 중인 요청을 max_batch_size 까지 모음. 한동안 요청이 없으면 빈 배치 (그 사이 캐시 정리)
+        try:
+            batch = [requests.get(timeout=1.0)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(requests.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _serve(self, requests):
+        evicted_at = time.monotonic()
+        while True:
+            batch = self._take(requests)
+            if batch:
+                try:
+                    self.serve_batch(batch)
+                except (EOFError, OSError):
+                    raise
+                except Exception:
+                    # 예상하지 못한 오류도 이 배치만 버리고 계속 (요청한 쪽은 시간 초과로 실패)
+                    logger.exception(f"추론 요청 배치 처리 오류 ({len(batch)}건)")
+            now = time.monotonic()
+            if now - evicted_at >= min(self.cache_ttl, 10.0):
+                self._evict(now)
+                evicted_at = now
+
+    def serve_batch(self, batch):
+        # 카메라별 입력 크기(imgsz)가 같은 요청끼리 묶어 배치 추론
+        groups = {}
+        for reply_key, request_id, ring_name, seq, imgsz, boxes in batch:
+            frame = self._read(ring_name, seq)
+            if frame is None:
+                self._reply(reply_key, (request_id, None, "프레임이 이미 덮어써졌습니다"))
+                continue
+            if boxes is not None:
+                self._serve_pose(reply_key, request_id, ring_name, seq, frame, boxes, imgsz)
+                continue
+            ready, frames = groups.setdefault(imgsz, ([], []))
+            ready.append((reply_key, request_id, ring_name, seq))
+            frames.append(frame)
+        for imgsz, (ready, frames) in groups.items():
+            self._serve_group(ready, frames, imgsz)
+
+    def stats(self):
+        return {"reconnects": self.reconnects, "rings": len(self._rings), "replies": len(self._replies)}
+
+    def _serve_group(self, ready, frames, imgsz):
+        try:
+            results = self.engine.predict_batch(frames, imgsz=imgsz)
+        except Exception as e:
+            for reply_key, request_id, _, _ in ready:
+                self._reply(reply_key, (request_id, None, repr(e)))
+            return
+        for (reply_key, request_id, ring_name, seq), detections in zip(ready, results):
+            # 추론 도중 슬롯이 재사용되었다면 결과를 신뢰할 수 없음
+            if not self._valid(ring_name, seq):
+                self._reply(reply_key, (request_id, None, "추론 중 프레임이 덮어써졌습니다"))
+            else:
+                self._reply(reply_key, (request_id, detections, None))
+
+    def _serve_pose(self, reply_key, request_id, ring_name, seq, frame, boxes, imgsz):
+        try:
+            keypoints = self.engine.predict_pose(frame, boxes, imgsz=imgsz)
+        except Exception as e:
+            self._reply(reply_key, (request_id, None, repr(e)))
+            return
+        if not self._valid(ring_name, seq):
+            self._reply(reply_key, (request_id, None, "추론 중 프레임이 덮어써졌습니다"))
+        else:
+            self._reply(reply_key, (request_id, keypoints, None))
+
+
+class RemoteCapture:
+    """캡쳐 역할 프로세스의 FrameRing 을 읽는 CameraCapture 대용 (web 역할)."""
+
+    def __init__(self, cctv_id, broker, refresh_interval=1.0, attach_retries=3):
+        self.cctv_id = cctv_id
+        self.broker = broker
+        self.refresh_interval = refresh_interval
+        self.attach_retries = attach_retries
+        self.ring = None
+        self.connected = False
+        self._ring_name = None
+        self._checked_at = 0.0
+
+    def _refresh(self):
+        # 링 이름 조회는 큐 서버 왕복이므로 refresh_interval 마다만 확인
+        now = time.monotonic()
+        if self.ring is not None and now - self._checked_at < self.refresh_interval:
+            return False
+        self._checked_at = now
+        for _ in range(self.attach_retries):
+            name = self.broker.rings().get(self.cctv_id)
+            if name == self._ring_name:
+                return False
+            try:
+                ring = FrameRing.attach(name) if name else None
+            except FileNotFoundError:
+                # 이름을 조회한 사이 캡쳐 역할이 링을 교체/삭제함: 이름을 다시 조회
+                continue
+            self.ring = ring
+            self._ring_name = name
+            return True
+        # 계속 실패하면 지금 링을 유지하고 다음 read 에서 다시 확인
+        self._checked_at = 0.0
+        return False
+
+    def read(self, after_seq=0, timeout=2.0, copy=True):
+        deadline = time.monotonic() + timeout
+        while True:
+            if self._refresh():
+                # 링이 새로 만들어지면 seq 가 처음부터 다시 시작
+                after_seq = 0
+            if self.ring is not None:
+                seq, frame = self.ring.latest(after_seq)
+                if frame is not None:
+                    self.connected = True
+                    if copy:
+                        return seq, frame.copy()
+                    frame.flags.writeable = False
+                    return seq, frame
+            if time.monotonic() >= deadline:
+                self.connected = self.ring is not None
+                return after_seq, None
+            time.sleep(0.005)
+
+    def valid(self, seq):
+        ring = self.ring
+        return ring is not None and ring.valid(seq)
+
+    def stats(self):
+        return {
+            "cctv_id": self.cctv_id,
+            "remote": True,
+            "ring": self._ring_name,
+            "connected": self.connected,
+            "frames": self.ring.seq if self.ring is not None else 0,
+        }
+
+
+class RemoteCapturePool:
+    """CapturePool 과 같은 인터페이스로 캡쳐 역할이 공개한 카메라를 읽습니다 (장치를 직접 열지 않음)."""
+
+    def __init__(self, broker):
+        self.broker = broker
+        self._captures = {}
+        self._lock = threading.Lock()
+
+    def get(self, cctv_id, source=None):
+        with self._lock:
+            capture = self._captures.get(cctv_id)
+            if capture is None:
+                capture = self._captures[cctv_id] = RemoteCapture(cctv_id, self.broker)
+        return capture
+
+    def read(self, cctv_id, source=None, after_seq=0, timeout=2.0, copy=True):
+        return self.get(cctv_id, source).read(after_seq=after_seq, timeout=timeout, copy=copy)
+
+    def release(self, cctv_id):
+        with self._lock:
+            self._captures.pop(cctv_id, None)
+
+    def close_all(self):
+        with self._lock:
+            self._captures.clear()
+
+    def stats(self):
+        with self._lock:
+            captures = list(self._captures.values())
+        return [capture.stats() for capture in captures]
+
+
+def forward_events(bus, broker):
+    """캡쳐 역할: 로컬 EventBus 에 발행된 이벤트를 큐 서버로 보냅니다 (가득 차거나 연결이 없으면 버림)."""
+    events = []
+
+    def forward(event_type, data):
+        try:
+            if not events:
+                events.append(broker.events())
+            events[0].put_nowait((event_type, data))
+        except Exception:
+            events.clear()
+    bus.add_listener(forward)
+
+
+class RingPublisher:
+    """캡쳐 역할: 카메라별 FrameRing 이름을 큐 서버에 공개하는 CameraCapture.on_ring 콜백.
+
+    큐 서버가 재시작되면 공개한 이름이 사라지므로 interval 마다 살아 있는 링을 다시 공개합니다.
+    """
+
+    def __init__(self, broker, interval=5.0):
+        self.broker = broker
+        self.interval = interval
+        self.republished = 0
+        # cctv_id -> 이 프로세스의 살아 있는 링 이름
+        self._rings = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, cctv_id, ring_name):
+        # ring_name 이 None 이면 카메라가 닫혀 링이 지워진 것
+        with self._lock:
+            if ring_name is None:
+                self._rings.pop(cctv_id, None)
+            else:
+                self._rings[cctv_id] = ring_name
+        try:
+            rings = self.broker.rings()
+            if ring_name is None:
+                rings.pop(cctv_id, None)
+            else:
+                rings[cctv_id] = ring_name
+        except Exception:
+            # 큐 서버가 없으면 웹 역할에서 이 카메라를 잠시 볼 수 없을 뿐 캡쳐는 계속 (다음 주기에 다시 공개)
+            pass
+
+    def start(self):
+        threading.Thread(target=self._run, name="ring-publisher", daemon=True).start()
+        return self
+
+    def sync(self):
+        """큐 서버에 빠졌거나 다른 이름으로 남은 링을 다시 공개하고 그 수를 반환합니다."""
+        with self._lock:
+            live = dict(self._rings)
+        rings = self.broker.rings()
+        published = rings.copy()
+        missing = {cctv_id: name for cctv_id, name in live.items() if published.get(cctv_id) != name}
+        if missing:
+            rings.update(missing)
+            self.republished += len(missing)
+        return len(missing)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.sync()
+            except Exception:
+                # 연결이 끊겼으면 다음 주기에 새로 연결
+                self.broker.reset()
+
+
+def relay_events(bus, broker):
+    """웹 역할: 큐 서버의 이벤트를 로컬 EventBus 로 다시 발행하는 스레드를 시작합니다."""
+    def run():
+        while True:
+            try:
+                events = broker.events()
+                while True:
+                    event_type, data = events.get()
+                    bus.publish(event_type, data)
+            except Exception:
+                time.sleep(1.0)
+    thread = threading.Thread(target=run, name="event-relay", daemon=True)
+    thread.start()
+    return thread
+
+
+_broker = None
+
+
+def get_broker(app):
+    global _broker
+    if _broker is None:
+        _broker = BrokerClient(app.config['ROLE_BROKER_ADDRESS'], app.config['ROLE_BROKER_AUTHKEY'])
+    return _broker
+
+
+def _run_inference():
+    from app import create_app
+    app = create_app("inference")
+    InferenceServer(app.inference_engine, get_broker(app), max_batch_size=app.config['BATCH_MAX_SIZE']).serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="역할별 프로세스 실행 (웹 역할은 APP_ROLE=web 으로 flask/gunicorn 실행)")
+    parser.add_argument("role", choices=("broker", "capture", "inference"))
+    parser.add_argument("--processes", type=int, default=1, help="inference 역할 프로세스 수")
+    args = parser.parse_args(argv)
+
+    if args.role == "broker":
+        serve_broker(
+            os.getenv('ROLE_BROKER_ADDRESS', '127.0.0.1:50055'),
+            os.getenv('ROLE_BROKER_AUTHKEY') or os.getenv('SECRET_KEY') or '',
+        )
+    elif args.role == "capture":
+        from app import create_app
+        create_app("capture")
+        # 캡쳐/탐지 파이프라인은 데몬 스레드에서 동작하므로 메인 스레드는 대기만 함
+        threading.Event().wait()
+    elif args.processes > 1:
+        import multiprocessing
+        context = multiprocessing.get_context("spawn")
+        processes = [context.Process(target=_run_inference, name=f"inference-{i}") for i in range(args.processes)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+    else:
+        _run_inference()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import threading
+from datetime import timedelta
+
+from sqlalchemy import or_, and_
+
+from app import db
+from app.models import DensityRollup, DetectionLog
+
+# 집계 단위별 구간 시작 시각 계산
+GRANULARITIES = {
+    "minute": lambda t: t.replace(second=0, microsecond=0),
+    "hour": lambda t: t.replace(minute=0, second=0, microsecond=0),
+    "day": lambda t: t.replace(hour=0, minute=0, second=0, microsecond=0),
+}
+BUCKET_SIZES = {"minute": timedelta(minutes=1), "hour": timedelta(hours=1), "day": timedelta(days=1)}
+
+# overcrowding_level → 체류 시간 컬럼
+LEVEL_COLUMNS = {
+    "정상": "normal_seconds",
+    "주의": "caution_seconds",
+    "경고": "warning_seconds",
+    "위험": "danger_seconds",
+}
+
+
+def _empty_delta():
+    delta = {"sample_count": 0, "object_count_sum": 0, "object_count_max": 0}
+    delta.update({column: 0.0 for column in LEVEL_COLUMNS.values()})
+    return delta
+
+
+class RollupUpdater:
+    """DetectionLog 가 기록될 때 분/시간/일 단위 집계를 증분으로 갱신합니다.
+
+    과밀 수준별 체류 시간은 같은 CCTV 의 직전 로그부터 현재 로그까지를 직전 수준에 배분하며,
+    간격이 max_gap 을 넘으면 (파이프라인 중단 등) 배분하지 않습니다.
+    """
+
+    def __init__(self, max_gap=300.0):
+        self.max_gap = timedelta(seconds=max_gap)
+        # cctv_id -> (마지막 로그 시각, overcrowding_level)
+        self._last = {}
+        self._pending_last = None
+        self._lock = threading.Lock()
+
+    def _add_duration(self, deltas, cctv_id, level, start, end):
+        column = LEVEL_COLUMNS.get(level)
+        if column is None:
+            return
+        for granularity, floor in GRANULARITIES.items():
+            bucket = floor(start)
+            while bucket < end:
+                bucket_end = bucket + BUCKET_SIZES[granularity]
+                seconds = (min(end, bucket_end) - max(start, bucket)).total_seconds()
+                deltas.setdefault((cctv_id, granularity, bucket), _empty_delta())[column] += seconds
+                bucket = bucket_end
+
+    def compute(self, rows):
+        """rows 로부터 (cctv_id, granularity, bucket_start) 별 증가분을 계산합니다."""
+        deltas = {}
+        with self._lock:
+            last = dict(self._last)
+        for row in sorted(rows, key=lambda row: row["detection_time"]):
+            cctv_id, time, count = row["cctv_id"], row["detection_time"], row["object_count"]
+            for granularity, floor in GRANULARITIES.items():
+                delta = deltas.setdefault((cctv_id, granularity, floor(time)), _empty_delta())
+                delta["sample_count"] += 1
+                delta["object_count_sum"] += count
+                delta["object_count_max"] = max(delta["object_count_max"], count)
+
+            previous = last.get(cctv_id)
+            if previous and timedelta(0) < time - previous[0] <= self.max_gap:
+                self._add_duration(deltas, cctv_id, previous[1], previous[0], time)
+            last[cctv_id] = (time, row["overcrowding_level"])
+        self._pending_last = last
+        return deltas
+
+    def apply(self, rows):
+        # LogSink 의 before_commit 훅: 로그 INSERT 와 같은 트랜잭션에서 집계 행을 갱신
+        deltas = self.compute(rows)
+        if not deltas:
+            return
+        keys = list(deltas)
+        existing = {
+            (rollup.cctv_id, rollup.granularity, rollup.bucket_start): rollup
+            for rollup in DensityRollup.query.filter(or_(*[
+                and_(DensityRollup.cctv_id == cctv_id, DensityRollup.granularity == granularity,
+                     DensityRollup.bucket_start == bucket)
+                for cctv_id, granularity, bucket in keys
+            ])).with_for_update()
+        }
+        for key, delta in deltas.items():
+            rollup = existing.get(key)
+            if rollup is None:
+                cctv_id, granularity, bucket = key
+                rollup = DensityRollup(cctv_id=cctv_id, granularity=granularity, bucket_start=bucket, **delta)
+                db.session.add(rollup)
+                continue
+            rollup.object_count_max = max(rollup.object_count_max, delta.pop("object_count_max"))
+            for column, value in delta.items():
+                setattr(rollup, column, getattr(rollup, column) + value)
+
+    def committed(self, rows):
+        # 커밋이 성공한 경우에만 CCTV별 마지막 상태를 확정 (재시도 시 중복 배분 방지)
+        with self._lock:
+            if self._pending_last is not None:
+                self._last = self._pending_last
+                self._pending_last = None
+
+
+def query_rollups(granularity, cctv_id=None, start=None, end=None, limit=5000):
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"지원하지 않는 집계 단위: {granularity}")
+    query = DensityRollup.query.filter(DensityRollup.granularity == granularity)
+    if cctv_id is not None:
+        query = query.filter(DensityRollup.cctv_id == cctv_id)
+    if start is not None:
+        query = query.filter(DensityRollup.bucket_start >= start)
+    if end is not None:
+        query = query.filter(DensityRollup.bucket_start < end)
+    return query.order_by(DensityRollup.bucket_start.asc(), DensityRollup.cctv_id.asc()).limit(limit).all()
+
+
+def init_rollups(app, sink):
+    updater = RollupUpdater(max_gap=app.config['ROLLUP_MAX_GAP'])
+    sink.add_hook(DetectionLog, before_commit=updater.apply, after_commit=updater.committed)
+    return updater
@@ -1,29 +1,39 @@
 from flask import Blueprint, render_template, session, redirect, url_for, request, flash, Response, current_app, jsonify
 from app import db, bcrypt
+from markupsafe import Markup
 from app.models import User, CCTV, DetectionLog, AbnormalBehaviorLog
-from .utils import generate_webcam_data
+from .utils import generate_webcam_data, get_capture_source
+from .roi import InferenceRegion, parse_roi, format_roi, parse_inference_size
+from .density import parse_calibration
+from .inference import get_engine
+from .scheduler import get_scheduler
+from .streaming import get_stream_hub, BOUNDARY
+from .capture import get_capture_pool
+from .snapshot import get_snapshot_writer, snapshot_name, SnapshotQueueFull
+from .detection import classify_count, OVERCROWDING_LEVELS, FALL_STATUSES
+from .pagination import keyset_paginate
+from .rollup import query_rollups
+from .events import get_event_bus, sse_stream
+from .pipeline import get_pipeline
+from .log_sink import get_log_sink
+from .metrics import REGISTRY, authorized as metrics_authorized
+from .registry import get_registry
+from .last_access import get_last_access_buffer
 from datetime import datetime
-import cv2
-import os
-import re
 
 main = Blueprint('main', __name__)
 
 @main.before_request
 def require_login():
     # 로그인 상태를 확인하여 보호된 페이지 접근 제어
-    if not session.get('logged_in') and request.endpoint not in ['main.login', 'main.authenticate', 'main.signup']:
+    if not session.get('logged_in') and request.endpoint not in ['main.login', 'main.authenticate', 'main.signup', 'main.metrics']:
         return redirect(url_for('main.login'))
 
 @main.route('/')
 def index():
     try:
-        # CCTV 데이터를 데이터베이스에서 가져오기
-        cctvs = CCTV.query.all()
-        cctv_ids = [cctv.cctv_id for cctv in cctvs]
-        
-        # home.html 렌더링 시 CCTV ID 데이터 전달
-        return render_template('home.html', cctv_ids=cctv_ids)
+        # 격자는 JavaScript 가 채우는 정적 마크업이므로 조각 캐시 없이 그대로 렌더링
+        return render_template('home.html')
     
     except Exception as e:
         # 오류 발생 시 로그 기록 및 사용자에게 메시지 표시
@@ -95,8 +105,14 @@ def signup():
 # CCTV 목록 페이지
 @main.route('/cctv-list')
 def cctv_list():
-    cctvs = CCTV.query.all()
-    return render_template('cctv_list.html', cctvs=cctvs)
+    registry = get_registry()
+    table = registry.fragment('cctv_list', lambda: render_template('cctv_list_table.html', cctvs=registry.all()))
+    # 최근 접근 기록은 조각과 따로 요청마다 전달 (접근할 때마다 조각을 다시 그리지 않도록)
+    last_access = {
+        cctv.cctv_id: cctv.last_access.strftime('%Y-%m-%d %H:%M:%S') if cctv.last_access else '-'
+        for cctv in registry.all()
+    }
+    return render_template('cctv_list.html', table=Markup(table), last_access=last_access)
 
 # CCTV 등록 페이지
 @main.route('/cctv-register', methods=['GET', 'POST'])
@@ -104,6 +120,8 @@ def cctv_register():
     if request.method == 'POST':
         cctv_id = request.form.get('cctv_id')
         location = request.form.get('location')
+        # 비워두면 웹캠, 경로를 주면 동영상 파일/이미지 폴더를 카메라 대신 사용
+        source = request.form.get('source', '').strip() or None
 
         # 중복 확인
         existing_cctv = CCTV.query.filter_by(cctv_id=cctv_id).first()
@@ -115,11 +133,13 @@ def cctv_register():
         new_cctv = CCTV(
             cctv_id=cctv_id,
             location=location,
+            source=source,
         )
 
         try:
             db.session.add(new_cctv)
             db.session.commit()
+            get_registry().invalidate()
             flash("CCTV가 성공적으로 등록되었습니다.")
         except Exception as e:
             db.session.rollback()
@@ -128,11 +148,48 @@ def cctv_register():
         return redirect(url_for('main.cctv_list'))
 
     # 자동 생성할 cctv_id 계산
-    last_cctv = CCTV.query.order_by(CCTV.id.desc()).first()
+    cctvs = get_registry().all()
+    last_cctv = cctvs[-1] if cctvs else None
     next_cctv_id = f"CCTV{int(last_cctv.cctv_id.replace('CCTV', '')) + 1}" if last_cctv else "CCTV1"
 
     return render_template('cctv_register.html', next_cctv_id=next_cctv_id)
 
+# CCTV 설정 페이지 (위치, 영상 소스, 추론 영역과 크기)
+@main.route('/cctv-settings/<int:cctv_id>', methods=['GET', 'POST'])
+def cctv_settings(cctv_id):
+    cctv = CCTV.query.get(cctv_id)
+    if not cctv:
+        flash("존재하지 않는 CCTV입니다.")
+        return redirect(url_for('main.cctv_list'))
+
+    if request.method == 'POST':
+        try:
+            roi = format_roi(parse_roi(request.form.get('roi', '')))
+            inference_size = parse_inference_size(request.form.get('inference_size'))
+            # 이미지 좌표는 0~1 비율, 지면 좌표는 m (구역 면적까지 계산해 검증)
+            calibration = request.form.get('calibration', '').strip() or None
+            parse_calibration(calibration)
+        except ValueError as e:
+            flash(str(e))
+            return redirect(url_for('main.cctv_settings', cctv_id=cctv_id))
+
+        cctv.location = request.form.get('location') or cctv.location
+        cctv.source = request.form.get('source', '').strip() or None
+        cctv.roi = roi
+        cctv.inference_size = inference_size
+        cctv.calibration = calibration
+        try:
+            db.session.commit()
+            get_registry().invalidate()
+            # 실행 중인 스트림/파이프라인은 다음 접속 또는 CCTV 목록 갱신 때 새 설정으로 다시 시작
+            flash(f"{cctv.location} (ID: {cctv.cctv_id}) 설정이 저장되었습니다.")
+        except Exception as e:
+            db.session.rollback()
+            flash(f"CCTV 설정 저장 중 오류가 발생했습니다: {e}")
+        return redirect(url_for('main.cctv_list'))
+
+    return render_template('cctv_settings.html', cctv=cctv, default_imgsz=current_app.config['YOLO_IMGSZ'])
+
 #cctv 삭제 기능
 @main.route('/delete-cctv/<int:cctv_id>', methods=['POST'])
 def delete_cctv(cctv_id):
@@ -141,6 +198,7 @@ def delete_cctv(cctv_id):
         try:
             db.session.delete(cctv)
             db.session.commit()
+            get_registry().invalidate()
             flash(f"{cctv.location} (ID: {cctv.cctv_id})이 삭제되었습니다.")
         except Exception as e:
             db.session.rollback()
@@ -186,52 +244,118 @@ def delete_user(user_id):
             flash("사용자 삭제 중 오류가 발생했습니다.")
     return redirect(url_for('main.user_management'))
 
+# 로그 목록 페이지 공통: CCTV/기간/수준 필터와 keyset 페이지네이션
+LOG_PAGE_SIZE = 50
+LOG_PAGE_MAX = 200
+
+def _parse_datetime(value):
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except ValueError:
+        raise ValueError(f"유효하지 않은 날짜 형식: {value}")
+
+def paginate_logs(query, model, level_column):
+    args = request.args
+    filters = {key: args[key] for key in ('cctv', 'start', 'end', 'level', 'order', 'limit') if args.get(key)}
+
+    if args.get('cctv'):
+        query = query.filter(model.cctv_id == args.get('cctv', type=int))
+    start, end = _parse_datetime(args.get('start')), _parse_datetime(args.get('end'))
+    if start:
+        query = query.filter(model.detection_time >= start)
+    if end:
+        query = query.filter(model.detection_time < end)
+    if args.get('level'):
+        query = query.filter(level_column == args['level'])
+
+    limit = min(max(args.get('limit', LOG_PAGE_SIZE, type=int), 1), LOG_PAGE_MAX)
+    page = keyset_paginate(
+        query, model.detection_time, model.id,
+        after=args.get('after'), before=args.get('before'),
+        limit=limit, descending=args.get('order', 'desc') != 'asc',
+    )
+    return page, filters
+
+def render_log_page(template, query, model, level_column, levels):
+    try:
+        page, filters = paginate_logs(query, model, level_column)
+    except ValueError as e:
+        flash(str(e))
+        return redirect(url_for(request.endpoint))
+    cctvs = db.session.query(CCTV.id, CCTV.cctv_id, CCTV.location).order_by(CCTV.id).all()
+    return render_template(template, logs=page.items, page=page, filters=filters, cctvs=cctvs, levels=levels)
+
 @main.route('/detection-logs')
 def detection_logs():
     # 객체 탐지 로그와 관련된 CCTV 정보를 가져옵니다.
-    logs = DetectionLog.query.join(CCTV).add_columns(
+    query = db.session.query(
         DetectionLog.id,
         DetectionLog.detection_time,
         CCTV.location,
+        DetectionLog.object_count,
+        DetectionLog.overcrowding_level,
         DetectionLog.image_url
-    ).all()
-    return render_template('detection_logs.html', logs=logs)
+    ).select_from(DetectionLog).join(CCTV)
+    return render_log_page('detection_logs.html', query, DetectionLog, DetectionLog.overcrowding_level,
+                           [name for _, name in OVERCROWDING_LEVELS])
 
 @main.route('/add-detection-log', methods=['POST'])
 def add_detection_log():
     cctv_id = request.form.get('cctv_id')
     image_url = request.form.get('image_url')
+    try:
+        object_count = int(request.form.get('object_count', 0))
+    except ValueError:
+        return "object_count는 정수여야 합니다.", 400
 
-    new_log = DetectionLog(cctv_id=cctv_id, image_url=image_url)
     try:
-        db.session.add(new_log)
-        db.session.commit()
-        return redirect(url_for('main.detection_logs'))
-    except Exception as e:
-        db.session.rollback()
-        return str(e), 500
+        cctv_id = int(cctv_id)
+    except (TypeError, ValueError):
+        return "cctv_id는 정수여야 합니다.", 400
+    if CCTV.query.get(cctv_id) is None:
+        return f"CCTV {cctv_id}가 없습니다.", 400
+    if not image_url:
+        return "image_url이 필요합니다.", 400
+
+    # 밀집 정도/과밀 수준이 주어지지 않으면 객체 수로 계산
+    density_level, overcrowding_level = classify_count(object_count)
+    # 파이프라인과 같은 LogSink 로 기록해야 집계(rollup) 갱신과 대시보드 이벤트가 함께 처리됨
+    sink = get_log_sink()
+    if not sink.add(
+        DetectionLog,
+        cctv_id=cctv_id,
+        image_url=image_url,
+        object_count=object_count,
+        density_level=request.form.get('density_level') or density_level,
+        overcrowding_level=request.form.get('overcrowding_level') or overcrowding_level,
+    ):
+        return "로그 대기열이 가득 찼습니다. 잠시 후 다시 시도하세요.", 503
+    # 요청 스레드에서 flush 하지 않음 (다른 카메라의 대기 로그까지 기록·재시도하느라 응답이 늦어짐).
+    # 목록에는 다음 주기 flush 이후 보임
+    return redirect(url_for('main.detection_logs'))
 
 @main.route('/abnormal-behavior')
 def abnormal_behavior():
     """
     이상행동 감지 데이터를 조회하고 템플릿으로 렌더링합니다.
     """
-    # 데이터베이스에서 이상행동 감지 데이터 조회
-    logs = AbnormalBehaviorLog.query.join(CCTV).add_columns(
+    # 데이터베이스에서 이상행동 감지 데이터 조회 (필터 및 페이지 단위)
+    query = db.session.query(
         AbnormalBehaviorLog.id,
         AbnormalBehaviorLog.detection_time,
         CCTV.location,
         AbnormalBehaviorLog.image_url,
         AbnormalBehaviorLog.fall_status
-    ).all()
+    ).select_from(AbnormalBehaviorLog).join(CCTV)
 
     # 템플릿 렌더링
-    return render_template('abnormal_behavior.html', logs=logs)    
+    return render_log_page('abnormal_behavior.html', query, AbnormalBehaviorLog, AbnormalBehaviorLog.fall_status,
+                           FALL_STATUSES)
 
 @main.route('/warning')
 def density_stats():
-    # 밀집도 통계 데이터 조회
-    logs = DetectionLog.query.join(CCTV).add_columns(
+    # 밀집도 통계 데이터 조회 (필터 및 페이지 단위)
+    query = db.session.query(
         DetectionLog.id,
         DetectionLog.detection_time,
         CCTV.location,
@@ -239,73 +363,132 @@ def density_stats():
         DetectionLog.overcrowding_level,
         DetectionLog.object_count,
         DetectionLog.image_url
-    ).all()
-    return render_template('warning.html', logs=logs)
+    ).select_from(DetectionLog).join(CCTV)
+    return render_log_page('warning.html', query, DetectionLog, DetectionLog.overcrowding_level,
+                           [name for _, name in OVERCROWDING_LEVELS])
+
+# 실시간 탐지/이상행동 알림 (Server-Sent Events)
+@main.route('/events')
+def events():
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+
+    subscription = get_event_bus().subscribe(last_event_id)
+    return Response(
+        sse_stream(subscription, keepalive=current_app.config['EVENTS_KEEPALIVE']),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+# 차트용 밀집도 집계 API
+@main.route('/api/density-rollups')
+def density_rollups():
+    try:
+        rollups = query_rollups(
+            request.args.get('granularity', 'hour'),
+            cctv_id=request.args.get('cctv', type=int),
+            start=_parse_datetime(request.args.get('start')),
+            end=_parse_datetime(request.args.get('end')),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify([rollup.to_dict() for rollup in rollups])
 
 @main.route('/capture/<cctv_id>', methods=['POST'])
 def capture_cctv(cctv_id):
     try:
-        # cctv_id에서 숫자를 추출하고 -1 계산
-        try:
-            webcam_index = int(''.join(filter(str.isdigit, cctv_id))) - 1
-        except ValueError:
-            raise ValueError(f"유효하지 않은 CCTV ID: {cctv_id}")
-
-        # 데이터베이스에서 CCTV 위치 조회
-        cctv = CCTV.query.filter_by(cctv_id=cctv_id).first()
+        # 캐시된 CCTV 목록에서 위치 조회
+        cctv = get_registry().get(cctv_id)
         if not cctv:
             raise ValueError(f"CCTV ID {cctv_id}에 해당하는 데이터가 없습니다.")
-        
-        location = cctv.location.replace(" ", "_")  # 공백 제거 및 파일명 안전화
-
-        # 해당 웹캠 인덱스로 비디오 스트림 열기
-        cap = cv2.VideoCapture(webcam_index)
-        if not cap.isOpened():
-            raise RuntimeError(f"CCTV {cctv_id}에 접근할 수 없습니다. (웹캠 인덱스: {webcam_index})")
 
-        # 프레임 읽기
-        ret, frame = cap.read()
-        if not ret:
-            raise RuntimeError(f"CCTV {cctv_id}의 프레임을 읽을 수 없습니다.")
+        # 지정된 소스(동영상 파일/이미지 폴더) 또는 cctv_id 숫자 -1 의 웹캠 인덱스
+        source = get_capture_source(cctv)
         
-        # 캡쳐 파일 저장 경로 생성
-        timestamp = datetime.now().strftime('%Y_%m_%d_%H_%M')
-        file_name = f"{location}_{timestamp}.jpg"
-        file_path = os.path.join(current_app.root_path, 'static/images/cctv_capture', file_name)
+        # 캡쳐 풀에서 열려 있는 장치의 최신 프레임 가져오기
+        capture = get_capture_pool().get(cctv_id, source)
+        _, frame = capture.read()
+        if frame is None:
+            if not capture.connected:
+                raise RuntimeError(f"CCTV {cctv_id}에 접근할 수 없습니다. (소스: {source})")
+            raise RuntimeError(f"CCTV {cctv_id}의 프레임을 읽을 수 없습니다.")
         
-        # 디렉토리 생성 (없을 경우)
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-
-        # 이미지 저장
-        cv2.imwrite(file_path, frame)
-        cap.release()
+        # 이미지 저장은 백그라운드 작성기에 맡기고 파일명만 바로 받음 (파이프라인 스냅샷과 같은 파일명 규칙)
+        writer = get_snapshot_writer()
+        file_name = writer.save(frame, snapshot_name(cctv.location, cctv_id))
 
         # 성공 응답
-        return jsonify({"success": True, "file_path": file_name})
+        return jsonify({"success": True, "file_path": file_name, "image_url": writer.url_for(file_name)})
+    except SnapshotQueueFull as e:
+        current_app.logger.warning(f"CCTV 캡쳐 저장 지연: {e}")
+        return jsonify({"success": False, "error": str(e)}), 503
     except Exception as e:
         current_app.logger.error(f"CCTV 캡쳐 중 오류 발생: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
 
+# 탐지 결과가 그려진 MJPEG 스트림 (같은 카메라의 시청자는 인코딩 결과를 공유)
+@main.route('/stream/<cctv_id>')
+def stream_cctv(cctv_id):
+    cctv = get_registry().get(cctv_id)
+    if not cctv:
+        return jsonify({"error": f"CCTV ID '{cctv_id}' not found"}), 404
+    try:
+        source = get_capture_source(cctv)
+        region = InferenceRegion.from_cctv(cctv)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    stream = get_stream_hub().get(cctv_id, source, region)
+    client = stream.subscribe()
+    return Response(stream.mjpeg(client), mimetype=f'multipart/x-mixed-replace; boundary={BOUNDARY}')
+
 #마지막 접근 라우트
 @main.route('/update-last-access/<cctv_id>', methods=['POST'])
 def update_last_access(cctv_id):
-    # CCTV 모델에서 해당 ID 검색
-    cctv = CCTV.query.filter_by(cctv_id=cctv_id).first()
+    # 캐시된 CCTV 목록에서 해당 ID 검색
+    cctv = get_registry().get(cctv_id)
     if not cctv:
         return jsonify({"error": f"CCTV ID '{cctv_id}' not found"}), 404
 
-    # 현재 시간으로 last_access 업데이트
-    cctv.last_access = datetime.utcnow()
-    try:
-        db.session.commit()
-        return jsonify({"success": True, "message": "Last access updated", "last_access": cctv.last_access.isoformat()}), 200
-    except Exception as e:
-        db.session.rollback()
-        return jsonify({"success": False, "message": str(e)}), 500
+    # 현재 시간을 버퍼에 기록 (DB 에는 LAST_ACCESS_FLUSH_INTERVAL 마다 UPDATE 한 번으로 반영)
+    last_access = datetime.utcnow()
+    get_last_access_buffer().record(cctv.id, last_access)
+    get_registry().touch(cctv_id, last_access)
+    return jsonify({"success": True, "message": "Last access updated", "last_access": last_access.isoformat()}), 200
+
+#추론 엔진 상태 (모델 로드 시간 및 호출당 지연시간)
+@main.route('/api/inference-stats')
+def inference_stats():
+    stats = get_engine().stats()
+    stats["batch_scheduler"] = get_scheduler().stats()
+    stats["streams"] = get_stream_hub().stats()
+    stats["captures"] = get_capture_pool().stats()
+    stats["snapshots"] = get_snapshot_writer().stats()
+    pipeline = get_pipeline()
+    stats["pipeline"] = pipeline.stats() if pipeline else None
+    stats["log_sink"] = get_log_sink().stats()
+    stats["events"] = get_event_bus().stats()
+    stats["startup"] = current_app.startup_times
+    stats["cctv_registry"] = get_registry().stats()
+    stats["last_access"] = get_last_access_buffer().stats()
+    return jsonify(stats)
+
+# Prometheus 수집용 (로그인 대신 허용 주소/토큰으로 확인, 값은 요청 시점에만 계산)
+@main.route('/metrics')
+def metrics():
+    if not current_app.config['METRICS_ENABLED']:
+        return Response("metrics disabled\n", status=404, mimetype='text/plain')
+    if not metrics_authorized(request.remote_addr, request.headers.get('Authorization'),
+                              current_app.config['METRICS_TOKEN'], current_app.config['METRICS_ALLOW']):
+        return Response("forbidden\n", status=403, mimetype='text/plain')
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
 
 @main.route('/focus-webcam/<cctv_id>')
 def focus_webcam(cctv_id):
-    cctv = CCTV.query.filter_by(cctv_id=cctv_id).first()
+    cctv = get_registry().get(cctv_id)
     if not cctv:
         flash(f"CCTV ID '{cctv_id}'에 해당하는 데이터가 없습니다.")
         return redirect(url_for('main.cctv_list'))  # CCTV 목록 페이지로 리다이렉트
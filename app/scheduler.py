@@ -0,0 +1,153 @@
+import threading
+import time
+from concurrent.futures import Future
+
+from .inference import get_engine
+from .metrics import FRAMES_DROPPED
+
+
+class BatchScheduler:
+    """카메라별 최신 프레임만 모아 일정 주기로 한 번에 배치 추론하는 스케줄러.
+
+    카메라마다 대기 슬롯은 하나뿐이라 새 프레임이 오면 이전 프레임은 버려지고,
+    max_age 보다 오래 기다린 프레임도 추론하지 않고 버립니다.
+    """
+
+    def __init__(self, engine=None, max_batch_size=16, max_wait=0.05, max_age=0.5):
+        self.engine = engine or get_engine()
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_age = max_age
+        self.dropped = 0
+        self.batches = 0
+        self.frames = 0
+        # cctv_id -> (frame, 도착 시각, Future, imgsz)
+        self._pending = {}
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="batch-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def submit(self, cctv_id, frame, imgsz=None):
+        """프레임을 카메라 슬롯에 넣고 탐지 결과를 받을 Future를 반환합니다. imgsz 는 카메라별 추론 입력 크기."""
+        if not self._running:
+            self.start()
+        future = Future()
+        with self._cond:
+            previous = self._pending.get(cctv_id)
+            if previous is not None:
+                # 아직 처리되지 않은 이전 프레임은 큐에 쌓지 않고 폐기
+                previous[2].cancel()
+                self.dropped += 1
+                FRAMES_DROPPED.inc("scheduler_replaced", cctv_id)
+            self._pending[cctv_id] = (frame, time.monotonic(), future, imgsz)
+            # 비어 있던 슬롯에 첫 프레임이 들어오면 max_wait 타이머를 시작하도록 깨움
+            if len(self._pending) == 1 or len(self._pending) >= self.max_batch_size:
+                self._cond.notify()
+        return future
+
+    def infer(self, cctv_id, frame, timeout=None, imgsz=None):
+        # 동기 호출자를 위한 편의 함수
+        return self.submit(cctv_id, frame, imgsz=imgsz).result(timeout=timeout)
+
+    def _take_batch(self):
+        with self._cond:
+            while self._running:
+                if self._pending:
+                    oldest = min(item[1] for item in self._pending.values())
+                    remaining = self.max_wait - (time.monotonic() - oldest)
+                    if len(self._pending) >= self.max_batch_size or remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                else:
+                    self._cond.wait()
+            if not self._running:
+                return []
+
+            # 오래 기다린 카메라부터 max_batch_size 만큼 꺼냄
+            items = sorted(self._pending.items(), key=lambda item: item[1][1])[:self.max_batch_size]
+            for cctv_id, _ in items:
+                del self._pending[cctv_id]
+
+        now = time.monotonic()
+        batch = []
+        for cctv_id, (frame, arrived, future, imgsz) in items:
+            if now - arrived > self.max_age:
+                future.cancel()
+                self.dropped += 1
+                FRAMES_DROPPED.inc("scheduler_expired", cctv_id)
+            elif future.set_running_or_notify_cancel():
+                batch.append((imgsz, frame, future))
+        return batch
+
+    def _run(self):
+        while self._running:
+            batch = self._take_batch()
+            # 입력 크기가 다른 카메라는 한 텐서로 묶을 수 없으므로 imgsz 별로 나눠 추론
+            groups = {}
+            for imgsz, frame, future in batch:
+                groups.setdefault(imgsz, []).append((frame, future))
+            for imgsz, group in groups.items():
+                try:
+                    results = self.engine.predict_batch([frame for frame, _ in group], imgsz=imgsz)
+                except Exception as e:
+                    for _, future in group:
+                        future.set_exception(e)
+                    continue
+                self.batches += 1
+                self.frames += len(group)
+                for (_, future), detections in zip(group, results):
+                    future.set_result(detections)
+
+    def stats(self):
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": round(self.max_wait * 1000, 2),
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "frames": self.frames,
+            "avg_batch_size": round(self.frames / self.batches, 2) if self.batches else 0,
+            "dropped": self.dropped,
+        }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = BatchScheduler()
+    return _scheduler
+
+
+def init_scheduler(app):
+    """앱 설정으로 전역 배치 스케줄러를 구성합니다. 스레드는 첫 submit 시 시작됩니다."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = BatchScheduler(
+                engine=app.inference_engine,
+                max_batch_size=app.config['BATCH_MAX_SIZE'],
+                max_wait=app.config['BATCH_MAX_WAIT'],
+                max_age=app.config['BATCH_MAX_AGE'],
+            )
+    return _scheduler
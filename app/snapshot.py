@@ -0,0 +1,153 @@
+import atexit
+import logging
+import os
+import queue
+import tempfile
+import threading
+import time
+import uuid
+
+from .metrics import SNAPSHOT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotQueueFull(RuntimeError):
+    """저장 대기열이 가득 차 시간 내에 스냅샷을 넣지 못한 경우."""
+
+
+class SnapshotWriter:
+    """스냅샷 인코딩과 디스크 쓰기를 요청 스레드 밖의 작업 스레드에서 처리합니다.
+
+    save() 는 최종 파일명을 즉시 반환하므로 DetectionLog.image_url 등에 바로 쓸 수 있습니다.
+    전달한 frame 은 저장이 끝날 때까지 수정하지 않아야 합니다.
+    """
+
+    def __init__(self, directory, url_prefix, workers=2, queue_size=32, image_format="jpg",
+                 jpeg_quality=90, webp_quality=80, put_timeout=1.0):
+        if image_format not in ("jpg", "webp"):
+            raise ValueError(f"지원하지 않는 이미지 형식: {image_format}")
+        self.directory = directory
+        self.url_prefix = url_prefix.rstrip("/")
+        self.image_format = image_format
+        self.jpeg_quality = jpeg_quality
+        self.webp_quality = webp_quality
+        self.put_timeout = put_timeout
+        self.written = 0
+        self.failed = 0
+        self.rejected = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._threads = []
+        os.makedirs(directory, exist_ok=True)
+        for i in range(workers):
+            thread = threading.Thread(target=self._run, name=f"snapshot-writer-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    @property
+    def extension(self):
+        return self.image_format
+
+    def _encode_params(self):
+        import cv2
+        if self.image_format == "webp":
+            return [cv2.IMWRITE_WEBP_QUALITY, self.webp_quality]
+        return [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality]
+
+    def save(self, frame, name, block=True):
+        """frame 저장을 예약하고 확장자가 붙은 파일명을 반환합니다."""
+        file_name = f"{name}.{self.extension}"
+        try:
+            # 대기열이 가득 차면 put_timeout 동안 기다려 호출자에게 역압을 전달
+            self._queue.put((frame, file_name), block=block, timeout=self.put_timeout if block else None)
+        except queue.Full:
+            self.rejected += 1
+            raise SnapshotQueueFull(f"스냅샷 저장 대기열이 가득 찼습니다: {file_name}")
+        return file_name
+
+    def url_for(self, file_name):
+        return f"{self.url_prefix}/{file_name}"
+
+    def _run(self):
+        import cv2
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            frame, file_name = item
+            started = time.perf_counter()
+            try:
+                ok, buffer = cv2.imencode(f".{self.extension}", frame, self._encode_params())
+                if not ok:
+                    raise RuntimeError(f"이미지 인코딩 실패: {file_name}")
+                # 같은 디렉터리의 고유한 임시 파일에 쓴 뒤 교체해 읽는 쪽에서 반쯤 쓰인 파일을 보지 않도록 함
+                path = os.path.join(self.directory, file_name)
+                fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".snapshot-", suffix=".tmp")
+                try:
+                    with os.fdopen(fd, "wb") as f:
+                        f.write(buffer.tobytes())
+                    os.replace(tmp_path, path)
+                except BaseException:
+                    os.unlink(tmp_path)
+                    raise
+                self.written += 1
+                SNAPSHOT_SECONDS.observe(time.perf_counter() - started, self.image_format)
+            except Exception:
+                self.failed += 1
+                logger.exception(f"스냅샷 저장 실패: {file_name}")
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        self._queue.join()
+
+    def close(self):
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+
+    def stats(self):
+        return {
+            "format": self.image_format,
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+
+
+def snapshot_name(prefix, cctv_id):
+    # 파일명 안전화 및 초 단위 타임스탬프. 같은 위치의 카메라나 한 프레임의 여러 쓰러짐이
+    # 같은 초에 저장되어도 겹치지 않도록 CCTV ID 와 임의 접미사를 붙임
+    prefix = prefix.replace(' ', '_').replace('/', '_')
+    return f"{prefix}_{cctv_id}_{time.strftime('%Y_%m_%d_%H_%M_%S')}_{uuid.uuid4().hex[:8]}"
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_snapshot_writer():
+    if _writer is None:
+        raise RuntimeError("SnapshotWriter가 초기화되지 않았습니다. create_app()을 먼저 호출하세요.")
+    return _writer
+
+
+def init_snapshot_writer(app):
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = SnapshotWriter(
+                directory=os.path.join(app.root_path, 'static/images/cctv_capture'),
+                url_prefix=app.static_url_path + '/images/cctv_capture',
+                workers=app.config['SNAPSHOT_WORKERS'],
+                queue_size=app.config['SNAPSHOT_QUEUE_SIZE'],
+                image_format=app.config['SNAPSHOT_FORMAT'],
+                jpeg_quality=app.config['SNAPSHOT_JPEG_QUALITY'],
+                webp_quality=app.config['SNAPSHOT_WEBP_QUALITY'],
+            )
+            atexit.register(_writer.flush)
+    return _writer
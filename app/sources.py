@@ -0,0 +1,131 @@
+import glob
+import os
+import time
+
+import numpy as np
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+
+class _PacedSource:
+    """cv2.VideoCapture 와 같은 isOpened / read / release 인터페이스. 실제 카메라처럼 fps 에 맞춰 프레임을 냅니다."""
+
+    def __init__(self, fps):
+        self.fps = fps
+        self._next = None
+
+    def _pace(self):
+        if not self.fps:
+            return
+        now = time.monotonic()
+        if self._next is None:
+            self._next = now
+        elif now < self._next:
+            time.sleep(self._next - now)
+        self._next = max(self._next + 1.0 / self.fps, time.monotonic() - 1.0 / self.fps)
+
+    def isOpened(self):
+        return True
+
+    def release(self):
+        pass
+
+
+class LoopingVideoSource(_PacedSource):
+    """동영상 파일을 원본 fps 로 끝까지 읽고 처음으로 되감아 반복합니다."""
+
+    def __init__(self, path, fps=None):
+        import cv2
+        self.path = path
+        self._cap = cv2.VideoCapture(path)
+        super().__init__(fps if fps is not None else (self._cap.get(cv2.CAP_PROP_FPS) or 25.0))
+
+    def isOpened(self):
+        return self._cap.isOpened()
+
+    def read(self, image=None):
+        import cv2
+        self._pace()
+        ret, frame = self._cap.read(image)
+        if not ret:
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self._cap.read(image)
+        return ret, frame
+
+    def release(self):
+        self._cap.release()
+
+
+class ImageDirectorySource(_PacedSource):
+    """폴더의 이미지를 이름 순서대로 fps 에 맞춰 반복해서 냅니다. 디코딩한 이미지는 메모리에 보관합니다."""
+
+    def __init__(self, path, fps=10.0):
+        import cv2
+        super().__init__(fps)
+        self.path = path
+        files = sorted(f for f in glob.glob(os.path.join(path, "*")) if f.lower().endswith(IMAGE_EXTENSIONS))
+        self._frames = [frame for frame in (cv2.imread(f) for f in files) if frame is not None]
+        self._index = 0
+
+    def isOpened(self):
+        return bool(self._frames)
+
+    def read(self, image=None):
+        self._pace()
+        frame = self._frames[self._index % len(self._frames)]
+        self._index += 1
+        if image is not None and image.shape == frame.shape:
+            image[...] = frame
+            return True, image
+        return True, frame.copy()
+
+
+class SyntheticSource(_PacedSource):
+    """장비나 영상 없이 벤치마크할 때 쓰는 움직이는 사각형 프레임 (예: "synthetic:1280x720@30")."""
+
+    def __init__(self, width=1280, height=720, fps=30.0, seed=0):
+        super().__init__(fps)
+        rng = np.random.default_rng(seed)
+        self._background = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+        self._boxes = rng.integers(0, min(width, height) // 2, (8, 2))
+        self._velocity = rng.integers(-8, 9, (8, 2))
+        self._tick = 0
+
+    def read(self, image=None):
+        self._pace()
+        height, width = self._background.shape[:2]
+        frame = image if image is not None and image.shape == self._background.shape else np.empty_like(self._background)
+        frame[...] = self._background
+        for (x, y), (dx, dy) in zip(self._boxes, self._velocity):
+            x = int(x + dx * self._tick) % (width - 60)
+            y = int(y + dy * self._tick) % (height - 160)
+            frame[y:y + 160, x:x + 60] = (40, 40, 200)
+        self._tick += 1
+        return True, frame
+
+
+def parse_source(value):
+    """DB/설정의 source 문자열을 캡쳐 소스로 변환합니다. 숫자는 웹캠 인덱스, 그 외는 경로 또는 synthetic 사양."""
+    if isinstance(value, int):
+        return value
+    value = value.strip()
+    return int(value) if value.isdigit() else value
+
+
+def open_source(source):
+    """웹캠 인덱스, 동영상 파일, 이미지 폴더, synthetic:WxH[@fps] 중 하나를 VideoCapture 형태로 엽니다."""
+    import cv2
+    source = parse_source(source)
+    if isinstance(source, int):
+        return cv2.VideoCapture(source)
+    if source.startswith("synthetic"):
+        spec = source.partition(":")[2] or "1280x720"
+        size, _, fps = spec.partition("@")
+        width, height = (int(v) for v in size.lower().split("x"))
+        return SyntheticSource(width, height, fps=float(fps or 30))
+    if os.path.isdir(source):
+        return ImageDirectorySource(source)
+    if os.path.isfile(source):
+        return LoopingVideoSource(source)
+    # RTSP/HTTP 등은 OpenCV 에 그대로 전달
+    return cv2.VideoCapture(source)
@@ -0,0 +1,61 @@
+import json
+import subprocess
+import sys
+import time
+
+import click
+
+
+class StartupTimer:
+    """create_app 의 단계별 소요 시간을 기록합니다 (mark 를 부를 때마다 직전 mark 이후 시간)."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.stages = []
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.stages.append((name, round((now - self._last) * 1000, 2)))
+        self._last = now
+
+    def report(self):
+        return {
+            "total_ms": round((self._last - self.started) * 1000, 2),
+            "stages": dict(self.stages),
+        }
+
+
+def import_time_report(code="from app import create_app; create_app()", top=20):
+    """새 인터프리터에서 -X importtime 으로 code 를 실행해 모듈별 import 시간(ms)을 큰 순서로 반환합니다."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "startup failed")
+
+    modules = []
+    for line in result.stderr.splitlines():
+        # 형식: "import time:   self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        modules.append({
+            "module": name.strip(),
+            "self_ms": round(int(self_us) / 1000, 2),
+            "cumulative_ms": round(int(cumulative_us) / 1000, 2),
+            # 들여쓰기 깊이 0 이 최상위 import
+            "top_level": not name[1:].startswith(" "),
+        })
+    total = sum(m["cumulative_ms"] for m in modules if m["top_level"])
+    modules.sort(key=lambda m: m["cumulative_ms"], reverse=True)
+    return {"total_import_ms": round(total, 2), "modules": modules[:top]}
+
+
+@click.command("startup-report")
+@click.option("--top", default=20, show_default=True, help="출력할 모듈 수")
+@click.option("--code", default="from app import create_app; create_app()", help="측정할 시작 코드")
+def startup_report_command(top, code):
+    """앱 시작 시 모듈별 import 시간을 JSON 으로 출력합니다."""
+    click.echo(json.dumps(import_time_report(code, top=top), ensure_ascii=False, indent=2))
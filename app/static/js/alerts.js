@@ -0,0 +1,70 @@
+// 서버에서 push 되는 탐지/이상행동 이벤트 수신 (EventSource 는 끊기면 Last-Event-ID 로 자동 재연결)
+const ALERT_DURATION_MS = 8000;
+
+function showAlert(message) {
+  const container = document.getElementById("alert-container");
+  if (!container) return;
+  const alertElement = document.createElement("div");
+  alertElement.classList.add("live-alert");
+  alertElement.textContent = message;
+  container.appendChild(alertElement);
+  setTimeout(() => alertElement.remove(), ALERT_DURATION_MS);
+}
+
+// 필터/페이지 이동 없이 최신순 첫 페이지를 보고 있을 때만 표에 새 행 추가
+function isLiveFirstPage() {
+  const params = new URLSearchParams(window.location.search);
+  return !params.has("after") && !params.has("before") && params.get("order") !== "asc"
+    && !params.has("cctv") && !params.has("level") && !params.has("end");
+}
+
+function formatTime(isoString) {
+  return isoString.replace("T", " ").slice(0, 19);
+}
+
+function prependRow(table, cells, imageUrl) {
+  const tbody = table.querySelector("tbody");
+  const row = document.createElement("tr");
+  cells.forEach((value) => {
+    const cell = document.createElement("td");
+    cell.textContent = value;
+    row.appendChild(cell);
+  });
+  const imageCell = document.createElement("td");
+  const link = document.createElement("a");
+  link.href = imageUrl;
+  link.target = "_blank";
+  link.textContent = "이미지 보기";
+  imageCell.appendChild(link);
+  row.appendChild(imageCell);
+  tbody.insertBefore(row, tbody.firstChild);
+}
+
+function connectAlerts() {
+  const source = new EventSource("/events");
+
+  source.addEventListener("detection", (event) => {
+    const data = JSON.parse(event.data);
+    if (data.alert) {
+      showAlert(`[${data.location}] 과밀 ${data.overcrowding_level} - ${data.object_count}명`);
+    }
+    const table = document.querySelector(".stats-table");
+    if (table && document.querySelectorAll(".stats-table thead th").length === 7 && isLiveFirstPage()) {
+      prependRow(table, ["-", formatTime(data.detection_time), data.location, data.density_level,
+        data.overcrowding_level, data.object_count], data.image_url);
+    }
+  });
+
+  source.addEventListener("abnormal", (event) => {
+    const data = JSON.parse(event.data);
+    if (data.alert) {
+      showAlert(`[${data.location}] 쓰러짐 감지`);
+    }
+    const table = document.querySelector(".behavior-table");
+    if (table && isLiveFirstPage()) {
+      prependRow(table, ["-", formatTime(data.detection_time), data.location, data.fall_status], data.image_url);
+    }
+  });
+}
+
+connectAlerts();
@@ -14,8 +14,19 @@ async function checkWebcamStatus(cctvIds) {
     });
 }
 
+// 캐시된 목록 표에 최근 접근 기록 채우기
+function fillLastAccess() {
+    const data = document.getElementById('last-access-data');
+    if (!data) return;
+    const lastAccess = JSON.parse(data.textContent);
+    document.querySelectorAll('[data-last-access-for]').forEach(element => {
+        element.textContent = lastAccess[element.dataset.lastAccessFor] || '-';
+    });
+}
+
 // CCTV 목록을 확인하여 상태 업데이트
 window.onload = () => {
+    fillLastAccess();
     const cctvIds = Array.from(document.querySelectorAll('[data-cctv-id]'))
         .map(element => element.dataset.cctvId);
     checkWebcamStatus(cctvIds);
@@ -0,0 +1,252 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import CancelledError
+
+from .capture import get_capture_pool
+from .motion import motion_gate_for
+from .tracking import KeyframeTracker, PersonTracker
+from .metrics import observe_stage
+from .utils import generate_webcam_data
+
+BOUNDARY = "frame"
+
+logger = logging.getLogger(__name__)
+
+
+class StreamClient:
+    """시청자 한 명의 프레임 버퍼. 가득 차면 가장 오래된 프레임을 버립니다."""
+
+    def __init__(self, buffer_size):
+        self.frames = deque(maxlen=buffer_size)
+        self.dropped = 0
+        self.closed = False
+        self._cond = threading.Condition()
+
+    def push(self, jpeg):
+        with self._cond:
+            if len(self.frames) == self.frames.maxlen:
+                self.dropped += 1
+            self.frames.append(jpeg)
+            self._cond.notify()
+
+    def pop(self, timeout):
+        with self._cond:
+            if not self.frames and not self.closed:
+                self._cond.wait(timeout)
+            return self.frames.popleft() if self.frames else None
+
+    def close(self):
+        # 스트림이 끝났음을 알려 기다리던 응답 생성기가 바로 종료되도록 함
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+class CameraStream:
+    """카메라 하나를 읽고 추론/인코딩을 한 번만 수행해 모든 시청자에게 나눠주는 스트림."""
+
+    def __init__(self, cctv_id, source, max_fps=10, buffer_size=2, jpeg_quality=80, idle_timeout=10.0,
+                 keyframe_interval=1, track_max_age=1.0, track_high_conf=0.5, track_low_conf=0.1, motion_gate=None,
+                 region=None):
+        self.cctv_id = cctv_id
+        self.source = source
+        # 추론 영역과 입력 크기 (InferenceRegion, 없으면 전체 프레임)
+        self.region = region
+        self.max_fps = max_fps
+        self.buffer_size = buffer_size
+        self.jpeg_quality = jpeg_quality
+        self.idle_timeout = idle_timeout
+        self.frames_encoded = 0
+        self.frames_torn = 0
+        # 배치 스케줄러에서 max_age 를 넘겨 추론되지 못하고 버려진 프레임 수
+        self.frames_expired = 0
+        self.errors = 0
+        # 시청 화면의 ID 유지 및 키프레임 사이 박스 외삽용 추적기
+        self.tracker = KeyframeTracker(
+            PersonTracker(high_conf=track_high_conf, low_conf=track_low_conf, max_age=track_max_age),
+            keyframe_interval=keyframe_interval,
+        )
+        # 움직임이 없을 때 탐지를 건너뛰는 게이트 (CCTV별 설정, 없으면 None)
+        self.motion_gate = motion_gate
+        self._clients = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def subscribe(self):
+        client = StreamClient(self.buffer_size)
+        with self._lock:
+            self._clients.add(client)
+            if not self.running:
+                self._thread = threading.Thread(target=self._run, name=f"stream-{self.cctv_id}", daemon=True)
+                self._thread.start()
+        return client
+
+    def unsubscribe(self, client):
+        with self._lock:
+            self._clients.discard(client)
+
+    def _run(self):
+        import cv2
+        try:
+            # 장치는 캡쳐 풀이 열어두고 있으므로 여기서는 최신 프레임만 가져옴
+            capture = get_capture_pool().get(self.cctv_id, self.source)
+            interval = 1.0 / self.max_fps if self.max_fps > 0 else 0
+            idle_since = None
+            seq = 0
+            while True:
+                with self._lock:
+                    clients = list(self._clients)
+                # 시청자가 없으면 idle_timeout 이후 종료
+                if not clients:
+                    idle_since = idle_since or time.monotonic()
+                    if time.monotonic() - idle_since > self.idle_timeout:
+                        with self._lock:
+                            if not self._clients:
+                                self._thread = None
+                                return
+                    time.sleep(0.1)
+                    continue
+                idle_since = None
+
+                started = time.monotonic()
+                try:
+                    # 링 슬롯의 뷰를 그대로 받아 추론하고, 박싱은 generate_webcam_data 가 복사본에 그림
+                    seq, frame = capture.read(after_seq=seq, copy=False)
+                    if frame is None:
+                        continue
+
+                    # 추론과 JPEG 인코딩은 시청자 수와 관계없이 한 번만 수행
+                    frame = generate_webcam_data(frame, self.tracker, self.motion_gate, self.cctv_id, self.region)
+                    if not capture.valid(seq):
+                        # 추론하는 사이 작성자가 링을 한 바퀴 돌아 슬롯을 덮어씀: 찢어진 프레임은 내보내지 않음
+                        self.frames_torn += 1
+                        continue
+                    encode_started = time.perf_counter()
+                    ok, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+                    observe_stage("jpeg_encode", self.cctv_id, time.perf_counter() - encode_started)
+                    if ok:
+                        self.frames_encoded += 1
+                        jpeg = buffer.tobytes()
+                        for client in clients:
+                            client.push(jpeg)
+                except CancelledError:
+                    # 추론이 밀려 스케줄러가 오래된 프레임을 버림: 기다리지 않고 다음 최신 프레임으로
+                    self.frames_expired += 1
+                    continue
+                except Exception as e:
+                    # 추론 시간 초과·엔진 오류 등은 이번 프레임만 건너뛰고 계속 (같은 오류가 이어지면 잠깐 쉼)
+                    self.errors += 1
+                    logger.error(f"CCTV {self.cctv_id} 스트림 프레임 처리 오류: {e!r}")
+                    time.sleep(max(interval, 0.5))
+                    continue
+
+                # 프레임 레이트 제한
+                remaining = interval - (time.monotonic() - started)
+                if remaining > 0:
+                    time.sleep(remaining)
+        except Exception:
+            logger.exception(f"CCTV {self.cctv_id} 스트림이 중단되었습니다")
+        finally:
+            # 스레드가 끝나면 다음 구독자가 새로 시작하도록 비우고, 남은 시청자의 응답을 종료
+            with self._lock:
+                clients = []
+                if self._thread is threading.current_thread():
+                    self._thread = None
+                    clients = list(self._clients)
+            for client in clients:
+                client.close()
+
+    def mjpeg(self, client):
+        """multipart/x-mixed-replace 응답 본문을 생성합니다. 연결이 끊기면 구독을 해제합니다."""
+        try:
+            while True:
+                jpeg = client.pop(timeout=self.idle_timeout)
+                if jpeg is None:
+                    # 스트림 스레드가 끝났으면 응답을 마침 (브라우저가 다시 접속하면 새로 시작)
+                    if client.closed or not self.running:
+                        return
+                    continue
+                yield (
+                    b"--" + BOUNDARY.encode() + b"\r\n"
+                    b"Content-Type: image/jpeg\r\n"
+                    b"Content-Length: " + str(len(jpeg)).encode() + b"\r\n\r\n" + jpeg + b"\r\n"
+                )
+        finally:
+            self.unsubscribe(client)
+
+    def stats(self):
+        with self._lock:
+            clients = list(self._clients)
+        return {
+            "cctv_id": self.cctv_id,
+            "running": self.running,
+            "viewers": len(clients),
+            "frames_encoded": self.frames_encoded,
+            "frames_torn": self.frames_torn,
+            "frames_expired": self.frames_expired,
+            "errors": self.errors,
+            "motion_gate": self.motion_gate.stats() if self.motion_gate else None,
+            "dropped": sum(client.dropped for client in clients),
+        }
+
+
+class StreamHub:
+    """cctv_id 별 CameraStream 레지스트리."""
+
+    def __init__(self, app=None, **options):
+        self.app = app
+        self.options = options
+        self._streams = {}
+        self._lock = threading.Lock()
+
+    def get(self, cctv_id, source, region=None):
+        with self._lock:
+            stream = self._streams.get(cctv_id)
+            # 소스나 추론 영역이 바뀐 카메라는 새 스트림으로 교체 (기존 시청자는 연결이 끊기면 다시 접속)
+            if stream is None or stream.source != source or stream.region != region:
+                gate = motion_gate_for(self.app, cctv_id) if self.app else None
+                stream = CameraStream(cctv_id, source, motion_gate=gate, region=region, **self.options)
+                self._streams[cctv_id] = stream
+        return stream
+
+    def stats(self):
+        with self._lock:
+            streams = list(self._streams.values())
+        return [stream.stats() for stream in streams]
+
+
+_hub = None
+_hub_lock = threading.Lock()
+
+
+def get_stream_hub():
+    global _hub
+    if _hub is None:
+        with _hub_lock:
+            if _hub is None:
+                _hub = StreamHub()
+    return _hub
+
+
+def init_stream_hub(app):
+    global _hub
+    with _hub_lock:
+        if _hub is None:
+            _hub = StreamHub(
+                app,
+                max_fps=app.config['STREAM_MAX_FPS'],
+                buffer_size=app.config['STREAM_CLIENT_BUFFER'],
+                jpeg_quality=app.config['STREAM_JPEG_QUALITY'],
+                idle_timeout=app.config['STREAM_IDLE_TIMEOUT'],
+                keyframe_interval=app.config['TRACK_KEYFRAME_INTERVAL'],
+                track_max_age=app.config['TRACK_MAX_AGE'],
+                track_high_conf=app.config['YOLO_CONF'],
+                track_low_conf=app.config['TRACK_LOW_CONF'],
+            )
+    return _hub
@@ -0,0 +1,158 @@
+import time
+
+import numpy as np
+
+from .detection import iou_matrix
+
+
+class _Track:
+    def __init__(self, track_id, box, score, now):
+        self.track_id = track_id
+        self.box = box.astype(np.float32)
+        self.velocity = np.zeros(4, dtype=np.float32)  # 박스 좌표의 초당 변화량
+        self.score = score
+        self.hits = 1
+        self.first_seen = now
+        self.last_update = now
+
+    def predict(self, now):
+        return self.box + self.velocity * (now - self.last_update)
+
+    def update(self, box, score, now, smoothing):
+        dt = now - self.last_update
+        if dt > 0:
+            # 속도는 지수 평활로 갱신 (칼만 필터 대신 가벼운 alpha-beta 형태)
+            measured = (box - self.box) / dt
+            self.velocity = smoothing * self.velocity + (1 - smoothing) * measured
+        self.box = box.astype(np.float32)
+        self.score = score
+        self.hits += 1
+        self.last_update = now
+
+
+def _greedy_match(ious, threshold):
+    # IoU 가 큰 쌍부터 1:1 매칭 (scipy 없이 동작)
+    matches = []
+    if ious.size == 0:
+        return matches
+    used_rows, used_cols = set(), set()
+    for row, col in zip(*np.unravel_index(np.argsort(-ious, axis=None), ious.shape)):
+        if ious[row, col] < threshold:
+            break
+        if row in used_rows or col in used_cols:
+            continue
+        used_rows.add(row)
+        used_cols.add(col)
+        matches.append((int(row), int(col)))
+    return matches
+
+
+class PersonTracker:
+    """ByteTrack 방식의 2단계 IoU 매칭으로 카메라별 사람 ID 를 유지하는 NumPy 기반 추적기.
+
+    신뢰도가 높은 탐지를 먼저 매칭하고, 남은 트랙에 낮은 신뢰도 탐지를 한 번 더 매칭합니다.
+    min_hits 번 이상 매칭된 트랙만 확정(confirmed)되어 ID 와 인원 수에 반영됩니다.
+    """
+
+    def __init__(self, high_conf=0.5, low_conf=0.1, iou_threshold=0.3, max_age=1.0, min_hits=2, smoothing=0.6):
+        self.high_conf = high_conf
+        self.low_conf = low_conf
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.smoothing = smoothing
+        self.tracks = []
+        self._next_id = 1
+
+    def _predicted(self, tracks, now):
+        if not tracks:
+            return np.zeros((0, 4), dtype=np.float32)
+        return np.stack([track.predict(now) for track in tracks])
+
+    def update(self, boxes, scores, now=None):
+        """탐지 결과로 트랙을 갱신하고 boxes 와 같은 순서의 트랙 ID 배열을 반환합니다 (미확정은 -1)."""
+        now = time.monotonic() if now is None else now
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        scores = np.asarray(scores, dtype=np.float32).reshape(-1)
+        assigned = np.full(len(boxes), -1, dtype=np.int64)
+        matched_tracks = set()
+
+        high = np.flatnonzero(scores >= self.high_conf)
+        low = np.flatnonzero((scores >= self.low_conf) & (scores < self.high_conf))
+
+        # 1단계: 높은 신뢰도 탐지 ↔ 전체 트랙, 2단계: 낮은 신뢰도 탐지 ↔ 남은 트랙
+        for detections in (high, low):
+            candidates = [t for t in range(len(self.tracks)) if t not in matched_tracks]
+            if not len(detections) or not candidates:
+                continue
+            ious = iou_matrix(self._predicted([self.tracks[t] for t in candidates], now), boxes[detections])
+            for row, col in _greedy_match(ious, self.iou_threshold):
+                track = self.tracks[candidates[row]]
+                detection = detections[col]
+                track.update(boxes[detection], float(scores[detection]), now, self.smoothing)
+                matched_tracks.add(candidates[row])
+                assigned[detection] = track.track_id
+
+        # 매칭되지 않은 높은 신뢰도 탐지로만 새 트랙 생성
+        for detection in high:
+            if assigned[detection] == -1:
+                track = _Track(self._next_id, boxes[detection], float(scores[detection]), now)
+                self._next_id += 1
+                self.tracks.append(track)
+                assigned[detection] = track.track_id
+
+        # 오래 갱신되지 않은 트랙 제거
+        self.tracks = [track for track in self.tracks if now - track.last_update <= self.max_age]
+
+        confirmed = {track.track_id for track in self.tracks if track.hits >= self.min_hits}
+        return np.where(np.isin(assigned, list(confirmed)), assigned, -1)
+
+    def predict(self, now=None):
+        """탐지를 건너뛴 프레임용: 확정된 트랙의 (ids, boxes, scores) 를 등속 모델로 외삽해 반환합니다."""
+        now = time.monotonic() if now is None else now
+        tracks = [track for track in self.tracks if track.hits >= self.min_hits and now - track.last_update <= self.max_age]
+        ids = np.array([track.track_id for track in tracks], dtype=np.int64)
+        scores = np.array([track.score for track in tracks], dtype=np.float32)
+        return ids, self._predicted(tracks, now), scores
+
+    @property
+    def active_count(self):
+        # 잠깐 놓친 사람도 max_age 동안은 포함되므로 프레임별 탐지 수보다 안정적
+        return sum(1 for track in self.tracks if track.hits >= self.min_hits)
+
+    def dwell_times(self, now=None):
+        now = time.monotonic() if now is None else now
+        return {track.track_id: now - track.first_seen for track in self.tracks if track.hits >= self.min_hits}
+
+
+class KeyframeTracker:
+    """keyframe_interval 프레임마다 한 번만 탐지기를 실행하고 그 사이 프레임은 추적기로 박스를 외삽합니다."""
+
+    def __init__(self, tracker=None, keyframe_interval=1):
+        self.tracker = tracker or PersonTracker()
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.frames = 0
+        self.keyframes = 0
+
+    def step(self, frame, detect, summarize, now=None):
+        """detect(frame) -> (N, 6) 배열, summarize(detections, shape) -> DetectionSummary.
+
+        반환되는 요약에는 track_ids 가 채워지고, count 는 확정 트랙 수 기준입니다.
+        """
+        now = time.monotonic() if now is None else now
+        is_keyframe = self.frames % self.keyframe_interval == 0
+        self.frames += 1
+        if is_keyframe:
+            self.keyframes += 1
+            # 낮은 신뢰도 탐지도 2단계 매칭에 쓰이도록 요약 전 원본 배열을 추적기에 전달
+            detections = np.asarray(detect(frame), dtype=np.float32).reshape(-1, 6)
+            people = detections[detections[:, 5].astype(np.int32) == 0]
+            ids = self.tracker.update(people[:, :4], people[:, 4], now)
+            tracked = people[ids >= 0]
+            ids = ids[ids >= 0]
+        else:
+            ids, boxes, scores = self.tracker.predict(now)
+            tracked = np.concatenate([boxes, scores[:, None], np.zeros((len(ids), 1), np.float32)], axis=1)
+
+        summary = summarize(tracked, frame.shape, conf_threshold=0.0)
+        return summary._replace(track_ids=ids), is_keyframe
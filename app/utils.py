@@ -1,29 +1,63 @@
 import datetime
-import cv2
-from ultralytics import YOLO
+import time
+from .inference import get_engine
+from .detection import summarize_detections, draw_detections
+from .metrics import DetectTimer, observe_stage
+from .scheduler import get_scheduler
 
 # 현재 시간 가져오기
 def get_current_time():
     return datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
-# YOLOv8 모델 로드
-def load_yolov8_model(model_path="yolov8n.pt"):
-    return YOLO(model_path)
+# cctv_id (예: "CCTV3") 에서 웹캠 인덱스 계산
+def get_webcam_index(cctv_id):
+    try:
+        return int(''.join(filter(str.isdigit, cctv_id))) - 1
+    except ValueError:
+        raise ValueError(f"유효하지 않은 CCTV ID: {cctv_id}")
 
-# 실시간 yolo 및 박싱
-def generate_webcam_data(frame):
-    # YOLOv8 모델 로드
-    model = load_yolov8_model()
+# CCTV 의 캡쳐 소스 (source 가 지정되어 있으면 파일/폴더, 아니면 웹캠 인덱스)
+def get_capture_source(cctv):
+    return cctv.source or get_webcam_index(cctv.cctv_id)
+
+# YOLOv8 모델 로드 (프로세스 전역 엔진에 이미 로드된 모델을 반환)
+def load_yolov8_model():
+    return get_engine().model
 
-    # YOLOv8 탐지 수행
-    results = model.predict(source=frame, save=False, verbose=False)
-    detections = results[0].boxes.data.cpu().numpy()
+# 탐지 및 요약 (박싱된 프레임 복사본과 DetectionSummary 반환)
+# 입력 프레임은 캡쳐 링 슬롯의 뷰일 수 있으므로 읽기만 하고, 박싱은 복사본에 그림
+# cctv_id 를 주면 배치 스케줄러로 추론하고 inference / postprocess 단계 시간을 지표로 기록
+# region (InferenceRegion) 을 주면 ROI 만 잘라 축소해 추론하고 박스는 원본 좌표로 되돌림
+def analyze_frame(frame, tracker=None, gate=None, cctv_id=None, region=None):
+    # 움직임이 없으면 탐지를 건너뛰고 마지막 결과 재사용
+    if gate is not None and not gate.should_detect(frame):
+        return draw_detections(frame.copy(), gate.last_summary), gate.last_summary
 
-    # 검출된 객체에 대해 박싱
-    for detection in detections:
-        x1, y1, x2, y2, conf, cls = detection
-        if int(cls) == 0 and conf >= 0.5:  # 사람 클래스 (ID: 0) 및 신뢰도 조건
-            cv2.rectangle(frame, (int(x1), int(y1)), (int(x2), int(y2)), (255, 0, 0), 2)
-            label = f"Person: {conf:.2f}"
-            cv2.putText(frame, label, (int(x1), int(y1) - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 2)
+    # 공유 엔진으로 YOLOv8 탐지 수행 (매 프레임 모델 재생성 없음)
+    engine = get_engine()
+    if cctv_id is not None:
+        # 파이프라인처럼 배치 스케줄러를 거쳐 다른 카메라 프레임과 함께 추론. 같은 카메라의 파이프라인 샘플을
+        # 덮어쓰지 않도록 시청 스트림은 별도 슬롯을 씀
+        scheduler = get_scheduler()
+        infer = lambda f, imgsz=None: scheduler.infer(f"{cctv_id}/stream", f, timeout=10, imgsz=imgsz)
+    else:
+        infer = engine.predict
+    started = time.perf_counter()
+    detect = DetectTimer(region.wrap(infer) if region else infer, cctv_id or "-")
+    if tracker is not None:
+        # 추적기를 쓰면 키프레임에서만 탐지하고 나머지는 트랙 박스를 외삽
+        summary, _ = tracker.step(frame, detect, summarize_detections)
+    else:
+        detections = detect(frame)
+        # 사람 클래스 (ID: 0) 및 신뢰도 조건 필터링과 박스 계산을 배열 연산으로 처리
+        summary = summarize_detections(detections, frame.shape, conf_threshold=engine.conf)
+    if gate is not None:
+        gate.remember(summary)
+    annotated = draw_detections(frame.copy(), summary)
+    observe_stage("postprocess", cctv_id or "-", time.perf_counter() - started - detect.elapsed)
+    return annotated, summary
+
+# 실시간 yolo 및 박싱
+def generate_webcam_data(frame, tracker=None, gate=None, cctv_id=None, region=None):
+    frame, _ = analyze_frame(frame, tracker, gate, cctv_id, region)
     return frame
\ No newline at end of file
@@ -0,0 +1,271 @@
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# 워커의 수치 라이브러리 스레드 수. spawn 된 자식은 _worker_main 을 찾으려고 app 패키지(와 numpy)를 먼저
+# import 하므로 자식 안에서 설정하면 이미 늦음: 부모가 시작 직전에 환경 변수로 넘김
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+_spawn_lock = threading.Lock()
+
+
+@contextmanager
+def thread_environment(threads):
+    """with 블록 안에서 시작한 자식 프로세스가 스레드 수 환경 변수를 물려받도록 잠시 설정합니다."""
+    with _spawn_lock:
+        saved = {var: os.environ.get(var) for var in THREAD_ENV_VARS}
+        os.environ.update({var: str(threads) for var in THREAD_ENV_VARS})
+        try:
+            yield
+        finally:
+            for var, value in saved.items():
+                if value is None:
+                    os.environ.pop(var, None)
+                else:
+                    os.environ[var] = value
+
+
+def attach_shared_memory(name):
+    """다른 프로세스가 만든 공유 메모리에 붙습니다. 붙기만 한 쪽이 종료 시 블록을 지우지 않도록 추적을 끕니다."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python 3.13 미만: resource_tracker 등록을 직접 해제
+        from multiprocessing import resource_tracker
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+def _worker_main(index, config, cores, requests, responses, shm_names):
+    # 스레드 수 환경 변수는 부모가 thread_environment 로 넘겨 줌
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+
+    from .backends import create_backend
+
+    backend = create_backend(
+        config["backend"], config["model_path"], imgsz=config["imgsz"], conf=config["conf"], threads=config["threads"]
+    )
+    if config["backend"] == "torch":
+        import torch
+        torch.set_num_threads(config["threads"])
+
+    pose = None
+    buffers = {slot: attach_shared_memory(name) for slot, name in shm_names.items()}
+    responses.put(("ready", index, None))
+    try:
+        while True:
+            message = requests.get()
+            if message is None:
+                break
+            request_id, slot, shape, imgsz, boxes = message
+            # 공유 메모리 위에 배열을 바로 얹어 프레임 복사/피클링 없이 추론
+            frame = np.ndarray(shape, dtype=np.uint8, buffer=buffers[slot].buf)
+            try:
+                if boxes is None:
+                    result = backend.predict(frame, imgsz=imgsz)
+                else:
+                    # 박스가 있으면 쓰러짐 감지용 포즈 추정 (포즈 모델은 처음 요청될 때 로드)
+                    if pose is None:
+                        from .backends import PoseBackend
+                        pose = PoseBackend(config["pose_model_path"], imgsz=config["pose_imgsz"], conf=config["pose_conf"])
+                    result = pose.predict_pose(frame, boxes, imgsz=imgsz)
+                responses.put((request_id, result, None))
+            except Exception as e:
+                responses.put((request_id, None, repr(e)))
+    finally:
+        for shm in buffers.values():
+            shm.close()
+
+
+class InferenceWorkerPool:
+    """모델을 하나씩 가진 추론 프로세스 풀. Flask 프로세스와는 공유 메모리 프레임 슬롯으로 통신합니다.
+
+    predict / predict_batch 는 InferenceEngine 백엔드와 같은 인터페이스이며 여러 스레드에서 동시에 호출할 수 있습니다.
+    워커가 죽으면 처리 중이던 요청을 실패시키고 슬롯을 돌려받은 뒤 restart_interval 간격으로 다시 띄웁니다.
+    """
+
+    name = "process-pool"
+    thread_safe = True
+
+    def __init__(self, workers=2, threads_per_worker=1, slots_per_worker=2, max_frame_shape=(1080, 1920, 3),
+                 backend="torch", model_path="yolov8n.pt", imgsz=640, conf=0.5, pin_cores=True, timeout=30.0,
+                 pose_model_path="yolov8n-pose.pt", pose_imgsz=256, pose_conf=0.25, startup_timeout=300.0,
+                 restart_interval=5.0):
+        self.workers = workers
+        self.timeout = timeout
+        self.restart_interval = restart_interval
+        self.restarts = 0
+        self.batch_calls = 0
+        self.batch_frames = 0
+        self.slot_size = int(max_frame_shape[0] * max_frame_shape[1] * max_frame_shape[2])
+        self.model = None
+        self._context = multiprocessing.get_context("spawn")
+        self._responses = self._context.Queue()
+        self._requests = [self._context.Queue() for _ in range(workers)]
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._closing = False
+
+        # 슬롯 i 는 워커 i % workers 전용
+        slot_count = workers * slots_per_worker
+        self._buffers = [shared_memory.SharedMemory(create=True, size=self.slot_size) for _ in range(slot_count)]
+        self._free_slots = queue.Queue()
+        for slot in range(slot_count):
+            self._free_slots.put(slot)
+
+        self._config = {
+            "backend": backend, "model_path": model_path, "imgsz": imgsz, "conf": conf, "threads": threads_per_worker,
+            "pose_model_path": pose_model_path, "pose_imgsz": pose_imgsz, "pose_conf": pose_conf,
+        }
+        available = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+        # 코어를 워커마다 겹치지 않게 나눠 고정
+        self._cores = [
+            available[index::workers] if pin_cores and len(available) >= workers else None for index in range(workers)
+        ]
+        self._processes = [self._start_worker(index) for index in range(workers)]
+        self._started_at = [time.monotonic()] * workers
+        self._wait_ready(startup_timeout)
+        self._collector = threading.Thread(target=self._collect, name="inference-results", daemon=True)
+        self._collector.start()
+
+    def _start_worker(self, index):
+        shm_names = {slot: self._buffers[slot].name for slot in range(index, len(self._buffers), self.workers)}
+        process = self._context.Process(
+            target=_worker_main,
+            args=(index, self._config, self._cores[index], self._requests[index], self._responses, shm_names),
+            name=f"inference-worker-{index}",
+            daemon=True,
+        )
+        with thread_environment(self._config["threads"]):
+            process.start()
+        return process
+
+    def _wait_ready(self, timeout):
+        # 모든 워커가 모델 로드를 마칠 때까지 대기. 로드 중 죽은 워커가 있으면 제한 시간까지 기다리지 않고 실패
+        deadline = time.monotonic() + timeout
+        ready = 0
+        while ready < self.workers:
+            try:
+                self._responses.get(timeout=1.0)
+                ready += 1
+                continue
+            except queue.Empty:
+                pass
+            dead = [process for process in self._processes if not process.is_alive()]
+            if dead or time.monotonic() > deadline:
+                self.close()
+                if dead:
+                    codes = ", ".join(f"{process.name} (exit code {process.exitcode})" for process in dead)
+                    raise RuntimeError(f"추론 워커가 모델 로드 중 종료되었습니다: {codes}")
+                raise RuntimeError(f"추론 워커가 {timeout:.0f}초 안에 준비되지 않았습니다")
+
+    def _check_workers(self):
+        # 죽은 워커가 처리하던 요청은 실패시키고 슬롯을 돌려받은 뒤 워커를 다시 띄움
+        for index, process in enumerate(self._processes):
+            if process.is_alive() or self._closing:
+                continue
+            with self._lock:
+                lost = [request_id for request_id, (_, slot) in self._pending.items() if slot % self.workers == index]
+                lost = [self._pending.pop(request_id) for request_id in lost]
+            for future, slot in lost:
+                self._free_slots.put(slot)
+                future.set_exception(RuntimeError(f"추론 워커 {index} 가 종료되었습니다 (exit code {process.exitcode})"))
+            if time.monotonic() - self._started_at[index] < self.restart_interval:
+                # 시작하자마자 죽는 워커를 계속 다시 띄우지 않도록 간격을 둠
+                continue
+            with self._lock:
+                # 죽은 워커의 큐에 남은 요청은 이미 실패 처리했으므로 새 큐로 시작
+                self._requests[index] = self._context.Queue()
+                self._processes[index] = self._start_worker(index)
+                self._started_at[index] = time.monotonic()
+            self.restarts += 1
+
+    def _collect(self):
+        checked_at = time.monotonic()
+        while True:
+            try:
+                message = self._responses.get(timeout=1.0)
+            except queue.Empty:
+                message = ()
+            if message is None:
+                return
+            if time.monotonic() - checked_at >= 1.0:
+                self._check_workers()
+                checked_at = time.monotonic()
+            if not message:
+                continue
+            request_id, detections, error = message
+            with self._lock:
+                future, slot = self._pending.pop(request_id, (None, None))
+            if slot is not None:
+                self._free_slots.put(slot)
+            if future is None:
+                continue
+            if error:
+                future.set_exception(RuntimeError(f"추론 워커 오류: {error}"))
+            else:
+                future.set_result(detections)
+
+    def submit(self, frame, imgsz=None, boxes=None):
+        if frame.nbytes > self.slot_size:
+            raise ValueError(f"프레임이 공유 메모리 슬롯보다 큽니다: {frame.shape}")
+        slot = self._free_slots.get(timeout=self.timeout)
+        # 슬롯에 한 번만 복사하고 워커에는 슬롯 번호와 shape 만 전달
+        np.ndarray(frame.shape, dtype=np.uint8, buffer=self._buffers[slot].buf)[...] = frame
+        request_id = next(self._ids)
+        future = Future()
+        with self._lock:
+            # 워커를 다시 띄우며 큐를 바꾸는 것과 겹치지 않도록 등록과 전송을 함께 잠금 안에서
+            self._pending[request_id] = (future, slot)
+            self._requests[slot % self.workers].put((request_id, slot, frame.shape, imgsz, boxes))
+        return future
+
+    def predict(self, frame, imgsz=None):
+        return self.submit(frame, imgsz=imgsz).result(timeout=self.timeout)
+
+    def predict_batch(self, frames, imgsz=None):
+        # 한 번의 배치 추론이 아니라 프레임별 요청으로 나눠 여러 워커에서 동시에 추론
+        self.batch_calls += 1
+        self.batch_frames += len(frames)
+        futures = [self.submit(frame, imgsz=imgsz) for frame in frames]
+        return [future.result(timeout=self.timeout) for future in futures]
+
+    def predict_pose(self, frame, boxes, imgsz=None):
+        return self.submit(frame, imgsz=imgsz, boxes=boxes).result(timeout=self.timeout)
+
+    def close(self):
+        self._closing = True
+        for requests in self._requests:
+            requests.put(None)
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._responses.put(None)
+        for shm in self._buffers:
+            shm.close()
+            shm.unlink()
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "workers": self.workers,
+            "alive": sum(process.is_alive() for process in self._processes),
+            "restarts": self.restarts,
+            "pending": pending,
+            "free_slots": self._free_slots.qsize(),
+            # predict_batch 는 프레임별 요청으로 나뉘어 워커에 분산됨 (워커 안에서는 배치 추론하지 않음)
+            "predict_batch": {"mode": "per_frame", "calls": self.batch_calls, "frames": self.batch_frames},
+        }
+
@@ -0,0 +1,36 @@
+"""Add (cctv_id, detection_time) indexes to log tables
+
+Revision ID: 3b7c91d2e5a4
+Revises: 1a820aa8e8b1
+Create Date: 2026-10-18 10:12:41.508213
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b7c91d2e5a4'
+down_revision = '1a820aa8e8b1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('detection_logs', schema=None) as batch_op:
+        batch_op.create_index('ix_detection_logs_cctv_id_detection_time', ['cctv_id', 'detection_time', 'id'], unique=False)
+        batch_op.create_index('ix_detection_logs_detection_time', ['detection_time', 'id'], unique=False)
+
+    with op.batch_alter_table('abnormal_behavior_logs', schema=None) as batch_op:
+        batch_op.create_index('ix_abnormal_behavior_logs_cctv_id_detection_time', ['cctv_id', 'detection_time', 'id'], unique=False)
+        batch_op.create_index('ix_abnormal_behavior_logs_detection_time', ['detection_time', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('abnormal_behavior_logs', schema=None) as batch_op:
+        batch_op.drop_index('ix_abnormal_behavior_logs_detection_time')
+        batch_op.drop_index('ix_abnormal_behavior_logs_cctv_id_detection_time')
+
+    with op.batch_alter_table('detection_logs', schema=None) as batch_op:
+        batch_op.drop_index('ix_detection_logs_detection_time')
+        batch_op.drop_index('ix_detection_logs_cctv_id_detection_time')
@@ -0,0 +1,26 @@
+"""Add source to cctvs
+
+Revision ID: 5c3e8a1f7b22
+Revises: 8e2f4a6c1d90
+Create Date: 2026-10-18 14:20:41.538107
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c3e8a1f7b22'
+down_revision = '8e2f4a6c1d90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('cctvs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('source', sa.String(length=255), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('cctvs', schema=None) as batch_op:
+        batch_op.drop_column('source')
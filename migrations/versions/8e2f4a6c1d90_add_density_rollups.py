@@ -0,0 +1,44 @@
+"""Add density_rollups table
+
+Revision ID: 8e2f4a6c1d90
+Revises: 3b7c91d2e5a4
+Create Date: 2026-10-18 11:03:27.114502
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e2f4a6c1d90'
+down_revision = '3b7c91d2e5a4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('density_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('cctv_id', sa.Integer(), nullable=False),
+    sa.Column('granularity', sa.String(length=10), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('sample_count', sa.Integer(), nullable=False),
+    sa.Column('object_count_sum', sa.Integer(), nullable=False),
+    sa.Column('object_count_max', sa.Integer(), nullable=False),
+    sa.Column('normal_seconds', sa.Float(), nullable=False),
+    sa.Column('caution_seconds', sa.Float(), nullable=False),
+    sa.Column('warning_seconds', sa.Float(), nullable=False),
+    sa.Column('danger_seconds', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['cctv_id'], ['cctvs.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('cctv_id', 'granularity', 'bucket_start', name='uq_density_rollups_bucket')
+    )
+    with op.batch_alter_table('density_rollups', schema=None) as batch_op:
+        batch_op.create_index('ix_density_rollups_granularity_bucket_start', ['granularity', 'bucket_start'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('density_rollups', schema=None) as batch_op:
+        batch_op.drop_index('ix_density_rollups_granularity_bucket_start')
+
+    op.drop_table('density_rollups')
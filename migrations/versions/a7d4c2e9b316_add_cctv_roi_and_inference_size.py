@@ -0,0 +1,28 @@
+"""Add roi and inference_size to cctvs
+
+Revision ID: a7d4c2e9b316
+Revises: 5c3e8a1f7b22
+Create Date: 2026-10-18 16:05:12.204871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d4c2e9b316'
+down_revision = '5c3e8a1f7b22'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('cctvs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('roi', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('inference_size', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('cctvs', schema=None) as batch_op:
+        batch_op.drop_column('inference_size')
+        batch_op.drop_column('roi')
@@ -0,0 +1,26 @@
+"""Add density calibration to cctvs
+
+Revision ID: c41f8b7e2a95
+Revises: a7d4c2e9b316
+Create Date: 2026-10-18 17:32:48.915260
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41f8b7e2a95'
+down_revision = 'a7d4c2e9b316'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('cctvs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('calibration', sa.Text(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('cctvs', schema=None) as batch_op:
+        batch_op.drop_column('calibration')
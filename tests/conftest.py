@@ -0,0 +1,44 @@
+import pytest
+from flask import Flask
+
+from app import db
+
+
+@pytest.fixture
+def app(tmp_path):
+    # 운영 설정 대신 임시 SQLite 에 테이블만 만든 앱
+    app = Flask("test")
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'test.db'}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def cctvs(app):
+    from app.models import CCTV
+    cctvs = [CCTV(cctv_id=f"TEST{i + 1}", location=f"test {i + 1}") for i in range(2)]
+    db.session.add_all(cctvs)
+    db.session.commit()
+    return cctvs
+
+
+@pytest.fixture
+def manual_flush():
+    """주기 flush 를 사실상 끈 백그라운드 기록기(LogSink, LastAccessBuffer 등)를 만들고 테스트가 끝나면 닫습니다.
+
+    테스트는 flush() 를 직접 호출하므로 작업 스레드가 중간에 끼어들어 결과가 바뀌지 않습니다.
+    """
+    writers = []
+
+    def make(factory, *args, **options):
+        options.setdefault("flush_interval", 3600)
+        writers.append(factory(*args, **options))
+        return writers[-1]
+
+    yield make
+    for writer in writers:
+        writer.close()
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from app.backends import OnnxBackend, letterbox, nms
+
+
+def test_letterbox_keeps_aspect_ratio_and_pads_evenly():
+    frame = np.zeros((360, 640, 3), dtype=np.uint8)
+    frame[..., 2] = 255  # BGR 빨강
+    tensor, ratio, pad = letterbox(frame, 320)
+    assert tensor.shape == (3, 320, 320) and tensor.dtype == np.float32
+    assert ratio == 0.5
+    assert pad == (0, 70)
+    # 채널은 RGB 순서로 바뀌고 여백은 회색(114)
+    assert tensor[0, 160, 160] == 1.0 and tensor[2, 160, 160] == 0.0
+    assert tensor[:, 0, 0] == pytest.approx([114 / 255] * 3)
+
+
+def test_nms_keeps_best_of_overlapping_boxes():
+    boxes = np.array([[0, 0, 10, 10], [1, 1, 11, 11], [20, 20, 30, 30]], dtype=np.float32)
+    scores = np.array([0.8, 0.9, 0.7], dtype=np.float32)
+    assert nms(boxes, scores, iou_threshold=0.5).tolist() == [1, 2]
+    assert nms(boxes, scores, iou_threshold=0.9).tolist() == [1, 0, 2]
+
+
+@pytest.fixture
+def backend():
+    # 세션 없이 후처리만 확인 (onnxruntime 이 없어도 실행)
+    backend = OnnxBackend.__new__(OnnxBackend)
+    backend.conf, backend.iou = 0.5, 0.7
+    return backend
+
+
+def raw_output(candidates, classes=2):
+    # YOLOv8 출력 형식 (4 + 클래스 수, 후보 수): cx, cy, w, h, 클래스별 점수
+    output = np.zeros((4 + classes, len(candidates)), dtype=np.float32)
+    for i, (cx, cy, w, h, cls, score) in enumerate(candidates):
+        output[:4, i] = [cx, cy, w, h]
+        output[4 + cls, i] = score
+    return output
+
+
+def test_postprocess_restores_original_coordinates(backend):
+    output = raw_output([
+        (160, 160, 40, 80, 0, 0.9),
+        (162, 161, 40, 80, 0, 0.6),   # 같은 사람의 중복 박스
+        (160, 160, 40, 80, 1, 0.8),   # 같은 위치의 다른 클래스는 유지
+        (50, 100, 10, 10, 0, 0.3),    # 신뢰도 미달
+    ])
+    detections = backend._postprocess(output, ratio=0.5, pad=(0, 70), shape=(360, 640, 3))
+    assert detections.tolist() == [[280.0, 100.0, 360.0, 260.0, pytest.approx(0.9), 0.0],
+                                   [280.0, 100.0, 360.0, 260.0, pytest.approx(0.8), 1.0]]
+
+
+def test_postprocess_clips_to_frame_and_handles_no_candidates(backend):
+    detections = backend._postprocess(raw_output([(5, 75, 20, 20, 0, 0.9)]), ratio=0.5, pad=(0, 70), shape=(360, 640, 3))
+    assert detections[0, :4].tolist() == [0.0, 0.0, 30.0, 30.0]
+    assert backend._postprocess(raw_output([]), 0.5, (0, 70), (360, 640, 3)).shape == (0, 6)
@@ -0,0 +1,35 @@
+from app.benchmark import STAGES, StageRecorder, compare
+
+
+def result(fps, p99=None):
+    p99 = p99 or {}
+    return {"fps": {"total": fps}, "stages": {stage: {"p99_ms": p99.get(stage, 10.0)} for stage in STAGES}}
+
+
+def test_compare_reports_throughput_and_latency_regressions():
+    baseline = result(40.0, {"inference": 20.0})
+    assert compare(result(37.0, {"inference": 21.0}), baseline, tolerance=0.1) == []
+    assert compare(result(30.0, {"inference": 30.0}), baseline, tolerance=0.1) == [
+        "fps 40.0 -> 30.0",
+        "inference p99 20.0ms -> 30.0ms",
+    ]
+
+
+def test_compare_ignores_stages_missing_from_baseline():
+    baseline = result(40.0)
+    del baseline["stages"]["encode"]
+    baseline["stages"]["logging"]["p99_ms"] = None
+    assert compare(result(40.0, {"encode": 100.0, "logging": 100.0}), baseline) == []
+
+
+def test_stage_recorder_summary():
+    recorder = StageRecorder()
+    for wall in (0.01, 0.02, 0.03):
+        recorder.record("inference", wall, cpu=0.5)
+    summary = recorder.summary(duration=3.0)
+    assert summary["inference"]["count"] == 3
+    assert summary["inference"]["p50_ms"] == 20.0
+    assert summary["inference"]["cpu_percent"] == 50.0
+    assert summary["encode"] == {"count": 0, "p50_ms": None, "p99_ms": None, "cpu_seconds": 0.0, "cpu_percent": 0.0}
+    recorder.reset()
+    assert recorder.summary(duration=1.0)["inference"]["count"] == 0
@@ -0,0 +1,101 @@
+import time
+
+import numpy as np
+import pytest
+
+import app.capture
+from app.capture import CapturePool
+
+
+class FakeSource:
+    def __init__(self, opened=True):
+        self.opened = opened
+        self.released = False
+        self.count = 0
+
+    def isOpened(self):
+        return self.opened
+
+    def read(self, image=None):
+        time.sleep(0.005)
+        self.count += 1
+        return True, np.full((4, 4, 3), self.count % 255, dtype=np.uint8)
+
+    def release(self):
+        self.released = True
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    """open_source 로 연 (source, FakeSource) 목록."""
+    sources = []
+
+    def open_source(source):
+        sources.append((source, FakeSource()))
+        return sources[-1][1]
+
+    monkeypatch.setattr(app.capture, "open_source", open_source)
+    return sources
+
+
+@pytest.fixture
+def pool():
+    pool = CapturePool(idle_timeout=0.3, backoff_min=0.01, backoff_max=0.02, ring_slots=4)
+    yield pool
+    pool.close_all()
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_readers_share_one_open_device(pool, opened):
+    first = pool.read("CCTV1", "cam")
+    second = pool.read("CCTV1", "cam", after_seq=first[0])
+    assert first[1] is not None and second[0] > first[0]
+    assert pool.get("CCTV1", "cam") is pool.get("CCTV1", "cam")
+    assert len(opened) == 1
+
+
+def test_changed_source_replaces_capture(pool, opened):
+    old = pool.get("CCTV1", "a")
+    pool.read("CCTV1", "a")
+    new = pool.get("CCTV1", "b")
+    assert new is not old
+    assert not old.running
+    assert opened[0][1].released
+
+
+def test_idle_capture_closes_device_and_reopens_on_demand(pool, opened):
+    capture = pool.get("CCTV1", "cam")
+    pool.read("CCTV1", "cam")
+    # idle_timeout 동안 아무도 읽지 않으면 장치를 닫음
+    wait_for(lambda: not capture.running)
+    assert opened[0][1].released
+    assert pool.read("CCTV1", "cam")[1] is not None
+    assert len(opened) == 2
+
+
+def test_failed_open_is_retried_with_backoff(monkeypatch, pool):
+    attempts = []
+
+    def open_source(source):
+        attempts.append(source)
+        return FakeSource(opened=len(attempts) > 2)
+
+    monkeypatch.setattr(app.capture, "open_source", open_source)
+    seq, frame = pool.read("CCTV1", "flaky", timeout=2.0)
+    assert frame is not None
+    assert pool.get("CCTV1", "flaky").reconnects == 2
+
+
+def test_ring_is_published_and_unpublished(opened):
+    published = []
+    pool = CapturePool(ring_slots=4, on_ring=lambda cctv_id, name: published.append((cctv_id, name)))
+    pool.read("CCTV1", "cam")
+    name = pool.get("CCTV1", "cam").ring.name
+    pool.release("CCTV1")
+    assert published == [("CCTV1", name), ("CCTV1", None)]
@@ -0,0 +1,77 @@
+import json
+
+import numpy as np
+import pytest
+
+from app.density import DensityEngine, homography_from_points, parse_calibration, project
+from app.detection import summarize_detections
+
+FRAME_SHAPE = (100, 200, 3)
+TOP = [[0, 0], [1, 0], [1, 0.5], [0, 0.5]]
+BOTTOM = [[0, 0.5], [1, 0.5], [1, 1], [0, 1]]
+
+
+def people(*boxes):
+    detections = [[*box, 0.9, 0] for box in boxes]
+    return summarize_detections(np.array(detections, dtype=np.float32), FRAME_SHAPE)
+
+
+def test_homography_maps_image_quad_to_ground_area():
+    # 원근으로 좁아 보이는 사다리꼴이 지면에서는 10m x 20m 직사각형
+    image_points = [[0.3, 0.2], [0.7, 0.2], [1.0, 1.0], [0.0, 1.0]]
+    ground_points = [[0, 20], [10, 20], [10, 0], [0, 0]]
+    homography = homography_from_points(image_points, ground_points)
+    np.testing.assert_allclose(project(homography, image_points), ground_points, atol=1e-6)
+
+    engine = DensityEngine({"image_points": image_points, "ground_points": ground_points,
+                            "zones": [{"name": "광장", "polygon": image_points}]})
+    assert engine.zones[0].area_m2 == pytest.approx(200)
+
+
+def test_people_are_counted_in_zone_under_their_feet():
+    engine = DensityEngine({"zones": [{"name": "먼 쪽", "polygon": TOP, "area_m2": 10},
+                                      {"name": "가까운 쪽", "polygon": BOTTOM, "area_m2": 10}]})
+    # 첫 번째 박스는 중심이 위쪽 구역이지만 발은 아래쪽 구역에 있음
+    estimate = engine.evaluate(people([40, 10, 60, 80], [140, 5, 160, 30]), FRAME_SHAPE)
+    assert estimate.zones == ("먼 쪽", "가까운 쪽")
+    assert estimate.counts.tolist() == [1, 1]
+    np.testing.assert_allclose(estimate.densities, [0.1, 0.1])
+
+
+def test_levels_follow_the_most_crowded_zone():
+    engine = DensityEngine({"zones": [{"polygon": TOP, "area_m2": 100}, {"polygon": BOTTOM, "area_m2": 2}]})
+    boxes = [[10 + 20 * i, 60, 20 + 20 * i, 95] for i in range(7)]
+    estimate = engine.evaluate(people(*boxes), FRAME_SHAPE)
+    assert estimate.peak == pytest.approx(3.5)
+    assert (estimate.density_level, estimate.overcrowding_level) == ("매우 높음", "주의")
+    assert estimate.to_dict()["구역2"] == {"count": 7, "density": 3.5}
+
+
+def test_empty_frame_is_normal():
+    engine = DensityEngine({"zones": [{"polygon": TOP, "area_m2": 5}]})
+    estimate = engine.evaluate(people(), FRAME_SHAPE)
+    assert estimate.peak == 0
+    assert (estimate.density_level, estimate.overcrowding_level) == ("낮음", "정상")
+
+
+@pytest.mark.parametrize("calibration", [
+    {"zones": [{"polygon": [[0, 0], [1, 1]], "area_m2": 1}]},
+    {"zones": [{"polygon": [[0, 0], [1.5, 0], [1, 1]], "area_m2": 1}]},
+    {"zones": [{"polygon": TOP}]},
+    {"zones": [{"polygon": TOP, "area_m2": 0}]},
+    # 지평선 위의 점은 지면으로 투영할 수 없음
+    {"homography": [[1, 0, 0], [0, 1, 0], [0, -2, 1]], "zones": [{"polygon": TOP}]},
+    {"image_points": [[0, 0], [1, 0], [1, 1]], "ground_points": [[0, 0], [1, 0], [1, 1]]},
+])
+def test_invalid_calibration_raises(calibration):
+    with pytest.raises(ValueError):
+        DensityEngine(calibration)
+
+
+def test_parse_calibration():
+    assert parse_calibration("") is None
+    assert parse_calibration(json.dumps({"zones": [{"polygon": TOP, "area_m2": 4}]}))["zones"][0]["area_m2"] == 4
+    with pytest.raises(ValueError):
+        parse_calibration("{not json")
+    with pytest.raises(ValueError):
+        parse_calibration("[]")
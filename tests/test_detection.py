@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from app.detection import classify_count, detection_log_fields, iou_matrix, summarize_detections
+
+
+def test_summary_keeps_confident_people_only():
+    detections = np.array([
+        [10, 10, 30, 50, 0.9, 0],    # 왼쪽 위
+        [150, 80, 190, 120, 0.7, 0],  # 오른쪽 아래
+        [10, 10, 30, 50, 0.3, 0],    # 신뢰도 미달
+        [50, 50, 90, 90, 0.95, 2],   # 사람이 아님
+    ], dtype=np.float32)
+    summary = summarize_detections(detections, (120, 200, 3), conf_threshold=0.5)
+    assert summary.count == 2
+    assert summary.areas.tolist() == [800.0, 1600.0]
+    assert summary.centroids.tolist() == [[20.0, 30.0], [170.0, 100.0]]
+    assert summary.zone_counts.tolist() == [[1, 0], [0, 1]]
+    assert summary.coverage == pytest.approx(2400 / (120 * 200))
+
+
+def test_empty_detections():
+    summary = summarize_detections(np.zeros((0, 6)), (120, 200, 3))
+    assert summary.count == 0
+    assert summary.zone_counts.sum() == 0
+    assert summary.coverage == 0.0
+
+
+def test_centroid_on_frame_edge_stays_in_grid():
+    summary = summarize_detections([[180, 100, 200, 120, 0.9, 0]], (120, 200, 3), grid=(3, 3))
+    assert summary.zone_counts[2, 2] == 1
+
+
+@pytest.mark.parametrize("count, levels", [
+    (0, ("낮음", "정상")),
+    (4, ("낮음", "정상")),
+    (5, ("보통", "정상")),
+    (10, ("보통", "주의")),
+    (15, ("높음", "주의")),
+    (20, ("높음", "경고")),
+    (30, ("매우 높음", "경고")),
+    (40, ("매우 높음", "위험")),
+])
+def test_classify_count_boundaries(count, levels):
+    assert classify_count(count) == levels
+
+
+def test_log_fields_prefer_tracked_count():
+    summary = summarize_detections([[0, 0, 10, 10, 0.9, 0]], (100, 100, 3))
+    assert detection_log_fields(summary) == {"object_count": 1, "density_level": "낮음", "overcrowding_level": "정상"}
+    assert detection_log_fields(summary, count=12)["overcrowding_level"] == "주의"
+
+
+def test_iou_matrix():
+    ious = iou_matrix([[0, 0, 10, 10]], [[0, 0, 10, 10], [5, 0, 15, 10], [20, 20, 30, 30]])
+    assert ious.shape == (1, 3)
+    assert ious[0].tolist() == pytest.approx([1.0, 1 / 3, 0.0])
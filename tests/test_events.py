@@ -0,0 +1,65 @@
+import json
+from datetime import datetime
+
+from app.events import EventBus, _publish_detections, format_sse, sse_stream
+
+
+def test_last_event_id_replays_missed_events():
+    bus = EventBus(history=10)
+    ids = [bus.publish("detection", {"n": n}) for n in range(3)]
+    subscription = bus.subscribe(last_event_id=ids[0])
+    assert [subscription.get(0)[2]["n"] for _ in range(2)] == [1, 2]
+    assert subscription.get(0) is None
+    # 다시 받은 뒤에는 새 이벤트가 그대로 이어짐
+    bus.publish("detection", {"n": 3})
+    assert subscription.get(0)[0] == ids[-1] + 1
+
+
+def test_new_subscriber_without_id_gets_only_new_events():
+    bus = EventBus()
+    bus.publish("detection", {})
+    subscription = bus.subscribe()
+    assert subscription.get(0) is None
+
+
+def test_replay_is_limited_to_history():
+    bus = EventBus(history=2)
+    for n in range(5):
+        bus.publish("detection", {"n": n})
+    subscription = bus.subscribe(last_event_id=0)
+    assert [subscription.get(0)[2]["n"] for _ in range(2)] == [3, 4]
+
+
+def test_slow_client_drops_oldest_events():
+    bus = EventBus(client_queue=2)
+    subscription = bus.subscribe()
+    for n in range(3):
+        bus.publish("detection", {"n": n})
+    assert bus.stats()["dropped"] == 1
+    assert subscription.get(0)[2] == {"n": 1}
+
+
+def test_sse_stream_formats_events_and_unsubscribes():
+    bus = EventBus()
+    subscription = bus.subscribe()
+    bus.publish("abnormal", {"location": "로비"})
+    stream = sse_stream(subscription, keepalive=0.01)
+    assert next(stream) == "retry: 3000\n\n"
+    assert next(stream) == 'id: 1\nevent: abnormal\ndata: {"location": "로비"}\n\n'
+    assert next(stream) == ": keepalive\n\n"
+    stream.close()
+    assert bus.stats()["subscribers"] == 0
+
+
+def test_committed_detections_are_published_with_location(app, cctvs):
+    bus = EventBus()
+    subscription = bus.subscribe()
+    _publish_detections(bus, [dict(
+        cctv_id=cctvs[0].id, detection_time=datetime(2026, 1, 1, 9, 30), density_level="높음",
+        overcrowding_level="경고", object_count=25, image_url="/static/a.jpg",
+    )])
+    event = subscription.get(0)
+    data = json.loads(format_sse(event).split("data: ")[1])
+    assert data["location"] == "test 1"
+    assert data["alert"] is True
+    assert data["detection_time"] == "2026-01-01T09:30:00"
@@ -0,0 +1,70 @@
+import numpy as np
+
+from app.backends import NUM_KEYPOINTS
+from app.fall_detection import FallDetector, posture_features, KP_LEFT_SHOULDER, KP_RIGHT_SHOULDER, KP_LEFT_HIP, KP_RIGHT_HIP
+
+UPRIGHT = [0, 0, 40, 100]
+LYING = [0, 60, 100, 100]
+
+
+class BoxPose:
+    """키포인트를 찾지 못한 것처럼 NaN 을 돌려줘 박스 비율로만 판단하게 하는 포즈 추정기."""
+
+    def estimate(self, frame, boxes):
+        return np.full((len(boxes), NUM_KEYPOINTS, 3), np.nan, dtype=np.float32)
+
+
+def keypoints(shoulder, hip, conf=0.9):
+    points = np.full((1, NUM_KEYPOINTS, 3), np.nan, dtype=np.float32)
+    points[0, [KP_LEFT_SHOULDER, KP_RIGHT_SHOULDER]] = [*shoulder, conf]
+    points[0, [KP_LEFT_HIP, KP_RIGHT_HIP]] = [*hip, conf]
+    return points
+
+
+def test_posture_uses_torso_angle_when_keypoints_are_confident():
+    boxes = np.array([LYING], dtype=np.float32)
+    angle, _, lying = posture_features(keypoints((50, 10), (52, 60)), boxes)
+    # 박스는 가로로 길어도 몸통이 서 있으면 직립
+    assert angle[0] < 5 and not lying[0]
+    angle, _, lying = posture_features(keypoints((10, 50), (60, 55)), np.array([UPRIGHT], dtype=np.float32))
+    assert angle[0] > 80 and lying[0]
+
+
+def test_posture_falls_back_to_box_aspect():
+    boxes = np.array([UPRIGHT, LYING], dtype=np.float32)
+    _, aspect, lying = posture_features(keypoints((50, 10), (52, 60), conf=0.1).repeat(2, axis=0), boxes)
+    assert np.allclose(aspect, [0.4, 2.5])
+    assert lying.tolist() == [False, True]
+
+
+def update(detector, box, now):
+    return detector.update(None, np.array([box], dtype=np.float32), now=now, track_ids=[7])
+
+
+def test_fall_needs_upright_then_lying_for_min_down():
+    detector = FallDetector(BoxPose(), window=3.0, min_down=1.0)
+    assert update(detector, UPRIGHT, now=0.0) == []
+    assert update(detector, LYING, now=1.0) == []
+    assert detector.flagged() == {7}
+    assert update(detector, LYING, now=1.5) == []
+    assert update(detector, LYING, now=2.0) == [0]
+    assert detector.falls == 1 and detector.flagged() == set()
+    # 계속 누워 있어도 다시 알리지 않음
+    assert update(detector, LYING, now=3.0) == []
+
+
+def test_lying_without_upright_history_is_not_a_fall():
+    detector = FallDetector(BoxPose(), window=3.0, min_down=1.0)
+    for now in (0.0, 1.0, 2.0):
+        assert update(detector, LYING, now=now) == []
+    assert detector.falls == 0
+
+
+def test_getting_up_resets_the_down_timer():
+    detector = FallDetector(BoxPose(), window=3.0, min_down=1.0)
+    update(detector, UPRIGHT, now=0.0)
+    update(detector, LYING, now=0.5)
+    update(detector, UPRIGHT, now=1.0)
+    assert detector.flagged() == set()
+    assert update(detector, LYING, now=1.6) == []
+    assert update(detector, LYING, now=2.6) == [0]
@@ -0,0 +1,146 @@
+import multiprocessing
+import time
+
+import numpy as np
+import pytest
+
+import app.capture
+from app.capture import CameraCapture
+from app.frame_ring import FrameRing
+
+
+def make_frame(value, shape=(4, 6, 3)):
+    return np.full(shape, value, dtype=np.uint8)
+
+
+@pytest.fixture
+def ring():
+    ring = FrameRing(slots=4, max_shape=(4, 6, 3))
+    yield ring
+    ring.close()
+
+
+def test_latest_returns_newest_frame(ring):
+    assert ring.latest() == (0, None)
+    ring.write(make_frame(1))
+    assert ring.write(make_frame(2)) == 2
+    seq, view = ring.latest()
+    assert seq == 2
+    assert (view == 2).all()
+    assert ring.latest(after_seq=2) == (2, None)
+
+
+def test_reserved_slot_is_hidden_until_written(ring):
+    target = ring.reserve((4, 6, 3))
+    # 쓰는 중인 슬롯은 읽는 쪽에 보이지 않음
+    assert not ring.valid(1)
+    target[...] = 7
+    assert ring.write(target) == 1
+    assert ring.valid(1)
+    assert (ring.read(1) == 7).all()
+
+
+def test_smaller_frame_keeps_its_shape(ring):
+    ring.write(make_frame(3, (2, 3, 3)))
+    assert ring.latest()[1].shape == (2, 3, 3)
+
+
+def test_frame_larger_than_slot_is_rejected(ring):
+    with pytest.raises(ValueError):
+        ring.reserve((8, 6, 3))
+
+
+def test_lapped_slot_is_no_longer_valid(ring):
+    ring.write(make_frame(1))
+    view = ring.read(1)
+    # 슬롯 4개를 한 바퀴 돌면 seq 5 가 seq 1 의 슬롯을 덮어씀
+    for value in range(2, 6):
+        ring.write(make_frame(value))
+    assert not ring.valid(1)
+    assert ring.read(1) is None
+    assert ring.valid(5)
+    # 먼저 받아 둔 뷰는 덮어쓴 내용을 보게 되므로 valid 로 확인해야 함
+    assert (view == 5).all()
+
+
+def _read_attached(name):
+    reader = FrameRing.attach(name)
+    try:
+        seq, view = reader.latest()
+        return seq, int(view[0, 0, 0]), reader.max_shape
+    finally:
+        reader.close()
+
+
+def test_attached_reader_sees_writer_frames(ring):
+    ring.write(make_frame(9))
+    # 다른 프로세스에서 이름으로 붙어 같은 슬롯을 읽음
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        assert pool.apply(_read_attached, (ring.name,)) == (1, 9, ring.max_shape)
+
+
+def test_start_seq_continues_numbering():
+    ring = FrameRing(slots=2, max_shape=(2, 2, 3), start_seq=10)
+    try:
+        assert ring.latest(after_seq=10) == (10, None)
+        assert ring.write(make_frame(1, (2, 2, 3))) == 11
+    finally:
+        ring.close()
+
+
+def test_closed_ring_reads_nothing():
+    ring = FrameRing(slots=2, max_shape=(2, 2, 3))
+    ring.write(make_frame(1, (2, 2, 3)))
+    view = ring.latest()[1]
+    ring.close()
+    assert ring.latest() == (0, None)
+    assert ring.read(1) is None
+    assert not ring.valid(1)
+    # 읽는 쪽이 들고 있던 뷰는 닫은 뒤에도 읽을 수 있음
+    assert (view == 1).all()
+    ring.close()
+
+
+class _ResizingSource:
+    """처음 몇 프레임은 작게, 이후에는 크게 내는 캡쳐 소스 (해상도 변경 재현용)."""
+
+    def __init__(self, switch_after=3):
+        self.switch_after = switch_after
+        self.count = 0
+
+    def isOpened(self):
+        return True
+
+    def read(self, image=None):
+        time.sleep(0.005)
+        self.count += 1
+        shape = (4, 4, 3) if self.count <= self.switch_after else (8, 8, 3)
+        return True, make_frame(self.count % 255, shape)
+
+    def release(self):
+        pass
+
+
+def test_capture_replaces_ring_without_restarting_seq(monkeypatch):
+    monkeypatch.setattr(app.capture, "open_source", lambda source: _ResizingSource())
+    capture = CameraCapture("TEST", "resizing", ring_slots=4)
+    try:
+        seq, frame = capture.read(timeout=2.0)
+        assert frame is not None and frame.shape == (4, 4, 3)
+        small_ring = capture.ring
+        deadline = time.monotonic() + 2.0
+        while frame.shape != (8, 8, 3) and time.monotonic() < deadline:
+            previous = seq
+            seq, frame = capture.read(after_seq=seq, timeout=2.0, copy=False)
+            assert frame is not None
+            # 새 링도 이전 링의 seq 를 이어서 사용
+            assert seq > previous
+        assert frame.shape == (8, 8, 3)
+        assert not frame.flags.writeable
+        assert capture.valid(seq)
+        assert capture.ring is not small_ring
+        # 읽는 쪽이 없으므로 다음 프레임에서 교체된 링을 닫음
+        capture.read(after_seq=seq, timeout=2.0)
+        assert small_ring.closed
+    finally:
+        capture.close()
@@ -0,0 +1,48 @@
+import logging
+
+import pytest
+from flask import Flask
+
+import app.inference
+from app.inference import InferenceEngine, get_engine, init_engine
+
+
+@pytest.fixture
+def engine_app(monkeypatch):
+    # 전역 엔진을 비운 상태에서 시작하고 테스트가 끝나면 원래대로
+    monkeypatch.setattr(app.inference, "_engine", None)
+    monkeypatch.setattr(app.inference, "_engine_options", None)
+    flask_app = Flask("test")
+    flask_app.config.update(
+        APP_ROLE="all", YOLO_MODEL_PATH="yolov8n.pt", YOLO_IMGSZ=640, YOLO_CONF=0.5, DETECTOR_BACKEND="torch",
+        DETECTOR_THREADS=0, INFERENCE_WORKERS=0, INFERENCE_WORKER_THREADS=1, INFERENCE_MAX_FRAME_SHAPE=(1080, 1920, 3),
+        FALL_POSE_MODEL_PATH="yolov8n-pose.pt", FALL_POSE_IMGSZ=256, TRACK_LOW_CONF=0.1, YOLO_PRELOAD=False,
+        YOLO_WARMUP=False,
+    )
+    return flask_app
+
+
+def test_engine_is_shared_per_process(engine_app):
+    engine = init_engine(engine_app)
+    assert isinstance(engine, InferenceEngine)
+    assert init_engine(engine_app) is engine
+    assert get_engine() is engine
+    # 모델은 첫 추론 때 로드 (YOLO_PRELOAD 가 꺼져 있음)
+    assert engine.load_time is None
+
+
+def test_mismatched_options_keep_existing_engine_and_warn(engine_app, caplog):
+    engine = init_engine(engine_app)
+    engine_app.config.update(YOLO_IMGSZ=320, YOLO_CONF=0.4)
+    with caplog.at_level(logging.WARNING):
+        assert init_engine(engine_app) is engine
+    assert "imgsz: 640 -> 320" in caplog.text
+    assert "conf: 0.5 -> 0.4" in caplog.text
+    assert engine.imgsz == 640
+
+
+def test_default_engine_created_before_init_is_reported(engine_app, caplog):
+    engine = get_engine()
+    with caplog.at_level(logging.WARNING):
+        assert init_engine(engine_app) is engine
+    assert "기본값으로 생성됨" in caplog.text
@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app import db
+from app.last_access import LastAccessBuffer
+from app.models import CCTV
+
+NOW = datetime(2024, 5, 1, 10, 0)
+
+
+@pytest.fixture
+def buffer(app, manual_flush):
+    return manual_flush(LastAccessBuffer, app)
+
+
+@pytest.fixture
+def updates(app):
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("UPDATE"):
+            statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(db.engine, "before_cursor_execute", record)
+
+
+def last_access(cctv_pk):
+    db.session.expire_all()
+    return db.session.get(CCTV, cctv_pk).last_access
+
+
+def test_flush_writes_newest_times_in_one_update(buffer, cctvs, updates):
+    first, second = (cctv.id for cctv in cctvs)
+    buffer.record(first, NOW)
+    buffer.record(first, NOW + timedelta(seconds=5))
+    buffer.record(first, NOW + timedelta(seconds=2))
+    buffer.record(second, NOW + timedelta(seconds=1))
+
+    assert buffer.flush() == 2
+    assert len(updates) == 1
+    assert "CASE" in updates[0].upper()
+    assert last_access(first) == NOW + timedelta(seconds=5)
+    assert last_access(second) == NOW + timedelta(seconds=1)
+    stats = buffer.stats()
+    assert (stats["recorded"], stats["flushed"], stats["flushes"], stats["pending"]) == (4, 2, 1, 0)
+    assert buffer.flush() == 0
+
+
+def test_older_time_does_not_overwrite_newer_db_value(buffer, cctvs):
+    cctv = cctvs[0]
+    # 다른 워커 프로세스가 먼저 더 최근 시각을 기록한 상황
+    cctv.last_access = NOW + timedelta(minutes=1)
+    db.session.commit()
+    buffer.record(cctv.id, NOW)
+    buffer.flush()
+    assert last_access(cctv.id) == NOW + timedelta(minutes=1)
+
+
+def test_merge_prefers_the_newer_of_pending_and_db(buffer):
+    buffer.record(1, NOW)
+    assert buffer.merge(1, None) == NOW
+    assert buffer.merge(1, NOW - timedelta(seconds=1)) == NOW
+    assert buffer.merge(1, NOW + timedelta(seconds=1)) == NOW + timedelta(seconds=1)
+    assert buffer.merge(2, None) is None
+
+
+def test_failed_flush_keeps_pending_times(buffer, cctvs, monkeypatch):
+    cctv_pk = cctvs[0].id
+    buffer.record(cctv_pk, NOW)
+
+    def fail(pending):
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(buffer, "_update", fail)
+    assert buffer.flush() == 0
+    assert buffer.stats()["failed"] == 1
+    assert buffer.merge(cctv_pk, None) == NOW
+
+    monkeypatch.undo()
+    assert buffer.flush() == 1
+    assert last_access(cctv_pk) == NOW
@@ -0,0 +1,75 @@
+import pytest
+
+from app.log_sink import LogSink
+from app.models import DetectionLog
+
+
+@pytest.fixture
+def make_sink(app, manual_flush):
+    # 테스트마다 배치 크기, 대기열 크기, 재시도 설정을 바꿔 만듦
+    return lambda **options: manual_flush(LogSink, app, **options)
+
+
+def add_log(sink, cctv_pk, object_count=1):
+    return sink.add(DetectionLog, cctv_id=cctv_pk, density_level="낮음", overcrowding_level="정상",
+                    object_count=object_count, image_url="test")
+
+
+def test_flush_writes_batch(make_sink, cctvs):
+    sink = make_sink()
+    for count in range(5):
+        add_log(sink, cctvs[0].id, count)
+    assert sink.flush() == 5
+    assert DetectionLog.query.count() == 5
+    stats = sink.stats()
+    assert (stats["queue_depth"], stats["flushed"], stats["flushes"], stats["failed"]) == (0, 5, 1, 0)
+
+
+def test_bad_rows_are_dropped_without_losing_the_batch(make_sink, cctvs):
+    sink = make_sink()
+    for count in range(10):
+        # object_count 는 NOT NULL 이라 두 건은 IntegrityError
+        add_log(sink, cctvs[0].id, None if count in (3, 7) else count)
+    assert sink.flush() == 8
+    assert sorted(log.object_count for log in DetectionLog.query) == [0, 1, 2, 4, 5, 6, 8, 9]
+    stats = sink.stats()
+    assert (stats["flushed"], stats["flushes"], stats["failed"], stats["retries"]) == (8, 1, 2, 0)
+
+
+def test_transient_error_is_retried(make_sink, cctvs, monkeypatch):
+    sink = make_sink(retry_backoff=0)
+    add_log(sink, cctvs[0].id)
+    insert = sink._insert
+    calls = []
+
+    def flaky(batch):
+        calls.append(len(batch))
+        if len(calls) == 1:
+            raise RuntimeError("connection reset")
+        return insert(batch)
+
+    monkeypatch.setattr(sink, "_insert", flaky)
+    assert sink.flush() == 1
+    assert calls == [1, 1]
+    assert sink.stats()["retries"] == 1
+
+
+def test_full_queue_drops_new_records(make_sink, cctvs):
+    sink = make_sink(max_queue=2)
+    assert add_log(sink, cctvs[0].id)
+    assert add_log(sink, cctvs[0].id)
+    assert not add_log(sink, cctvs[0].id)
+    assert sink.stats()["dropped"] == 1
+
+
+def test_hooks_run_around_commit(make_sink, cctvs):
+    sink = make_sink()
+    seen = []
+    # before_commit 은 INSERT 와 같은 트랜잭션이라 아직 커밋되지 않은 행도 보임
+    sink.add_hook(DetectionLog, before_commit=lambda rows: seen.append(("before", len(rows), DetectionLog.query.count())),
+                  after_commit=lambda rows: seen.append(("after", len(rows))))
+    add_log(sink, cctvs[0].id)
+    add_log(sink, cctvs[1].id)
+    sink.flush()
+    assert seen == [("before", 2, 2), ("after", 2)]
+    assert DetectionLog.query.count() == 2
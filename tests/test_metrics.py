@@ -0,0 +1,68 @@
+import urllib.error
+import urllib.request
+
+import pytest
+
+from app.metrics import Counter, Histogram, Registry, authorized, serve_metrics
+
+
+def test_histogram_is_rendered_cumulatively():
+    registry = Registry()
+    histogram = registry.register(Histogram("stage_seconds", "Stage time.", ("stage",), buckets=(0.1, 1.0)))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value, "inference")
+    lines = registry.render().splitlines()
+    assert lines[:2] == ["# HELP stage_seconds Stage time.", "# TYPE stage_seconds histogram"]
+    assert lines[2:6] == [
+        'stage_seconds_bucket{stage="inference",le="0.1"} 1',
+        'stage_seconds_bucket{stage="inference",le="1.0"} 3',
+        'stage_seconds_bucket{stage="inference",le="+Inf"} 4',
+        'stage_seconds_count{stage="inference"} 4',
+    ]
+    assert lines[6] == 'stage_seconds_sum{stage="inference"} 4.25'
+
+
+def test_label_values_are_escaped():
+    registry = Registry()
+    counter = registry.register(Counter("dropped_total", "Dropped.", ("cctv_id",)))
+    counter.inc('a"b\\c')
+    counter.inc('a"b\\c', amount=2)
+    assert 'dropped_total{cctv_id="a\\"b\\\\c"} 3' in registry.render()
+
+
+def test_failing_collector_is_skipped():
+    registry = Registry()
+    registry.add_collector(lambda: 1 / 0)
+    registry.add_collector(lambda: [("queue_depth", "gauge", "Depth.", (), [((), 5)]), ("idle", "gauge", "Idle.", (), [((), None)])])
+    assert registry.render() == (
+        "# HELP queue_depth Depth.\n# TYPE queue_depth gauge\nqueue_depth 5\n"
+        "# HELP idle Idle.\n# TYPE idle gauge\n"
+    )
+
+
+@pytest.mark.parametrize("remote_addr, authorization, token, allow, expected", [
+    ("127.0.0.1", None, None, ("127.0.0.1",), True),
+    ("10.0.0.5", None, None, ("127.0.0.1",), False),
+    ("10.0.0.5", "Bearer secret", "secret", (), True),
+    ("10.0.0.5", "Bearer wrong", "secret", (), False),
+    # 토큰을 설정하지 않았으면 빈 Bearer 로 통과할 수 없음
+    ("10.0.0.5", "Bearer ", "", (), False),
+])
+def test_authorized(remote_addr, authorization, token, allow, expected):
+    assert authorized(remote_addr, authorization, token, allow) is expected
+
+
+def test_metrics_server_requires_token():
+    server = serve_metrics(0, token="secret", allow=())
+    url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+    try:
+        with pytest.raises(urllib.error.HTTPError) as denied:
+            urllib.request.urlopen(url, timeout=5)
+        assert denied.value.code == 403
+        request = urllib.request.Request(url, headers={"Authorization": "Bearer secret"})
+        with urllib.request.urlopen(request, timeout=5) as response:
+            assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            assert "# TYPE cctv_stage_seconds histogram" in response.read().decode()
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from flask import Flask
+
+from app.motion import MotionGate, motion_gate_for, parse_overrides
+
+STILL = np.full((120, 160, 3), 80, dtype=np.uint8)
+
+
+def moved():
+    frame = STILL.copy()
+    frame[40:80, 60:100] = 255
+    return frame
+
+
+def test_still_frames_are_skipped_until_max_interval():
+    gate = MotionGate(threshold=0.01, max_interval=5.0)
+    # 첫 프레임과 결과를 기억하기 전에는 항상 탐지
+    assert gate.should_detect(STILL, now=0.0)
+    assert gate.should_detect(STILL, now=0.1)
+    gate.remember("summary")
+    assert not gate.should_detect(STILL, now=0.2)
+    assert not gate.should_detect(STILL, now=4.9)
+    assert gate.should_detect(STILL, now=5.1)
+    assert gate.stats()["skipped"] == 2
+    assert gate.skip_ratio == pytest.approx(2 / 5)
+
+
+def test_motion_triggers_detection():
+    gate = MotionGate(threshold=0.01, max_interval=60.0)
+    gate.should_detect(STILL, now=0.0)
+    gate.remember("summary")
+    assert gate.should_detect(moved(), now=1.0)
+    assert gate.last_motion > 0.01
+    assert not gate.should_detect(moved(), now=2.0)
+
+
+def test_resolution_change_counts_as_motion():
+    gate = MotionGate(max_interval=60.0)
+    gate.should_detect(STILL, now=0.0)
+    gate.remember("summary")
+    assert gate.should_detect(np.full((240, 160, 3), 80, dtype=np.uint8), now=1.0)
+
+
+def test_gate_is_created_only_for_configured_cameras():
+    app = Flask("test")
+    app.config.update(
+        MOTION_GATE_CCTVS=["CCTV1"], MOTION_THRESHOLD=0.01, MOTION_MAX_INTERVAL=5.0,
+        MOTION_GATE_OVERRIDES=parse_overrides('{"CCTV1": {"max_interval": 10}}'),
+    )
+    assert motion_gate_for(app, "CCTV2") is None
+    assert motion_gate_for(app, "CCTV1").max_interval == 10
+    app.config['MOTION_GATE_CCTVS'] = ["*"]
+    assert motion_gate_for(app, "CCTV2").max_interval == 5.0
+
+
+def test_invalid_overrides_are_rejected():
+    with pytest.raises(RuntimeError):
+        parse_overrides("{not json")
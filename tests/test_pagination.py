@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models import DetectionLog
+from app.pagination import decode_cursor, encode_cursor, keyset_paginate
+
+
+def test_cursor_roundtrip():
+    time = datetime(2024, 5, 1, 10, 0, 0, 123456)
+    assert decode_cursor(encode_cursor(time, 42)) == (time, 42)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", encode_cursor(datetime(2024, 5, 1), 1)[:-3]])
+def test_invalid_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+@pytest.fixture
+def logs(cctvs):
+    base = datetime(2024, 5, 1, 10, 0)
+    # 같은 탐지 시각이 겹치는 로그가 있어도 id 로 순서가 정해져야 함
+    times = [base, base, base + timedelta(seconds=1), base + timedelta(seconds=1), base + timedelta(seconds=1),
+             base + timedelta(seconds=2), base + timedelta(seconds=3)]
+    logs = [
+        DetectionLog(detection_time=time, cctv_id=cctvs[0].id, density_level="낮음", overcrowding_level="정상",
+                     object_count=0, image_url="test")
+        for time in times
+    ]
+    db.session.add_all(logs)
+    db.session.commit()
+    return logs
+
+
+def paginate(**options):
+    return keyset_paginate(DetectionLog.query, DetectionLog.detection_time, DetectionLog.id, limit=3, **options)
+
+
+def ids(page):
+    return [log.id for log in page.items]
+
+
+def test_pages_forward_and_back_without_gaps(logs):
+    expected = [log.id for log in sorted(logs, key=lambda log: (log.detection_time, log.id), reverse=True)]
+
+    first = paginate()
+    assert ids(first) == expected[:3]
+    assert first.prev_cursor is None
+    second = paginate(after=first.next_cursor)
+    assert ids(second) == expected[3:6]
+    third = paginate(after=second.next_cursor)
+    assert ids(third) == expected[6:]
+    assert third.next_cursor is None
+
+    back = paginate(before=third.prev_cursor)
+    assert ids(back) == expected[3:6]
+    assert ids(paginate(before=back.prev_cursor)) == expected[:3]
+    assert paginate(before=back.prev_cursor).prev_cursor is None
+
+
+def test_ascending_order(logs):
+    expected = [log.id for log in sorted(logs, key=lambda log: (log.detection_time, log.id))]
+    first = paginate(descending=False)
+    second = paginate(after=first.next_cursor, descending=False)
+    assert ids(first) + ids(second) == expected[:6]
+    assert ids(paginate(before=second.prev_cursor, descending=False)) == expected[:3]
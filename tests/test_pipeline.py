@@ -0,0 +1,126 @@
+import logging
+
+import numpy as np
+import pytest
+
+from app.pipeline import CameraPipeline
+from test_fall_detection import BoxPose
+
+# 추적기가 같은 사람으로 이어 붙일 만큼 겹치는 (IoU 0.4) 직립 / 누움 박스
+UPRIGHT = [0, 0, 60, 100]
+LYING = [0, 40, 110, 100]
+
+
+@pytest.fixture
+def make_pipeline(app):
+    app.config.update(
+        FALL_ENABLED=True, FALL_WINDOW=3.0, FALL_MIN_DOWN=1.0, FALL_MAX_PEOPLE=16, FALL_CONFIRM_FPS=5.0,
+        TRACK_MAX_AGE=1.0, TRACK_KEYFRAME_INTERVAL=1, YOLO_CONF=0.5, TRACK_LOW_CONF=0.1,
+        PIPELINE_SAMPLE_FPS=1.0, MOTION_GATE_CCTVS=[],
+    )
+
+    def make(**options):
+        pipeline = CameraPipeline(app, 1, "TEST1", "test", "synthetic", **options)
+        pipeline.fall_detector.pose = BoxPose()
+        return pipeline
+
+    return make
+
+
+def track(pipeline, box, now):
+    # 파이프라인 샘플처럼 추적기와 쓰러짐 판단을 갱신
+    boxes = np.array([box], dtype=np.float32)
+    ids = pipeline.tracker.tracker.update(boxes, np.array([0.9]), now)
+    return pipeline.fall_detector.update(None, boxes[ids >= 0], now=now, track_ids=ids[ids >= 0])
+
+
+def test_flagged_person_is_confirmed_between_samples(make_pipeline):
+    pipeline = make_pipeline(sample_fps=0.5)
+    logged = []
+    pipeline.log_fall = lambda frame, box: logged.append(box.tolist())
+    frame = np.zeros((120, 160, 3), dtype=np.uint8)
+
+    track(pipeline, UPRIGHT, now=99.5)
+    track(pipeline, UPRIGHT, now=100.0)
+    track(pipeline, LYING, now=100.1)
+    assert pipeline.fall_detector.flagged() == {1}
+    # 다음 샘플(2초 뒤)을 기다리지 않고 외삽한 박스로 포즈만 다시 확인
+    assert pipeline.confirm_falls(frame, now=100.6) == []
+    assert pipeline.confirm_falls(frame, now=101.2) == [0]
+    assert len(logged) == 1
+    assert pipeline.fall_confirms == 2
+    assert pipeline.confirm_falls(frame, now=101.4) == []
+    assert pipeline.fall_confirms == 2
+
+
+def test_confirm_rate_can_be_disabled(make_pipeline, app):
+    app.config['FALL_CONFIRM_FPS'] = 0
+    pipeline = make_pipeline()
+    assert pipeline.fall_confirm_interval is None
+    assert pipeline._confirm_until(capture=None, seq=3, deadline=float("inf")) == 3
+
+
+class FakeWriter:
+    def save(self, frame, name):
+        return f"{name}.jpg"
+
+    def url_for(self, file_name):
+        return f"/static/{file_name}"
+
+
+class FakeSink:
+    def __init__(self):
+        self.rows = []
+        self.full = False
+
+    def add(self, model, **fields):
+        if self.full:
+            return False
+        self.rows.append(fields)
+        return True
+
+
+@pytest.fixture
+def sink(monkeypatch):
+    import app.pipeline
+    sink = FakeSink()
+    monkeypatch.setattr(app.pipeline, "get_snapshot_writer", FakeWriter)
+    monkeypatch.setattr(app.pipeline, "get_log_sink", lambda: sink)
+    # 운영 탐지 로그 파일에 테스트 기록이 남지 않도록
+    monkeypatch.setattr(app.pipeline, "detection_logger", logging.getLogger("test.detection"))
+    return sink
+
+
+def people(count):
+    return lambda frame, imgsz=None: np.array([[i * 20, 0, i * 20 + 15, 40, 0.9, 0] for i in range(count)], dtype=np.float32)
+
+
+def test_log_is_written_only_when_levels_change(make_pipeline, sink):
+    pipeline = make_pipeline(heartbeat=3600)
+    frame = np.zeros((120, 200, 3), dtype=np.uint8)
+    assert pipeline.process(frame, people(1)) is not None
+    assert pipeline.process(frame, people(1)) is None
+    # 확정된 트랙이 5명이 되면 밀집 정도가 바뀌어 기록
+    pipeline.process(frame, people(6))
+    log = pipeline.process(frame, people(6))
+    assert log["object_count"] == 6 and log["density_level"] == "보통"
+    assert len(sink.rows) == pipeline.logs_written == 2
+
+
+def test_heartbeat_logs_unchanged_levels(make_pipeline):
+    pipeline = make_pipeline(heartbeat=60)
+    assert pipeline._should_log(("낮음", "정상"), now=0.0)
+    pipeline.last_levels, pipeline.last_logged_at = ("낮음", "정상"), 0.0
+    assert not pipeline._should_log(("낮음", "정상"), now=59.0)
+    assert pipeline._should_log(("낮음", "정상"), now=60.0)
+    assert pipeline._should_log(("보통", "정상"), now=1.0)
+
+
+def test_full_sink_retries_on_next_sample(make_pipeline, sink):
+    pipeline = make_pipeline(heartbeat=3600)
+    frame = np.zeros((120, 200, 3), dtype=np.uint8)
+    sink.full = True
+    assert pipeline.process(frame, people(1)) is None
+    assert pipeline.last_levels is None
+    sink.full = False
+    assert pipeline.process(frame, people(1)) is not None
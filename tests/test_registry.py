@@ -0,0 +1,54 @@
+from datetime import datetime
+
+from app import db
+from app.models import CCTV
+from app.registry import CCTVRegistry
+
+
+def add_cctv(cctv_id):
+    db.session.add(CCTV(cctv_id=cctv_id, location="test"))
+    db.session.commit()
+
+
+def test_list_is_served_from_cache_until_invalidated(app, cctvs):
+    registry = CCTVRegistry(app, ttl=3600)
+    assert [record.cctv_id for record in registry.all()] == ["TEST1", "TEST2"]
+    add_cctv("TEST3")
+    # ttl 안에서는 DB 를 다시 읽지 않음
+    assert len(registry.all()) == 2
+    assert registry.get("TEST3") is None
+    registry.invalidate()
+    assert registry.get("TEST3").location == "test"
+    assert registry.stats()["reloads"] == 2
+
+
+def test_fragment_is_rendered_once_per_generation(app, cctvs):
+    registry = CCTVRegistry(app, ttl=3600)
+    renders = []
+
+    def render():
+        renders.append(1)
+        return f"<table>{len(registry.all())}</table>"
+
+    assert registry.fragment("cctv_list", render) == "<table>2</table>"
+    assert registry.fragment("cctv_list", render) == "<table>2</table>"
+    assert len(renders) == 1
+    # 최근 접근 시간만 바뀌면 조각은 그대로 재사용
+    registry.touch("TEST1", datetime(2026, 1, 1))
+    registry.fragment("cctv_list", render)
+    assert len(renders) == 1
+    assert registry.get("TEST1").last_access == datetime(2026, 1, 1)
+    add_cctv("TEST3")
+    registry.invalidate()
+    assert registry.fragment("cctv_list", render) == "<table>3</table>"
+    assert len(renders) == 2
+
+
+def test_stamp_file_invalidates_other_workers(app, cctvs, tmp_path):
+    stamp = str(tmp_path / "cctv.stamp")
+    this_worker = CCTVRegistry(app, ttl=3600, stamp_path=stamp)
+    other_worker = CCTVRegistry(app, ttl=3600, stamp_path=stamp)
+    assert len(other_worker.all()) == 2
+    add_cctv("TEST3")
+    this_worker.invalidate()
+    assert len(other_worker.all()) == 3
@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.roi import InferenceRegion, format_roi, parse_inference_size, parse_roi
+
+
+def test_parse_roi():
+    assert parse_roi(" ") is None
+    assert parse_roi("0.25,0,1,0.5") == (0.25, 0.0, 1.0, 0.5)
+    assert format_roi(parse_roi("0.25,0,1,0.5")) == "0.25,0,1,0.5"
+
+
+@pytest.mark.parametrize("value", ["0,0,1", "a,b,c,d", "0.5,0,0.5,1", "0,0,1.2,1", "-0.1,0,1,1"])
+def test_invalid_roi_raises(value):
+    with pytest.raises(ValueError):
+        parse_roi(value)
+
+
+def test_parse_inference_size_rounds_to_stride():
+    assert parse_inference_size("") is None
+    assert parse_inference_size("640") == 640
+    assert parse_inference_size(330) == 320
+    with pytest.raises(ValueError):
+        parse_inference_size(100)
+
+
+def test_from_cctv():
+    assert InferenceRegion.from_cctv(SimpleNamespace(roi=None, inference_size=None)) is None
+    region = InferenceRegion.from_cctv(SimpleNamespace(roi="0,0,0.5,0.5", inference_size=320))
+    assert region == InferenceRegion((0.0, 0.0, 0.5, 0.5), 320)
+
+
+def test_crop_box():
+    assert InferenceRegion().crop_box((720, 1280, 3)) == (0, 0, 1280, 720)
+    assert InferenceRegion((0.25, 0.5, 0.75, 1.0)).crop_box((720, 1280, 3)) == (320, 360, 960, 720)
+    # 아주 작은 ROI 도 1픽셀은 남음
+    assert InferenceRegion((0.5, 0.5, 0.5001, 0.5001)).crop_box((100, 100, 3)) == (50, 50, 51, 51)
+
+
+def test_prepare_crops_without_copy_when_no_resize_is_needed():
+    frame = np.zeros((100, 200, 3), dtype=np.uint8)
+    image, ratio, offset = InferenceRegion((0.5, 0.0, 1.0, 0.5)).prepare(frame)
+    assert image.shape == (50, 100, 3)
+    assert np.shares_memory(image, frame)
+    assert (ratio, offset) == (1.0, (100, 0))
+
+
+def test_restore_maps_boxes_back_to_the_frame():
+    frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+    region = InferenceRegion((0.5, 0.5, 1.0, 1.0), 320)
+    image, ratio, offset = region.prepare(frame)
+    # 640x360 영역을 긴 변 320 으로 축소
+    assert image.shape == (180, 320, 3)
+    assert ratio == pytest.approx(0.5)
+    restored = region.restore([[10, 20, 30, 40, 0.9, 0]], ratio, offset)
+    np.testing.assert_allclose(restored, [[660, 400, 700, 440, 0.9, 0]])
+    assert len(region.restore(np.zeros((0, 6)), ratio, offset)) == 0
+
+
+def test_wrap_passes_size_and_restores_coordinates():
+    frame = np.zeros((400, 400, 3), dtype=np.uint8)
+    calls = []
+
+    def detect(image, imgsz=None):
+        calls.append((image.shape, imgsz))
+        # 잘라낸 이미지 전체를 덮는 박스
+        return [[0, 0, image.shape[1], image.shape[0], 0.8, 0]]
+
+    detections = InferenceRegion((0.25, 0.25, 0.75, 0.75), 160).wrap(detect)(frame)
+    assert calls == [((160, 160, 3), 160)]
+    np.testing.assert_allclose(detections, [[100, 100, 300, 300, 0.8, 0]])
@@ -0,0 +1,156 @@
+import queue
+import threading
+import time
+
+import pytest
+
+import app.roles
+from app.roles import InferenceServer, RingPublisher, parse_address
+
+
+class FakeRing:
+    """seq 가 overwritten 에 들어 있으면 덮어써진 것으로 보는 링."""
+
+    def __init__(self, name):
+        self.name = name
+        self.overwritten = set()
+        self.closed = False
+
+    def read(self, seq):
+        return None if seq in self.overwritten else f"{self.name}:{seq}"
+
+    def valid(self, seq):
+        return seq not in self.overwritten
+
+    def close(self):
+        self.closed = True
+
+
+class FakeEngine:
+    def __init__(self):
+        self.batches = []
+
+    def predict_batch(self, frames, imgsz=None):
+        self.batches.append((imgsz, list(frames)))
+        return [f"det({frame})" for frame in frames]
+
+
+class DroppedQueue:
+    """큐 서버가 재시작되어 연결이 끊긴 요청 큐 프록시."""
+
+    def get(self, timeout=None):
+        raise EOFError
+
+    def get_nowait(self):
+        raise EOFError
+
+
+class FakeBroker:
+    def __init__(self, *request_queues):
+        self.request_queues = list(request_queues)
+        self.replies = {}
+        self.published = {}
+        self.resets = 0
+
+    def inference_requests(self):
+        return self.request_queues.pop(0) if len(self.request_queues) > 1 else self.request_queues[0]
+
+    def reply_queue(self, key):
+        return self.replies.setdefault(key, queue.Queue())
+
+    def rings(self):
+        return self.published
+
+    def reset(self):
+        self.resets += 1
+
+
+@pytest.fixture
+def rings(monkeypatch):
+    attached = {}
+
+    def attach(name):
+        if name == "gone":
+            raise FileNotFoundError(name)
+        return attached.setdefault(name, FakeRing(name))
+
+    monkeypatch.setattr(app.roles.FrameRing, "attach", staticmethod(attach))
+    return attached
+
+
+def replies(broker, key):
+    return sorted(broker.reply_queue(key).queue)
+
+
+def test_parse_address():
+    assert parse_address("127.0.0.1:50000") == ("127.0.0.1", 50000)
+    assert parse_address(":50000") == ("127.0.0.1", 50000)
+    assert parse_address("/tmp/roles.sock") == "/tmp/roles.sock"
+
+
+def test_batch_is_grouped_by_input_size(rings):
+    engine, broker = FakeEngine(), FakeBroker(queue.Queue())
+    server = InferenceServer(engine, broker)
+    server.serve_batch([
+        ("web", 1, "cam1", 1, 640, None),
+        ("web", 2, "cam2", 5, 320, None),
+        ("capture", 1, "cam1", 2, 640, None),
+    ])
+    assert sorted(engine.batches) == [(320, ["cam2:5"]), (640, ["cam1:1", "cam1:2"])]
+    assert replies(broker, "web") == [(1, "det(cam1:1)", None), (2, "det(cam2:5)", None)]
+    assert replies(broker, "capture") == [(1, "det(cam1:2)", None)]
+
+
+def test_overwritten_or_missing_frames_are_reported(rings):
+    engine, broker = FakeEngine(), FakeBroker(queue.Queue())
+    server = InferenceServer(engine, broker)
+    rings.setdefault("cam1", FakeRing("cam1")).overwritten.add(1)
+    server.serve_batch([("web", 1, "cam1", 1, 640, None), ("web", 2, "gone", 1, 640, None)])
+    assert engine.batches == []
+    assert [error for _, detections, error in replies(broker, "web")] == ["프레임이 이미 덮어써졌습니다"] * 2
+
+
+def test_idle_rings_and_replies_are_evicted(rings):
+    broker = FakeBroker(queue.Queue())
+    server = InferenceServer(FakeEngine(), broker, cache_ttl=60.0)
+    server.serve_batch([("web", 1, "cam1", 1, 640, None)])
+    assert server.stats()["rings"] == server.stats()["replies"] == 1
+    server._evict(time.monotonic())
+    assert server.stats()["rings"] == 1
+    # 요청한 프로세스가 종료되어 cache_ttl 이 지나도록 쓰이지 않음
+    server._evict(time.monotonic() + 61.0)
+    assert server.stats()["rings"] == server.stats()["replies"] == 0
+    assert rings["cam1"].closed
+
+
+def test_server_reconnects_after_broker_restart(rings):
+    requests = queue.Queue()
+    broker = FakeBroker(DroppedQueue(), requests)
+    server = InferenceServer(FakeEngine(), broker, backoff_min=0.01)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    requests.put(("web", 1, "cam1", 1, 640, None))
+    reply = broker.reply_queue("web").get(timeout=5.0)
+    assert reply == (1, "det(cam1:1)", None)
+    assert server.reconnects == broker.resets == 1
+
+
+def test_publisher_republishes_after_broker_restart():
+    broker = FakeBroker(queue.Queue())
+    publish = RingPublisher(broker)
+    publish("CCTV1", "ring-a")
+    publish("CCTV2", "ring-b")
+    assert broker.published == {"CCTV1": "ring-a", "CCTV2": "ring-b"}
+    assert publish.sync() == 0
+    # 큐 서버가 재시작되어 공개한 이름이 사라짐
+    broker.published = {}
+    assert publish.sync() == 2
+    assert broker.published == {"CCTV1": "ring-a", "CCTV2": "ring-b"}
+
+
+def test_closed_ring_is_unpublished():
+    broker = FakeBroker(queue.Queue())
+    publish = RingPublisher(broker)
+    publish("CCTV1", "ring-a")
+    publish("CCTV1", None)
+    assert broker.published == {}
+    assert publish.sync() == 0
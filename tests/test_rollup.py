@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models import DensityRollup
+from app.rollup import RollupUpdater
+
+
+def row(time, count=1, level="정상", cctv_id=1):
+    return {"cctv_id": cctv_id, "detection_time": time, "object_count": count, "overcrowding_level": level}
+
+
+def test_samples_are_counted_per_bucket():
+    base = datetime(2024, 5, 1, 10, 0, 10)
+    deltas = RollupUpdater().compute([row(base, 3), row(base + timedelta(seconds=20), 5), row(base + timedelta(minutes=1), 2)])
+    first = deltas[(1, "minute", datetime(2024, 5, 1, 10, 0))]
+    assert (first["sample_count"], first["object_count_sum"], first["object_count_max"]) == (2, 8, 5)
+    assert deltas[(1, "minute", datetime(2024, 5, 1, 10, 1))]["sample_count"] == 1
+    assert deltas[(1, "hour", datetime(2024, 5, 1, 10))]["sample_count"] == 3
+    assert deltas[(1, "day", datetime(2024, 5, 1))]["object_count_max"] == 5
+
+
+def test_duration_is_split_across_minute_and_hour_buckets():
+    start = datetime(2024, 5, 1, 10, 59, 30)
+    # 10:59:30 부터 11:00:45 까지는 직전 수준 "위험" 으로 배분
+    deltas = RollupUpdater().compute([row(start, level="위험"), row(start + timedelta(seconds=75), level="정상")])
+    assert deltas[(1, "minute", datetime(2024, 5, 1, 10, 59))]["danger_seconds"] == pytest.approx(30)
+    assert deltas[(1, "minute", datetime(2024, 5, 1, 11, 0))]["danger_seconds"] == pytest.approx(45)
+    assert deltas[(1, "hour", datetime(2024, 5, 1, 10))]["danger_seconds"] == pytest.approx(30)
+    assert deltas[(1, "hour", datetime(2024, 5, 1, 11))]["danger_seconds"] == pytest.approx(45)
+    assert deltas[(1, "day", datetime(2024, 5, 1))]["danger_seconds"] == pytest.approx(75)
+    assert deltas[(1, "day", datetime(2024, 5, 1))]["normal_seconds"] == 0
+
+
+def test_gap_longer_than_max_gap_is_not_attributed():
+    start = datetime(2024, 5, 1, 10, 0)
+    deltas = RollupUpdater(max_gap=60).compute([row(start, level="경고"), row(start + timedelta(minutes=5))])
+    assert all(delta["warning_seconds"] == 0 for delta in deltas.values())
+
+
+def test_last_state_carries_over_only_after_commit():
+    updater = RollupUpdater()
+    start = datetime(2024, 5, 1, 10, 0)
+    updater.compute([row(start, level="주의")])
+    # 커밋되지 않은 배치의 마지막 상태는 다음 계산에 쓰지 않음
+    retried = updater.compute([row(start + timedelta(seconds=10))])
+    assert retried[(1, "day", datetime(2024, 5, 1))]["caution_seconds"] == 0
+    updater.compute([row(start, level="주의")])
+    updater.committed([])
+    deltas = updater.compute([row(start + timedelta(seconds=10))])
+    assert deltas[(1, "day", datetime(2024, 5, 1))]["caution_seconds"] == pytest.approx(10)
+
+
+def test_apply_adds_to_existing_rollup_rows(cctvs):
+    updater = RollupUpdater()
+    start = datetime(2024, 5, 1, 10, 0)
+    cctv_pk = cctvs[0].id
+    updater.apply([row(start, 2, cctv_id=cctv_pk)])
+    db.session.commit()
+    updater.committed([])
+    updater.apply([row(start + timedelta(seconds=30), 6, cctv_id=cctv_pk)])
+    db.session.commit()
+    rollup = DensityRollup.query.filter_by(cctv_id=cctv_pk, granularity="minute").one()
+    assert (rollup.sample_count, rollup.object_count_sum, rollup.object_count_max) == (2, 8, 6)
+    assert rollup.normal_seconds == pytest.approx(30)
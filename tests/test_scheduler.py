@@ -0,0 +1,86 @@
+import concurrent.futures
+
+import numpy as np
+import pytest
+
+from app.scheduler import BatchScheduler
+
+
+class FakeEngine:
+    """predict_batch 호출을 기록하고 프레임 값을 그대로 결과로 돌려주는 엔진."""
+
+    def __init__(self, error=None):
+        self.calls = []
+        self.error = error
+
+    def predict_batch(self, frames, imgsz=None):
+        self.calls.append((imgsz, len(frames)))
+        if self.error is not None:
+            raise self.error
+        return [int(frame[0, 0, 0]) for frame in frames]
+
+
+def make_frame(value):
+    return np.full((2, 2, 3), value, dtype=np.uint8)
+
+
+@pytest.fixture
+def make_scheduler():
+    schedulers = []
+
+    def make(engine, **options):
+        scheduler = BatchScheduler(engine, **options)
+        schedulers.append(scheduler)
+        return scheduler
+
+    yield make
+    for scheduler in schedulers:
+        scheduler.stop()
+
+
+def test_newer_frame_replaces_pending_frame(make_scheduler):
+    engine = FakeEngine()
+    scheduler = make_scheduler(engine, max_batch_size=2, max_wait=5.0, max_age=5.0)
+    replaced = scheduler.submit("A", make_frame(1))
+    latest = scheduler.submit("A", make_frame(2))
+    # 두 번째 카메라가 들어와 배치가 차야 추론이 시작됨
+    other = scheduler.submit("B", make_frame(3))
+    assert latest.result(timeout=2) == 2
+    assert other.result(timeout=2) == 3
+    assert replaced.cancelled()
+    assert engine.calls == [(None, 2)]
+    assert scheduler.stats()["dropped"] == 1
+
+
+def test_frame_older_than_max_age_is_dropped(make_scheduler):
+    engine = FakeEngine()
+    scheduler = make_scheduler(engine, max_batch_size=4, max_wait=0.05, max_age=0.01)
+    future = scheduler.submit("A", make_frame(1))
+    with pytest.raises(concurrent.futures.CancelledError):
+        future.result(timeout=2)
+    assert engine.calls == []
+    assert scheduler.stats()["dropped"] == 1
+
+
+def test_batches_are_grouped_by_imgsz(make_scheduler):
+    engine = FakeEngine()
+    scheduler = make_scheduler(engine, max_batch_size=3, max_wait=5.0, max_age=5.0)
+    futures = {
+        "A": scheduler.submit("A", make_frame(1), imgsz=320),
+        "B": scheduler.submit("B", make_frame(2), imgsz=640),
+        "C": scheduler.submit("C", make_frame(3), imgsz=320),
+    }
+    results = {cctv_id: future.result(timeout=2) for cctv_id, future in futures.items()}
+    # 결과는 각 카메라의 Future 로 돌아감
+    assert results == {"A": 1, "B": 2, "C": 3}
+    assert sorted(engine.calls) == [(320, 2), (640, 1)]
+    stats = scheduler.stats()
+    assert (stats["batches"], stats["frames"], stats["dropped"]) == (2, 3, 0)
+
+
+def test_engine_error_fails_the_batch(make_scheduler):
+    scheduler = make_scheduler(FakeEngine(error=RuntimeError("boom")), max_batch_size=1, max_wait=5.0)
+    future = scheduler.submit("A", make_frame(1))
+    with pytest.raises(RuntimeError, match="boom"):
+        future.result(timeout=2)
+    assert scheduler.stats()["batches"] == 0
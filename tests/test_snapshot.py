@@ -0,0 +1,26 @@
+import logging
+
+import numpy as np
+
+from app.snapshot import SnapshotWriter, snapshot_name
+
+
+def test_snapshot_name_is_safe_and_unique():
+    first, second = snapshot_name("1층 로비/입구", "CCTV1"), snapshot_name("1층 로비/입구", "CCTV1")
+    assert first.startswith("1층_로비_입구_CCTV1_")
+    assert first != second
+
+
+def test_written_and_failed_snapshots(tmp_path, caplog):
+    writer = SnapshotWriter(str(tmp_path), "/static/images", workers=1)
+    try:
+        name = writer.save(np.zeros((4, 4, 3), dtype=np.uint8), "ok")
+        # 빈 프레임은 인코딩에 실패
+        bad = writer.save(np.zeros((0, 0, 3), dtype=np.uint8), "bad")
+        with caplog.at_level(logging.ERROR, logger="app.snapshot"):
+            writer.flush()
+    finally:
+        writer.close()
+    assert (tmp_path / name).exists()
+    assert writer.stats()["written"] == writer.stats()["failed"] == 1
+    assert f"스냅샷 저장 실패: {bad}" in caplog.text
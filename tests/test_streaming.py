@@ -0,0 +1,153 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import app.streaming
+from app.streaming import CameraStream, StreamClient
+
+
+class FakeCapture:
+    def __init__(self):
+        self.seq = 0
+
+    def read(self, after_seq=0, timeout=2.0, copy=True):
+        time.sleep(0.005)
+        self.seq += 1
+        return self.seq, np.full((8, 8, 3), self.seq % 255, dtype=np.uint8)
+
+    def valid(self, seq):
+        return True
+
+
+class FakePool:
+    def __init__(self, capture):
+        self.capture = capture
+
+    def get(self, cctv_id, source):
+        return self.capture
+
+
+@pytest.fixture
+def detections(monkeypatch):
+    calls = []
+
+    def generate(frame, tracker=None, gate=None, cctv_id=None, region=None):
+        calls.append(cctv_id)
+        return frame.copy()
+
+    monkeypatch.setattr(app.streaming, "get_capture_pool", lambda: FakePool(FakeCapture()))
+    monkeypatch.setattr(app.streaming, "generate_webcam_data", generate)
+    return calls
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_client_keeps_only_newest_frames():
+    client = StreamClient(buffer_size=2)
+    for jpeg in (b"1", b"2", b"3"):
+        client.push(jpeg)
+    assert client.dropped == 1
+    assert [client.pop(0), client.pop(0), client.pop(0)] == [b"2", b"3", None]
+
+
+def test_viewers_share_one_inference_per_frame(detections):
+    stream = CameraStream("CCTV1", 0, max_fps=0, buffer_size=100, idle_timeout=0.2)
+    first, second = stream.subscribe(), stream.subscribe()
+    wait_for(lambda: stream.frames_encoded >= 5)
+    stream.unsubscribe(first)
+    stream.unsubscribe(second)
+    wait_for(lambda: not stream.running)
+    # 시청자가 둘이어도 프레임마다 추론과 인코딩은 한 번
+    assert len(detections) == stream.frames_encoded
+    assert first.frames[-1] == second.frames[-1]
+
+
+def test_frame_errors_are_skipped(monkeypatch, detections):
+    failures = iter([True, False])
+
+    def flaky(frame, *args):
+        if next(failures, False):
+            raise RuntimeError("inference timeout")
+        return frame.copy()
+
+    monkeypatch.setattr(app.streaming, "generate_webcam_data", flaky)
+    stream = CameraStream("CCTV1", 0, max_fps=100, idle_timeout=0.2)
+    client = stream.subscribe()
+    # 오류가 난 프레임만 건너뛰고 스트림은 계속 됨
+    assert next(stream.mjpeg(client)).startswith(b"--frame")
+    assert stream.errors == 1
+    assert stream.running
+    stream.unsubscribe(client)
+    wait_for(lambda: not stream.running)
+
+
+def test_viewers_are_released_when_the_stream_dies(monkeypatch, detections):
+    def broken_pool():
+        raise RuntimeError("capture unavailable")
+
+    monkeypatch.setattr(app.streaming, "get_capture_pool", broken_pool)
+    stream = CameraStream("CCTV1", 0, idle_timeout=0.2)
+    client = stream.subscribe()
+    frames = []
+    reader = threading.Thread(target=lambda: frames.extend(stream.mjpeg(client)))
+    reader.start()
+    # 시청자 응답이 끝나고 다음 구독자는 스트림을 다시 시작
+    reader.join(timeout=2)
+    assert not reader.is_alive()
+    assert frames == [] and client.closed
+    assert stream._thread is None
+
+    monkeypatch.setattr(app.streaming, "get_capture_pool", lambda: FakePool(FakeCapture()))
+    client = stream.subscribe()
+    assert client.pop(timeout=2) is not None
+    stream.unsubscribe(client)
+    wait_for(lambda: not stream.running)
+
+
+class FakeScheduler:
+    def __init__(self):
+        self.calls = []
+
+    def infer(self, cctv_id, frame, timeout=None, imgsz=None):
+        self.calls.append((cctv_id, imgsz))
+        return np.array([[1, 1, 5, 7, 0.9, 0]], dtype=np.float32)
+
+
+def test_live_frames_go_through_the_batch_scheduler(monkeypatch):
+    import app.utils
+    scheduler = FakeScheduler()
+    monkeypatch.setattr(app.utils, "get_scheduler", lambda: scheduler)
+    frame = np.zeros((8, 8, 3), dtype=np.uint8)
+    annotated, summary = app.utils.analyze_frame(frame, cctv_id="CCTV1")
+    # 파이프라인 샘플과 겹치지 않도록 시청 스트림 전용 슬롯으로 요청
+    assert scheduler.calls == [("CCTV1/stream", None)]
+    assert summary.count == 1
+    assert annotated is not frame
+
+
+def test_expired_frames_are_skipped_without_backoff(monkeypatch):
+    from concurrent.futures import CancelledError
+    expired = []
+
+    def generate(frame, tracker=None, gate=None, cctv_id=None, region=None):
+        if len(expired) < 3:
+            expired.append(1)
+            raise CancelledError()
+        return frame.copy()
+
+    monkeypatch.setattr(app.streaming, "get_capture_pool", lambda: FakePool(FakeCapture()))
+    monkeypatch.setattr(app.streaming, "generate_webcam_data", generate)
+    stream = CameraStream("TEST", 0, max_fps=0, idle_timeout=0.1)
+    client = stream.subscribe()
+    assert client.pop(timeout=0.5) is not None
+    stream.unsubscribe(client)
+    wait_for(lambda: not stream.running)
+    assert stream.frames_expired == 3
+    assert stream.errors == 0
@@ -0,0 +1,79 @@
+import numpy as np
+
+import app.inference
+from app.detection import summarize_detections
+from app.inference import InferenceEngine
+from app.tracking import KeyframeTracker, PersonTracker
+
+
+def box(x, y, score=0.9):
+    return [x, y, x + 40, y + 80, score, 0]
+
+
+def update(tracker, detections, now):
+    detections = np.array(detections, dtype=np.float32).reshape(-1, 6)
+    return tracker.update(detections[:, :4], detections[:, 4], now).tolist()
+
+
+def test_ids_are_confirmed_after_min_hits_and_persist():
+    tracker = PersonTracker(min_hits=2)
+    assert update(tracker, [box(0, 0), box(200, 0)], now=0.0) == [-1, -1]
+    assert update(tracker, [box(205, 2), box(3, 1)], now=0.1) == [2, 1]
+    assert update(tracker, [box(6, 2), box(210, 4)], now=0.2) == [1, 2]
+    assert tracker.active_count == 2
+
+
+def test_low_confidence_detection_keeps_track_alive():
+    tracker = PersonTracker(high_conf=0.5, low_conf=0.1, max_age=0.15)
+    update(tracker, [box(0, 0)], now=0.0)
+    update(tracker, [box(2, 0)], now=0.1)
+    # 가려져 신뢰도가 떨어진 탐지도 2단계 매칭으로 같은 ID 를 유지
+    assert update(tracker, [box(4, 0, score=0.2)], now=0.2) == [1]
+    assert update(tracker, [box(6, 0, score=0.2)], now=0.3) == [1]
+    assert tracker.active_count == 1
+
+
+def test_low_confidence_detection_does_not_start_track():
+    tracker = PersonTracker(high_conf=0.5, low_conf=0.1, min_hits=1)
+    assert update(tracker, [box(0, 0, score=0.3), box(100, 0, score=0.05)], now=0.0) == [-1, -1]
+    assert tracker.tracks == []
+
+
+def test_stale_tracks_expire():
+    tracker = PersonTracker(max_age=0.5)
+    update(tracker, [box(0, 0)], now=0.0)
+    update(tracker, [box(0, 0)], now=0.1)
+    update(tracker, [], now=1.0)
+    assert tracker.active_count == 0
+    assert update(tracker, [box(0, 0)], now=1.1) == [-1]
+
+
+def test_keyframe_tracker_extrapolates_between_keyframes():
+    tracker = KeyframeTracker(PersonTracker(min_hits=1), keyframe_interval=2)
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+    calls = []
+
+    def detect(f):
+        calls.append(1)
+        return np.array([box(10 + 10 * len(calls), 0)], dtype=np.float32)
+
+    summary, keyframe = tracker.step(frame, detect, summarize_detections, now=0.0)
+    assert keyframe and summary.track_ids.tolist() == [1]
+    summary, keyframe = tracker.step(frame, detect, summarize_detections, now=0.1)
+    assert not keyframe and summary.track_ids.tolist() == [1]
+    summary, keyframe = tracker.step(frame, detect, summarize_detections, now=0.2)
+    assert keyframe and len(calls) == 2
+    # 이동 속도가 추정되어 다음 사이 프레임은 앞으로 외삽
+    summary, _ = tracker.step(frame, detect, summarize_detections, now=0.3)
+    assert summary.boxes[0, 0] > 30
+
+
+def test_engine_detects_down_to_tracking_threshold(monkeypatch):
+    created = {}
+    monkeypatch.setattr(app.inference, "create_backend", lambda name, path, **options: created.update(options) or object())
+    engine = InferenceEngine(conf=0.5, track_conf=0.1)
+    engine.load()
+    # 백엔드는 추적기 2단계용 낮은 신뢰도까지 내보내고, 추적 없는 집계 기준은 conf 그대로
+    assert created["conf"] == engine.detect_conf == 0.1
+    assert engine.conf == 0.5
+    assert InferenceEngine(conf=0.5).detect_conf == 0.5
@@ -0,0 +1,100 @@
+import multiprocessing
+import os
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+from app.workers import InferenceWorkerPool, thread_environment
+
+
+def _child_threads():
+    return os.environ.get("OMP_NUM_THREADS"), os.environ.get("OPENBLAS_NUM_THREADS")
+
+
+def test_spawned_child_inherits_thread_environment(monkeypatch):
+    monkeypatch.setenv("OMP_NUM_THREADS", "8")
+    monkeypatch.delenv("OPENBLAS_NUM_THREADS", raising=False)
+    context = multiprocessing.get_context("spawn")
+    with thread_environment(2):
+        pool = context.Pool(1)
+    try:
+        assert pool.apply(_child_threads) == ("2", "2")
+    finally:
+        pool.close()
+        pool.join()
+    # 부모 프로세스의 환경은 원래대로
+    assert os.environ["OMP_NUM_THREADS"] == "8"
+    assert "OPENBLAS_NUM_THREADS" not in os.environ
+
+
+class FakeProcess:
+    def __init__(self, index):
+        self.name = f"inference-worker-{index}"
+        self.alive = True
+        self.exitcode = None
+
+    def is_alive(self):
+        return self.alive
+
+    def join(self, timeout=None):
+        # 종료 요청(None)을 받은 워커처럼 끝남
+        self.kill(exitcode=0)
+
+    def kill(self, exitcode=-9):
+        self.alive = False
+        self.exitcode = exitcode
+
+
+class FakeWorkerPool(InferenceWorkerPool):
+    """워커 프로세스 대신 FakeProcess 를 띄우고 응답 수집 스레드 없이 _check_workers 를 직접 호출하는 풀."""
+
+    def _start_worker(self, index):
+        return FakeProcess(index)
+
+    def _wait_ready(self, timeout):
+        pass
+
+    def _collect(self):
+        pass
+
+
+@pytest.fixture
+def pool():
+    pool = FakeWorkerPool(workers=2, slots_per_worker=1, max_frame_shape=(4, 4, 3), restart_interval=0.0)
+    yield pool
+    pool.close()
+
+
+def test_dead_worker_fails_its_requests_and_restarts(pool):
+    frame = np.zeros((4, 4, 3), dtype=np.uint8)
+    first, second = pool.submit(frame), pool.submit(frame)
+    dead = pool._processes[0]
+    dead.kill()
+    pool._check_workers()
+    # 죽은 워커 0 의 요청만 실패하고 그 슬롯은 다시 쓸 수 있음
+    with pytest.raises(RuntimeError, match="exit code -9"):
+        first.result(timeout=0)
+    assert not second.done()
+    assert pool.stats()["free_slots"] == 1
+    assert pool.restarts == 1
+    assert pool._processes[0] is not dead and pool._processes[0].is_alive()
+
+
+def test_crash_looping_worker_waits_for_restart_interval(pool):
+    pool.restart_interval = 3600.0
+    pool._processes[1].kill()
+    pool._check_workers()
+    assert pool.restarts == 0
+    assert pool.stats()["alive"] == 1
+
+
+def test_stats_report_batch_split(pool, monkeypatch):
+    def submit(frame, imgsz=None):
+        future = Future()
+        future.set_result(frame)
+        return future
+
+    monkeypatch.setattr(pool, "submit", submit)
+    assert pool.predict_batch([1, 2, 3]) == [1, 2, 3]
+    assert pool.stats()["predict_batch"] == {"mode": "per_frame", "calls": 1, "frames": 3}